@@ -0,0 +1,71 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Measures PolarisClient construction time with the .graphql files parsed from source and with the
+precompiled operation index. Run from the repository root: python benchmarks/client_startup.py
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rubrik_polaris.rubrik_polaris import PolarisClient  # noqa: E402
+from rubrik_polaris.common import graphql  # noqa: E402
+
+ROUNDS = 200
+
+
+def _construct():
+    graphql._operation_indexes.clear()  # Measure the cold start of a new process
+    PolarisClient(domain='benchmark', username='user', password='password', insecure=True)
+
+
+def _eager_construct():
+    _construct()
+    client = PolarisClient(domain='benchmark', username='user', password='password', insecure=True)
+    # Load the details of every operation, like the client did before they were loaded on first use
+    _ = [client._graphql_query_map[query_name] for query_name in client._graphql_query_map]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, 'graphql_index.json')
+        graphql.write_operation_index(index_path=index_path)
+
+        graphql.GRAPHQL_INDEX_PATH = os.path.join(tmp, 'missing.json')
+
+        source = timeit.timeit(_eager_construct, number=ROUNDS) / ROUNDS
+        lazy_source = timeit.timeit(_construct, number=ROUNDS) / ROUNDS
+        graphql.GRAPHQL_INDEX_PATH = index_path
+        indexed = timeit.timeit(_construct, number=ROUNDS) / ROUNDS
+
+    print("Eagerly compiled from .graphql files: {:8.3f} ms".format(source * 1000))
+    print("Lazily compiled from .graphql files:  {:8.3f} ms".format(lazy_source * 1000))
+    print("Precompiled operation index:          {:8.3f} ms".format(indexed * 1000))
+
+
+if __name__ == '__main__':
+    main()
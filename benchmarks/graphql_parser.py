@@ -0,0 +1,89 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Compares the time to extract the details of every bundled .graphql document with the GraphQL parser and with the
+regular expressions it replaced. Run from the repository root: python benchmarks/graphql_parser.py
+"""
+
+import glob
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rubrik_polaris.common.graphql import GRAPHQL_SOURCE_PATH, _get_details_from_graphql_query  # noqa: E402
+
+ROUNDS = 50
+
+
+def _regex_details(graphql_query_text):
+    """ The regular expression extraction used before the parser, for comparison. """
+    o = {}
+    try:
+        o['gql_name'] = re.findall(r' +(\S+) ?\(.*', graphql_query_text)[1]
+        paren = re.search(r'\((.*?)\)', graphql_query_text).group(1).split(',')
+        for i in paren:
+            item = re.search(r'^(.*):(.*$)', i)
+            var_name = item.group(1).strip()
+            o[var_name] = {}
+            if '=' in item.group(2):
+                default_split = item.group(2).split('=')
+                o[var_name]['default'] = default_split[1].strip()
+                o[var_name]['type'] = default_split[0].strip()
+            else:
+                o[var_name]['default'] = None
+                o[var_name]['type'] = item.group(2).strip()
+            if '[' in o[var_name]['type']:
+                o[var_name]['type'] = re.search(r'\[(.*)\]', o[var_name]['type']).group(1)
+                o[var_name]['typeOf'] = 'arrayOf'
+            else:
+                o[var_name]['typeOf'] = 'stringOf'
+            if '!' in o[var_name]['type']:
+                o[var_name]['required'] = True
+                o[var_name]['type'] = o[var_name]['type'].replace("!", "")
+            else:
+                o[var_name]['required'] = False
+    except Exception:
+        o['gql_name'] = re.sub(r"[\{|\}]", "", re.search(r'\{(.*)\}', re.sub(r"[\n\t\s]*", "", graphql_query_text))
+                               .group(0))
+    return o
+
+
+def main():
+    documents = []
+    for path in sorted(glob.glob(os.path.join(GRAPHQL_SOURCE_PATH, '*.graphql'))):
+        with open(path) as f:
+            documents.append(f.read())
+
+    regex = timeit.timeit(lambda: [_regex_details(d) for d in documents], number=ROUNDS) / ROUNDS
+    parser = timeit.timeit(lambda: [_get_details_from_graphql_query(None, d) for d in documents], number=ROUNDS) / ROUNDS
+
+    print("{} documents".format(len(documents)))
+    print("Regular expressions: {:8.3f} ms".format(regex * 1000))
+    print("GraphQL parser:      {:8.3f} ms".format(parser * 1000))
+
+
+if __name__ == '__main__':
+    main()
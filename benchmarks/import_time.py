@@ -0,0 +1,79 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Measures the time to import the SDK, to import it with every client method resolved (the cost before methods
+were loaded lazily), and the overhead of the first call of a lazily loaded method.
+Run from the repository root: python benchmarks/import_time.py
+"""
+
+import os
+import subprocess
+import sys
+
+ROUNDS = 20
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT = """
+import time
+start = time.perf_counter()
+from rubrik_polaris.rubrik_polaris import PolarisClient
+{}
+print(time.perf_counter() - start)
+"""
+
+FIRST_CALL = """
+import time
+from rubrik_polaris.rubrik_polaris import PolarisClient
+client = PolarisClient(domain='benchmark', username='user', password='password', insecure=True)
+start = time.perf_counter()
+client.to_boolean
+first = time.perf_counter() - start
+start = time.perf_counter()
+client.to_boolean
+print(first, time.perf_counter() - start)
+"""
+
+
+def _run(code):
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+    return [float(value) for value in output.split()]
+
+
+def _best(code):
+    return [min(values) for values in zip(*(_run(code) for _ in range(ROUNDS)))]
+
+
+def main():
+    lazy, = _best(IMPORT.format(''))
+    eager, = _best(IMPORT.format(
+        'from rubrik_polaris.common.lazy import resolve_lazy_methods\nresolve_lazy_methods(PolarisClient)'))
+    first, later = _best(FIRST_CALL)
+
+    print("Import with lazy methods:        {:8.2f} ms".format(lazy * 1000))
+    print("Import with every method loaded: {:8.2f} ms".format(eager * 1000))
+    print("First access of a method:        {:8.3f} ms".format(first * 1000))
+    print("Later accesses of the method:    {:8.3f} ms".format(later * 1000))
+
+
+if __name__ == '__main__':
+    main()
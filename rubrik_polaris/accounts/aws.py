@@ -262,11 +262,12 @@ def get_account_aws_native_id(self, profile='', aws_id=None, aws_secret=None):
         raise
 
 
-def _disable_account_aws(self, polaris_account_id):
+def _disable_account_aws(self, polaris_account_id, return_handle=False):
     """Disables AWS Account in Polaris
 
     Arguments:
         polaris_account_id {str} -- Account ID to disable in Polaris
+        return_handle {bool} -- Return the JobHandle of the disable job instead of waiting for it
     """
     try:
         query_name = "accounts_aws_disable"
@@ -274,6 +275,8 @@ def _disable_account_aws(self, polaris_account_id):
             "polaris_account_id": polaris_account_id
         }
         result = self._query(query_name, variables)
+        if return_handle:
+            return self._job_poller.submit(result)
         monitor = self._monitor_task(result)
         if monitor['status'] != 'SUCCEEDED':
             raise Exception("Failed to disable account")
@@ -0,0 +1,66 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+from .rubrik_polaris import PolarisClient
+
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+class AsyncPolarisClient(PolarisClient):
+    """PolarisClient whose query primitives are coroutines running on an asyncio event loop.
+
+    The GraphQL documents, validation and response handling are shared with PolarisClient,
+    so every synchronous method remains available. Use ``_aquery``, ``_aquery_paginated``,
+    ``_anamed_raw_query`` and ``_aquery_raw`` to keep many requests in flight on one loop.
+    Requires the optional ``aiohttp`` package.
+
+    Accepts the same arguments as PolarisClient, plus:
+        max_connections (int): Maximum number of concurrent connections of the event loop session (default 100)
+
+    Examples:
+        >>> async def main():
+        ...     async with AsyncPolarisClient(json_keyfile='sa.json') as client:
+        ...         slas, clusters = await asyncio.gather(
+        ...             client._aquery('core_sla_list', {'filter': []}),
+        ...             client._aquery('gps_clusters'))
+        ...         async for row in client._aquery_paginated('core_report_data', {'first': 1000}):
+        ...             print(row['name'])
+    """
+    # Private
+    from .common.async_connection import _aquery, _aquery_paginated, _aquery_raw, _anamed_raw_query
+
+    def __init__(self, domain=None, username=None, password=None, json_keyfile=None, **kwargs):
+        super().__init__(domain=domain, username=username, password=password, json_keyfile=json_keyfile, **kwargs)
+        self._max_connections = kwargs.get('max_connections', DEFAULT_MAX_CONNECTIONS)
+        self._aio_session = None
+        self._auth_lock = None
+
+    async def aclose(self):
+        """Closes the event loop session and the pooled HTTP connections of the client."""
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
+        self._aio_session = None
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
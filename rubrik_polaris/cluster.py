@@ -55,15 +55,24 @@ def get_cdm_cluster_location(self, cluster_id):
 def get_cdm_cluster_connection_status(self, cluster_id):
     """Retrieves the Polaris connection status for a CDM Cluster
     Args:
-        cluster_id (str): The ID of a CDM cluster
+        cluster_id (str or list): The ID of a CDM cluster, or a list of them to retrieve in batched requests
     Returns:
-        str: The Cluster connection status.
+        str: The Cluster connection status, or a dict of connection status by cluster ID when a list was given.
 
     Raises:
         RequestException: If the query to Polaris returned an error
     """
     try:
         query_name = "cdm_cluster_connection_status"
+        if isinstance(cluster_id, (list, tuple, set)):
+            cluster_ids = list(cluster_id)
+            responses = self._query_batch([(query_name, {"filter": {"id": [i]}}) for i in cluster_ids])
+            statuses = {}
+            for i, query in zip(cluster_ids, responses):
+                if not query['nodes']:
+                    raise Exception("A CDM Cluster with an ID of {} was not found.".format(i))
+                statuses[i] = query['nodes'][0]['state']['connectedState']
+            return statuses
         variables = {
             "filter": {
                 "id": [cluster_id]
@@ -0,0 +1,271 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+"""
+Collection of awaitable methods that control connection with Polaris.
+"""
+
+import asyncio
+import json
+import time
+
+from rubrik_polaris.exceptions import RequestException, PolarisException, PersistedQueryException
+from rubrik_polaris.common.connection import _build_request_body, _check_response, _get_next_cursor, _is_mutation, \
+    _is_cached, _invalidate_cache, _dump_page_nodes, _hashed_body, _source_size, _validate_positive_int
+from rubrik_polaris.common.persisted import persisted_query_extension, _check_persisted_query
+from rubrik_polaris.common.projection import _projected_query
+from rubrik_polaris.common.singleflight import single_flight_key
+
+ERROR_MESSAGES = {
+    "AIOHTTP_NOT_INSTALLED": "AsyncPolarisClient requires the 'aiohttp' package. Install it with "
+                             "'pip install aiohttp'."
+}
+
+
+async def _aquery_paginated(self, query_name=None, variables=None, timeout=None, fields=None, page_size=None,
+                            limit=None):
+    """ Perform query against Polaris and return an async iterator of entries. It
+    handles responses that has more than one page of entries by requesting
+    consecutive pages as entries are read from the iterator, see _query_paginated.
+    """
+    self._validate(query_name=query_name)
+    q = self._graphql_query_map[query_name]
+    self._validate_required_variables(query_name, variables)
+    _validate_positive_int('page_size', page_size)
+    _validate_positive_int('limit', limit, minimum=0)
+    query_text, operation_name = _projected_query(self, q, fields)
+    variables = dict(variables or {})
+    if page_size is not None and 'first' in q:
+        variables['first'] = page_size
+    page_size = variables.get('first')
+    remaining = limit
+
+    while remaining is None or remaining > 0:
+        if remaining is not None and page_size:
+            variables['first'] = min(page_size, remaining)
+        api_response = await self._aquery_raw(query_text, operation_name, variables, timeout)
+        nodes = _dump_page_nodes(self, api_response, q['page_path'])
+        for node in nodes if isinstance(nodes, list) else [nodes]:
+            if remaining is not None:
+                remaining -= 1
+            yield node
+            if remaining == 0:
+                return
+        cursor = _get_next_cursor(api_response, q['page_path'])
+        if cursor is None:
+            break
+        variables['after'] = cursor
+
+
+async def _aquery(self, query_name=None, variables=None, timeout=None, fields=None):
+    """ Perform query against Polaris
+    """
+    self._validate(query_name=query_name)
+    q = self._graphql_query_map[query_name]
+    self._validate_required_variables(query_name, variables)
+    api_response = await self._aquery_raw(*_projected_query(self, q, fields), variables, timeout)
+    if api_response['data'].get('pageInfo'):
+        raise Exception("use _aquery_paginated instead of _aquery for when expected response is paged")
+
+    return self._dump_nodes(api_response)
+
+
+async def _anamed_raw_query(self, query_name=None, variables=None, timeout=None, fields=None):
+    """ Perform query against Polaris and return the raw GraphQL response.
+    NOTE! This shouldn't be used in normal circumstances, use _aquery instead (or
+    _aquery_paginated when the response is paginated).
+    """
+    self._validate(query_name=query_name)
+    q = self._graphql_query_map[query_name]
+    self._validate_required_variables(query_name, variables)
+    return await self._aquery_raw(*_projected_query(self, q, fields), variables, timeout)
+
+
+async def _aquery_raw(self, raw_query, operation_name, variables, timeout=None):
+    """ Perform raw GraphQL request on the event loop and return the raw response
+    in json format. Transient failures are retried according to the client retry policy.
+    """
+    body = _build_request_body(raw_query, operation_name, variables)
+    is_mutation = _is_mutation(raw_query)
+    query_name = self._query_names.get(operation_name)
+    cached = _is_cached(self, query_name, is_mutation)
+    if cached:
+        hit, api_response = self._response_cache.get(self._baseurl, query_name, variables, operation_name)
+        if hit:
+            return api_response
+
+    async def send():
+        api_response = await _asend_with_retries(self, body, operation_name, is_mutation, timeout)
+        if cached:
+            self._response_cache.put(self._baseurl, query_name, variables, api_response, operation_name)
+        return api_response
+
+    if is_mutation:
+        try:
+            return await send()
+        finally:
+            _invalidate_cache(self, query_name)
+    if self._single_flight is None:
+        return await send()
+    return await self._single_flight.ado(single_flight_key(raw_query, variables), send)
+
+
+async def _asend_with_retries(self, body, operation_name, is_mutation, timeout=None):
+    attempt = 0
+    while True:
+        attempt += 1
+        self._retry_stats.record_attempt(operation_name, attempt)
+        try:
+            return await _asend_document(self, body, operation_name, timeout,
+                                         'mutation' if is_mutation else 'query')
+        except RequestException as err:
+            if not self._retry_policy.should_retry(err, attempt, operation_name, is_mutation):
+                self._retry_stats.record_failure(operation_name)
+                raise
+            delay = self._retry_policy.backoff(attempt, err.retry_after)
+            self.logger.warning("Retrying {} in {:.2f}s after attempt {} failed: {}".format(
+                operation_name, delay, attempt, err))
+            self._retry_stats.record_retry(operation_name, delay)
+            await asyncio.sleep(delay)
+
+
+async def _asend_document(self, body, operation_name, timeout, operation_class):
+    """ Awaitable counterpart of _send_document. """
+    persisted = self._persisted_queries
+    query_text = body['query']
+    source_size = _source_size(self, operation_name, query_text)
+    if not persisted.send_hash(query_text):
+        resp = await _asend_limited(self, body, timeout, operation_class)
+        persisted.record(operation_name, source_size, len(query_text.encode('utf-8')))
+        return resp
+
+    try:
+        resp = await _asend_limited(self, _hashed_body(body), timeout, operation_class)
+        persisted.record(operation_name, source_size, 0, persisted=True)
+        return resp
+    except RequestException as err:
+        if not isinstance(err.__cause__, PersistedQueryException):
+            raise
+        persisted.rejected(query_text, err.__cause__.error_code)
+
+    if persisted.enabled:
+        body = dict(body, extensions=persisted_query_extension(query_text))
+    resp = await _asend_limited(self, body, timeout, operation_class)
+    persisted.registered(query_text)
+    persisted.record(operation_name, source_size, len(query_text.encode('utf-8')), persisted=False)
+    return resp
+
+
+async def _asend_limited(self, body, timeout, operation_class):
+    if self._rate_limiter is None:
+        return await _asend_graphql(self, body, timeout)
+
+    await self._rate_limiter.aacquire(operation_class)
+    start = time.monotonic()
+    try:
+        resp = await _asend_graphql(self, body, timeout)
+    except Exception as e:
+        self._rate_limiter.release(operation_class, error=e)
+        raise
+    self._rate_limiter.release(operation_class, latency=time.monotonic() - start)
+    return resp
+
+
+async def _asend_graphql(self, body, timeout=None):
+    aiohttp = _import_aiohttp()
+
+    status_code = None
+    retry_after = None
+    try:
+        session = _aget_session(self)
+        for attempt in range(2):
+            headers = await _aprepare_headers(self)
+            async with session.post(
+                    "{}/graphql".format(self._baseurl),
+                    headers=headers,
+                    json=body,
+                    proxy=_aget_proxy(self),
+                    timeout=_aget_timeout(self, timeout)
+            ) as raw_resp:
+                status_code = raw_resp.status
+                retry_after = raw_resp.headers.get('Retry-After')
+                if status_code == 401 and attempt == 0:
+                    # The access token was revoked or expired early, retry once with a new one
+                    self._token_manager.invalidate()
+                    continue
+                resp = await raw_resp.json(content_type=None, loads=self._json_loads or json.loads)
+                if 'query' not in body:
+                    _check_persisted_query(resp)
+                _check_response(self, resp)
+                raw_resp.raise_for_status()
+                return resp
+
+    except (RequestException, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        raise RequestException(e, status_code=status_code, error_code=getattr(e, 'error_code', None),
+                               retry_after=retry_after) from e
+
+
+async def _aprepare_headers(self):
+    """ Return the request headers, authenticating first if no access token is
+    available yet. Concurrent callers share a single authentication round trip.
+    """
+    if self._token_manager.needs_refresh():
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        async with self._auth_lock:
+            if self._token_manager.needs_refresh():
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._token_manager.get_token)
+    return dict(self.prepare_headers())
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise PolarisException(ERROR_MESSAGES['AIOHTTP_NOT_INSTALLED'])
+    return aiohttp
+
+
+def _aget_session(self):
+    aiohttp = _import_aiohttp()
+
+    if self._aio_session is None or self._aio_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=self._max_connections,
+            ssl=None if self._verify else False,
+            force_close=not self._kwargs.get('keep_alive', True)
+        )
+        self._aio_session = aiohttp.ClientSession(connector=connector)
+    return self._aio_session
+
+
+def _aget_proxy(self):
+    if not self._proxies:
+        return None
+    return self._proxies.get('https') or self._proxies.get('http')
+
+
+def _aget_timeout(self, timeout=None):
+    aiohttp = _import_aiohttp()
+
+    read_timeout = timeout if timeout is not None else self._read_timeout
+    return aiohttp.ClientTimeout(total=None, sock_connect=self._connect_timeout, sock_read=read_timeout)
@@ -0,0 +1,391 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Collection of methods that combine several GraphQL requests into a single aliased document.
+"""
+
+import functools
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+from rubrik_polaris.common.gql_parser import parse, print_document, response_key, Directive, Document, Field, \
+    InlineFragment, OperationDefinition, Value
+from rubrik_polaris.exceptions import PolarisException, RequestException, ValidationException
+
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_FLUSH_INTERVAL = 0.05
+BATCH_OPERATION_NAME = "SdkPythonBatch"
+
+ERROR_MESSAGES = {
+    "BATCHER_CLOSED": "The query batcher has been closed.",
+    "UNSUPPORTED_DOCUMENT": "The GraphQL document can't be batched: {}."
+}
+
+_ALIAS = re.compile(r'^b(\d+)_(.*)$')
+
+
+class _NotBatchable(ValueError):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_operation(query_text):
+    """ Parse a single-operation GraphQL document and check that its top-level fields can be aliased. """
+    try:
+        document = parse(query_text)
+    except ValidationException as e:
+        raise _NotBatchable(ERROR_MESSAGES['UNSUPPORTED_DOCUMENT'].format(str(e).rstrip('.')))
+    if len(document.operations) != 1:
+        raise _NotBatchable(ERROR_MESSAGES['UNSUPPORTED_DOCUMENT'].format("several operations"))
+    operation = document.operations[0]
+    if operation.operation not in ('query', 'mutation'):
+        raise _NotBatchable(ERROR_MESSAGES['UNSUPPORTED_DOCUMENT'].format("not a query or mutation"))
+    if operation.directives:
+        raise _NotBatchable(ERROR_MESSAGES['UNSUPPORTED_DOCUMENT'].format("operation directives"))
+    for selection in operation.selection_set:
+        if not isinstance(selection, Field):
+            raise _NotBatchable(ERROR_MESSAGES['UNSUPPORTED_DOCUMENT'].format("top-level fragment spread"))
+    return document
+
+
+def _rename_value(value, rename):
+    if value.kind == 'Variable':
+        name = rename(value.value)
+        return Value('Variable', name, '$' + name)
+    if value.kind == 'List':
+        items = [_rename_value(item, rename) for item in value.value]
+        return Value('List', items, '[{}]'.format(', '.join(item.text for item in items)))
+    if value.kind == 'Object':
+        fields = {name: _rename_value(field, rename) for name, field in value.value.items()}
+        return Value('Object', fields, '{{{}}}'.format(', '.join(
+            '{}: {}'.format(name, field.text) for name, field in fields.items())))
+    return value
+
+
+def _rename_arguments(arguments, rename):
+    return tuple((name, _rename_value(value, rename)) for name, value in arguments)
+
+
+def _rename_selection_set(selection_set, rename):
+    """ Return a copy of `selection_set` in which every variable name is replaced by rename(name). """
+    if selection_set is None:
+        return None
+    selections = []
+    for selection in selection_set:
+        directives = tuple(Directive(directive.name, _rename_arguments(directive.arguments, rename))
+                           for directive in selection.directives)
+        if isinstance(selection, Field):
+            selection = selection._replace(arguments=_rename_arguments(selection.arguments, rename),
+                                           directives=directives,
+                                           selection_set=_rename_selection_set(selection.selection_set, rename))
+        elif isinstance(selection, InlineFragment):
+            selection = selection._replace(directives=directives,
+                                           selection_set=_rename_selection_set(selection.selection_set, rename))
+        else:
+            selection = selection._replace(directives=directives)
+        selections.append(selection)
+    return tuple(selections)
+
+
+def _fragment_variable(name):
+    raise _NotBatchable(ERROR_MESSAGES['UNSUPPORTED_DOCUMENT'].format("variable in a fragment"))
+
+
+def _alias_operation(index, operation):
+    """ Return the variable definitions and top-level fields of `operation`, with every variable
+    and top-level response key prefixed by 'b<index>_'.
+    """
+    prefix = 'b{}_'.format(index)
+
+    def rename(name):
+        return prefix + name
+    variable_definitions = tuple(definition._replace(name=rename(definition.name))
+                                 for definition in operation.variable_definitions)
+    fields = tuple(field._replace(alias=prefix + response_key(field))
+                   for field in _rename_selection_set(operation.selection_set, rename))
+    return variable_definitions, fields
+
+
+def build_batch_document(query_texts):
+    """ Combine single-operation documents of the same operation type into one aliased document.
+
+    Args:
+        query_texts (list): GraphQL documents, one per request of the batch.
+
+    Returns:
+        str: A minified document in which the variables and top-level fields of the n-th request are
+        prefixed with 'b<n>_', and each fragment is defined once.
+    """
+    operation_type = None
+    definitions = []
+    selections = []
+    fragments = {}
+    for index, query_text in enumerate(query_texts):
+        document = _parse_operation(query_text)
+        operation = document.operations[0]
+        if operation_type not in (None, operation.operation):
+            raise _NotBatchable(ERROR_MESSAGES['UNSUPPORTED_DOCUMENT'].format("mixed operation types"))
+        operation_type = operation.operation
+        variable_definitions, fields = _alias_operation(index, operation)
+        definitions.extend(variable_definitions)
+        selections.extend(fields)
+        for name, fragment in document.fragments.items():
+            if name not in fragments:
+                _rename_selection_set(fragment.selection_set, _fragment_variable)
+                fragments[name] = fragment
+
+    operation = OperationDefinition(operation_type, BATCH_OPERATION_NAME, tuple(definitions), (),
+                                               tuple(selections))
+    return print_document(Document((operation,), fragments))
+
+
+def _split_batch_response(api_response, size):
+    """ Split the response of a batch document into one response per request. Errors are
+    assigned through their path, errors without a path apply to every request.
+    """
+    data = api_response.get('data')
+    responses = [{'data': {}} for _ in range(size)]
+    for key, value in (data or {}).items():
+        match = _ALIAS.match(key)
+        if match and int(match.group(1)) < size:
+            responses[int(match.group(1))]['data'][match.group(2)] = value
+
+    for error in api_response.get('errors') or []:
+        path = error.get('path') or []
+        match = _ALIAS.match(str(path[0])) if path else None
+        if match and int(match.group(1)) < size:
+            error = dict(error, path=[match.group(2)] + list(path[1:]))
+            targets = [responses[int(match.group(1))]]
+        else:
+            targets = responses
+        for response in targets:
+            response.setdefault('errors', []).append(error)
+
+    if data is None:
+        for response in responses:
+            response['data'] = None
+    return responses
+
+
+def _query_batch(self, calls, timeout=None, return_exceptions=False, batch_size=None):
+    """ Perform several queries (or mutations) with as few requests as possible. Calls are
+    grouped by operation type and sent `batch_size` at a time as one aliased document.
+
+    Args:
+        calls (list): (query_name, variables) tuples.
+        timeout (int): Read timeout of every request.
+        return_exceptions (bool): Return the exception of a failed call in its place instead of raising it.
+        batch_size (int): Maximum number of calls per request (default: the client batch_size).
+
+    Returns:
+        list: The result of every call, in order, as returned by `_query`.
+    """
+    calls = [(query_name, dict(variables or {})) for query_name, variables in calls]
+    for query_name, _ in calls:
+        self._validate(query_name=query_name)
+    batch_size = max(int(batch_size or self._batch_size), 1)
+
+    results = [None] * len(calls)
+    groups = {}
+    for index, (query_name, _) in enumerate(calls):
+        query_text = self._graphql_query_map[query_name]['query_text']
+        groups.setdefault(query_text.lstrip().startswith('mutation'), []).append(index)
+
+    for indexes in groups.values():
+        for offset in range(0, len(indexes), batch_size):
+            chunk = indexes[offset:offset + batch_size]
+            for index, result in zip(chunk, _send_batch(self, [calls[i] for i in chunk], timeout)):
+                results[index] = result
+
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+
+def _send_batch(self, calls, timeout=None):
+    """ Send `calls` as one document and return their results, or exceptions for those that failed. """
+    from rubrik_polaris.common.connection import _build_request_body, _check_response, _is_mutation, \
+        _send_graphql, _send_with_retries, _invalidate_cache
+
+    if len(calls) > 1:
+        try:
+            document = build_batch_document([self._graphql_query_map[q]['query_text'] for q, _ in calls])
+        except _NotBatchable as e:
+            self.logger.debug("Sending requests one by one: {}".format(e))
+            document = None
+    else:
+        document = None
+    if document is None:
+        return [_query_or_exception(self, query_name, variables, timeout) for query_name, variables in calls]
+
+    variables = {}
+    for index, (_, call_variables) in enumerate(calls):
+        variables.update({'b{}_{}'.format(index, name): value for name, value in call_variables.items()})
+    body = _build_request_body(document, BATCH_OPERATION_NAME, variables)
+    is_mutation = _is_mutation(document)
+    try:
+        api_response = _send_with_retries(
+            self, lambda: _send_graphql(self, body, timeout, graphql_errors=False), BATCH_OPERATION_NAME,
+            is_mutation)
+    except RequestException as e:
+        return [e] * len(calls)
+    finally:
+        if is_mutation:
+            for query_name in set(query_name for query_name, _ in calls):
+                _invalidate_cache(self, query_name)
+
+    results = []
+    for response in _split_batch_response(api_response, len(calls)):
+        try:
+            _check_response(self, response)
+            results.append(self._dump_nodes(response))
+        except RequestException as e:
+            results.append(e)
+    return results
+
+
+def _query_or_exception(self, query_name, variables, timeout=None):
+    try:
+        return self._query(query_name, variables, timeout)
+    except Exception as e:
+        return e
+
+
+class QueryBatcher:
+    """Collects queries submitted from any thread and sends them in batches.
+
+    A batch is sent as soon as `batch_size` queries are pending, or `flush_interval`
+    seconds after the first pending query was submitted, whichever comes first.
+
+    Args:
+        client (PolarisClient): Client sending the batches.
+        batch_size (int): Maximum number of queries per request (default: the client batch_size).
+        flush_interval (float): Seconds to wait for more queries before sending a partial batch
+            (default: the client batch_flush_interval).
+        timeout (int): Read timeout of every request.
+
+    Examples:
+        >>> with QueryBatcher(client, batch_size=50) as batcher:
+        ...     futures = {i: batcher.submit('core_taskchain_status', {'filter': i}) for i in taskchain_ids}
+        >>> states = {i: f.result()['taskchain']['state'] for i, f in futures.items()}
+    """
+
+    def __init__(self, client, batch_size=None, flush_interval=None, timeout=None):
+        self._client = client
+        self._batch_size = batch_size or client._batch_size
+        self._flush_interval = client._batch_flush_interval if flush_interval is None else flush_interval
+        self._timeout = timeout
+        self._pending = []
+        self._first_pending_at = None
+        self._flush_requested = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, query_name, variables=None):
+        """ Queue a query and return a concurrent.futures.Future of its result. """
+        self._client._validate(query_name=query_name)
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise PolarisException(ERROR_MESSAGES['BATCHER_CLOSED'])
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append((query_name, variables, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="polaris-query-batcher", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return future
+
+    def flush(self):
+        """ Send every pending query now and wait for their results. """
+        with self._condition:
+            futures = [future for _, _, future in self._pending]
+            self._flush_requested = True
+            self._condition.notify_all()
+        for future in futures:
+            try:
+                future.exception()
+            except Exception:
+                pass
+
+    def close(self):
+        """ Send the pending queries and stop the batching thread. """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _next_batch(self):
+        with self._condition:
+            while True:
+                if self._pending:
+                    if self._closed or self._flush_requested or len(self._pending) >= self._batch_size:
+                        break
+                    remaining = self._first_pending_at + self._flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._flush_requested = False
+                    self._condition.wait()
+            batch = self._pending[:self._batch_size]
+            del self._pending[:self._batch_size]
+            if not self._pending:
+                self._first_pending_at = None
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            batch = [(query_name, variables, future) for query_name, variables, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self._client._query_batch([(q, v) for q, v, _ in batch], timeout=self._timeout,
+                                                    return_exceptions=True, batch_size=self._batch_size)
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
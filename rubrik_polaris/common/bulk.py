@@ -0,0 +1,398 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+"""
+Collection of methods that read and change many objects in concurrent chunks.
+"""
+
+import bisect
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rubrik_polaris.common.connection import _validate_positive_int
+from rubrik_polaris.exceptions import RequestException
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_MAX_WORKERS = 4
+PAYLOAD_TOO_LARGE = 413
+DO_NOT_PROTECT = 'DO_NOT_PROTECT'
+UNPROTECTED = 'UNPROTECTED'
+SNAPSHOT_FIELDS = ['id', 'date', 'expirationDate', 'isOnDemandSnapshot']
+SLA_ASSIGN_TYPES = {
+    DO_NOT_PROTECT: 'doNotProtect',
+    UNPROTECTED: 'noAssignment'
+}
+
+
+class ChunkFeeder:
+    """Hands out consecutive chunks of a list to concurrent workers.
+
+    Chunks are cut when they are taken, so that once Polaris rejected a chunk as too large the following ones are
+    cut at the smaller size right away.
+
+    Args:
+        items (list): Items to split.
+        chunk_size (int): Largest number of items per chunk.
+    """
+
+    def __init__(self, items, chunk_size):
+        self._items = items
+        self._position = 0
+        self._lock = threading.Lock()
+        self.chunk_size = chunk_size
+        self.requests = 0
+
+    def next_chunk(self):
+        """ Return the next chunk, empty once every item was handed out. """
+        with self._lock:
+            chunk = self._items[self._position:self._position + self.chunk_size]
+            self._position += len(chunk)
+            self.requests += 1 if chunk else 0
+            return chunk
+
+    def too_large(self, size):
+        """ Record that a chunk of `size` items was too large, and is resent as two halves. The next chunks
+        are at most as large as the halves.
+        """
+        with self._lock:
+            self.chunk_size = max(min(self.chunk_size, size // 2), 1)
+            self.requests += 2
+
+
+def _send_in_chunks(items, chunk_size, max_workers, send):
+    """ Call `send` with chunks of `items`, `max_workers` at a time. A chunk that Polaris rejects as too large
+    (HTTP 413) is split in half and resent, and the following chunks are cut at the smaller size.
+
+    Returns:
+        tuple: List of the (chunk, response) of every chunk, where the response of a chunk that failed is its
+        RequestException, and the number of requests sent
+    """
+    feeder = ChunkFeeder(list(items), chunk_size)
+    results = []
+    lock = threading.Lock()
+
+    def send_chunk(chunk):
+        try:
+            response = send(chunk)
+        except RequestException as e:
+            if e.status_code == PAYLOAD_TOO_LARGE and len(chunk) > 1:
+                feeder.too_large(len(chunk))
+                send_chunk(chunk[:len(chunk) // 2])
+                send_chunk(chunk[len(chunk) // 2:])
+                return
+            response = e
+        with lock:
+            results.append((chunk, response))
+
+    def worker():
+        chunk = feeder.next_chunk()
+        while chunk:
+            send_chunk(chunk)
+            chunk = feeder.next_chunk()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for future in [executor.submit(worker) for _ in range(max_workers)]:
+            future.result()
+    return results, feeder.requests
+
+
+def submit_on_demand_bulk(self, object_ids, sla_id, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                          wait=False, return_handle=False):
+    """Submits On Demand Snapshot requests for any number of objects, in chunks sent concurrently.
+
+    Every chunk is a `core_snappable_on_demand` mutation of at most `chunk_size` objects. A chunk that Polaris
+    rejects as too large (HTTP 413) is split in half and retried, and the following chunks are cut at the smaller
+    size. A chunk that fails otherwise only fails its own objects.
+
+    Args:
+        object_ids (list): List of Rubrik Object IDs
+        sla_id (str): Rubrik SLA Domain ID
+        chunk_size (int): Maximum number of objects per request
+        max_workers (int): Maximum number of requests in flight
+        wait (bool): Wait for all snapshots to complete, polling their taskchains together
+        return_handle (bool): Return a JobHandle per object instead, see submit_on_demand
+
+    Returns:
+        dict: The `taskchainUuids` and `errors` of every object, in the order of `object_ids`, and the number of
+        `requests` sent. With `wait`, every taskchain has its `status`, or the job handles with `return_handle`
+
+    Raises:
+        ValidationException: If chunk_size or max_workers isn't a positive integer
+        PolarisException: If the status of a snapshot task can't be read while waiting
+
+    Examples:
+        >>> object_ids = client.get_compute_object_ids_ec2(region='us-west-1')
+        >>> sla_domain_id = client.get_sla_domains('Gold')[0]['id']
+        >>> result = client.submit_on_demand_bulk(object_ids, sla_domain_id, chunk_size=200, wait=True)
+        >>> failed = result['errors'] + [t for t in result['taskchainUuids'] if t['status'] != 'SUCCEEDED']
+    """
+    from rubrik_polaris.common.jobs import _on_demand_handles
+
+    _validate_positive_int('chunk_size', chunk_size)
+    _validate_positive_int('max_workers', max_workers)
+    self._validate(mutation_name="core_snappable_on_demand")
+    mutation_name = self.mutation_name
+    results, requests = _send_in_chunks(
+        object_ids, chunk_size, max_workers,
+        lambda chunk: self._query(mutation_name, {"objectIds": chunk, "slaId": sla_id}))
+
+    merged = {'taskchainUuids': [], 'errors': []}
+    for chunk, response in results:
+        if isinstance(response, Exception):
+            response = {'taskchainUuids': [], 'errors': [{'workloadId': i, 'error': str(response)} for i in chunk]}
+        merged['taskchainUuids'].extend(response['taskchainUuids'] or [])
+        merged['errors'].extend(response['errors'] or [])
+
+    order = _order(object_ids)
+    for key in ('taskchainUuids', 'errors'):
+        merged[key].sort(key=lambda entry: order.get(entry.get('workloadId'), len(order)))
+    merged['requests'] = requests
+
+    if return_handle:
+        return _on_demand_handles(self, merged)
+    if wait and merged['taskchainUuids']:
+        self._monitor_task(merged['taskchainUuids'])
+    return merged
+
+
+def reconcile_sla_assignments(self, desired, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                              require_direct=False, dry_run=False, apply_to_existing_snapshots=None,
+                              existing_snapshot_retention=None):
+    """Assigns SLA Domains to objects, only changing the objects whose SLA Domain differs from the desired one.
+
+    The current SLA Domain of the objects is read in chunks of `chunk_size` objects, then the objects that need a
+    change are grouped by target SLA Domain and assigned in chunked `core_sla_assign` mutations. Reads and
+    mutations are sent `max_workers` at a time, and chunks rejected as too large (HTTP 413) are split in half.
+
+    Args:
+        desired (dict): Desired SLA Domain ID by Rubrik Object ID, or `DO_NOT_PROTECT` / `UNPROTECTED` to stop
+            protecting an object or remove its direct assignment
+        chunk_size (int): Maximum number of objects per request
+        max_workers (int): Maximum number of requests in flight
+        require_direct (bool): Also assign the SLA Domain to objects that only inherit it from a parent
+        dry_run (bool): Compute the changes without applying them
+        apply_to_existing_snapshots (bool): Apply retention policy to pre-existing snapshots
+        existing_snapshot_retention (str): Snapshot handling on DO_NOT_PROTECT
+            RETAIN_SNAPSHOTS/KEEP_FOREVER/EXPIRE_IMMEDIATELY
+
+    Returns:
+        dict: The object IDs `changed` by target SLA Domain (that would change with `dry_run`), the ones left
+        `unchanged` and `not_found`, the `errors` of objects that couldn't be read or assigned, and a `summary`
+        with the number of objects in each of them and of requests sent
+
+    Raises:
+        ValidationException: If chunk_size or max_workers isn't a positive integer
+
+    Examples:
+        >>> gold = client.get_sla_domains('Gold')[0]['id']
+        >>> result = client.reconcile_sla_assignments({object_id: gold for object_id in object_ids})
+        >>> result['summary']
+        {'objects': 1200, 'changed': 3, 'unchanged': 1197, 'not_found': 0, 'failed': 0, 'requests': 6, 'dry_run': False}
+    """
+    _validate_positive_int('chunk_size', chunk_size)
+    _validate_positive_int('max_workers', max_workers)
+    object_ids = list(desired)
+    reads, requests = _send_in_chunks(object_ids, chunk_size, max_workers,
+                                      lambda chunk: self._query("core_hierarchy_objects_sla", {"fids": chunk}))
+
+    current = {}
+    errors = []
+    for chunk, response in reads:
+        if isinstance(response, Exception):
+            errors.extend({'objectId': i, 'slaId': desired[i], 'error': str(response)} for i in chunk)
+        else:
+            current.update((node['id'], node) for node in response)
+
+    failed = set(error['objectId'] for error in errors)
+    changes = {}
+    unchanged = []
+    not_found = []
+    for object_id in object_ids:
+        if object_id in failed:
+            continue
+        if object_id not in current:
+            not_found.append(object_id)
+        elif _sla_in_sync(current[object_id], desired[object_id], require_direct):
+            unchanged.append(object_id)
+        else:
+            changes.setdefault(desired[object_id], []).append(object_id)
+
+    changed = changes
+    if not dry_run:
+        changed = {}
+        for sla_id, ids in changes.items():
+            def assign(chunk, sla_id=sla_id):
+                return self.submit_assign_sla(
+                    object_ids=chunk,
+                    sla_id=None if sla_id in SLA_ASSIGN_TYPES else sla_id,
+                    apply_to_existing_snapshots=apply_to_existing_snapshots,
+                    existing_snapshot_retention=existing_snapshot_retention,
+                    global_sla_assign_type=SLA_ASSIGN_TYPES.get(sla_id, 'protectWithSlaId'))
+
+            results, sent = _send_in_chunks(ids, chunk_size, max_workers, assign)
+            requests += sent
+            for chunk, response in results:
+                if isinstance(response, Exception) or not _assigned(response):
+                    error = str(response) if isinstance(response, Exception) else 'SLA assignment was not successful'
+                    errors.extend({'objectId': i, 'slaId': sla_id, 'error': error} for i in chunk)
+                else:
+                    changed.setdefault(sla_id, []).extend(chunk)
+
+    order = _order(object_ids)
+    for ids in changed.values():
+        ids.sort(key=order.get)
+    errors.sort(key=lambda error: order[error['objectId']])
+    return {
+        'changed': changed,
+        'unchanged': unchanged,
+        'not_found': not_found,
+        'errors': errors,
+        'summary': {
+            'objects': len(object_ids),
+            'changed': sum(len(ids) for ids in changed.values()),
+            'unchanged': len(unchanged),
+            'not_found': len(not_found),
+            'failed': len(errors),
+            'requests': requests,
+            'dry_run': dry_run
+        }
+    }
+
+
+def _sla_in_sync(node, sla_id, require_direct):
+    """ Whether an object read by core_hierarchy_objects_sla already has the desired SLA Domain. """
+    assignment = node.get('slaAssignment')
+    if sla_id == UNPROTECTED:
+        return assignment != 'Direct'
+    effective = (node.get('effectiveSlaDomain') or {}).get('id')
+    return effective == sla_id and (assignment == 'Direct' or not require_direct)
+
+
+def resolve_snapshots(self, snappable_ids, recovery_points, window=None, max_workers=DEFAULT_MAX_WORKERS,
+                      page_size=None, return_exceptions=False):
+    """Finds the closest snapshot taken at or after one or more points in time, for many snappables.
+
+    The snapshots of every snappable are read `max_workers` snappables at a time, oldest first and only from the
+    earliest recovery point on (`timeRange` of `polaris_object_snapshot`), projected to the fields needed. Reading
+    stops at the first snapshot taken after the latest recovery point. Every date is parsed once and the snapshot
+    of each recovery point is found by binary search.
+
+    Args:
+        snappable_ids (list): Object UUIDs
+        recovery_points (str or datetime or list): Point in time, or list of them. Points without a time zone are
+            in the local time zone
+        window (datetime.timedelta): Only consider snapshots taken up to this long after the latest recovery point
+            (default up to now)
+        max_workers (int): Maximum number of snappables read at the same time
+        page_size (int): Number of snapshots requested per page
+        return_exceptions (bool): Return the exception of a snappable whose snapshots can't be read in its place
+            instead of raising it
+
+    Returns:
+        dict: By snappable UUID, the closest snapshot at or after the recovery point, or the list of closest
+        snapshots of every recovery point in order when a list was given. None when there is no such snapshot
+
+    Raises:
+        ValidationException: If max_workers or page_size isn't a positive integer
+        RequestException: If the query to Polaris returned an error
+
+    Examples:
+        >>> snapshots = client.resolve_snapshots(vm_ids, '2021-05-01T10:00:00Z', window=datetime.timedelta(days=1))
+        >>> missing = [vm_id for vm_id, snapshot in snapshots.items() if snapshot is None]
+    """
+    from dateutil.parser import isoparse
+
+    _validate_positive_int('max_workers', max_workers)
+    _validate_positive_int('page_size', page_size)
+    single = not isinstance(recovery_points, (list, tuple))
+    points = [_parse_recovery_point(point) for point in ([recovery_points] if single else recovery_points)]
+    if not points:
+        return {snappable_id: [] for snappable_id in snappable_ids}
+
+    latest = max(points)
+    end = latest + window if window is not None else max(datetime.datetime.now(datetime.timezone.utc), latest)
+    time_range = {'start': _graphql_datetime(min(points)), 'end': _graphql_datetime(end)}
+    # The first snapshot of the range answers a single recovery point
+    limit = 1 if len(set(points)) == 1 else None
+
+    def resolve(snappable_id):
+        variables = {
+            'snappableId': snappable_id,
+            'timeRange': time_range,
+            'sortBy': 'CREATION_TIME',
+            'sortOrder': 'ASC'
+        }
+        dates = []
+        snapshots = []
+        for snapshot in self._query_paginated('polaris_object_snapshot', variables, fields=SNAPSHOT_FIELDS,
+                                              page_size=page_size or limit, limit=limit):
+            dates.append(isoparse(snapshot['date']))
+            snapshots.append(snapshot)
+            if dates[-1] >= latest:
+                break
+        closest = []
+        for point in points:
+            index = bisect.bisect_left(dates, point)
+            closest.append(snapshots[index] if index < len(snapshots) else None)
+        return closest[0] if single else closest
+
+    def resolve_or_exception(snappable_id):
+        try:
+            return resolve(snappable_id)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return e
+
+    snappable_ids = list(dict.fromkeys(snappable_ids))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(snappable_ids, executor.map(resolve_or_exception, snappable_ids)))
+
+
+def _parse_recovery_point(recovery_point):
+    """ Return a recovery point as an aware datetime, in the local time zone when it has none. """
+    from dateutil.parser import parse
+    from dateutil.tz import tzlocal
+
+    if not isinstance(recovery_point, datetime.datetime):
+        recovery_point = parse(recovery_point)
+    if recovery_point.tzinfo is None:
+        recovery_point = recovery_point.replace(tzinfo=tzlocal())
+    return recovery_point
+
+
+def _graphql_datetime(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def _assigned(response):
+    """ Whether a core_sla_assign response, one result or a list of them, reports success. """
+    results = response if isinstance(response, list) else [response]
+    return bool(results) and all(result.get('success') for result in results)
+
+
+def _order(object_ids):
+    """ Map every object id to the position of its first occurrence. """
+    order = {}
+    for i, object_id in enumerate(object_ids):
+        order.setdefault(object_id, i)
+    return order
@@ -0,0 +1,201 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+In-memory (optionally persisted) cache of read-only query responses.
+"""
+
+import copy
+import fnmatch
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+
+# Seconds a response is cached for, per query name. Queries without a TTL are never cached.
+DEFAULT_TTLS = {
+    'core_sla_list': 300,
+    'gps_sla_domain': 300,
+    'gps_clusters': 300,
+    'cdm_cluster_location': 3600,
+    'accounts_aws_detail': 300,
+    'compute_aws_region_vpcs': 900,
+    'compute_aws_region_kmskeys': 900,
+    'compute_aws_region_sshkeypairs': 900,
+    'graphql_enum_values': 86400,
+    'core_polaris_version': 3600,
+}
+
+# Query families made stale by each mutation, both as fnmatch patterns of query names.
+DEFAULT_INVALIDATIONS = {
+    'core_sla_assign': ['core_sla_list', 'gps_sla_domain', 'compute_*', 'storage_*', 'polaris_*object*'],
+    'accounts_aws_*': ['accounts_aws*', 'compute_aws_*', 'storage_aws_*'],
+    'accounts_azure_*': ['accounts_azure*', 'compute_azure_*'],
+    'accounts_gcp_*': ['accounts_gcp*', 'compute_gcp_*'],
+    'k8s_*': ['k8s_*'],
+}
+
+
+def _cache_key(scope, query_name, variables, operation_name=None):
+    return "{}|{}|{}|{}".format(scope, query_name, operation_name or '',
+                                json.dumps(variables or {}, sort_keys=True, separators=(',', ':'), default=str))
+
+
+class ResponseCache:
+    """LRU cache of read-only query responses with per-query time to live.
+
+    Entries are keyed by query name, operation name (which tells the projections of a query
+    apart) and canonical variables (and the Polaris URL, so a cache can be shared by clients
+    of several tenants). Successful mutations drop the
+    entries of the query families they make stale. Cached values are deep copied in and
+    out, so callers are free to modify what they get.
+
+    Args:
+        ttls (dict): Seconds to cache each query for, merged with DEFAULT_TTLS.
+        default_ttl (float): Seconds to cache queries without a TTL of their own (default: not cached).
+        max_entries (int): Maximum number of responses kept, the least recently used are evicted.
+        invalidations (dict): Query name patterns made stale by each mutation name pattern, merged with
+            DEFAULT_INVALIDATIONS.
+        path (str): File the cache is loaded from, and saved to by `save()` and when the client is closed.
+
+    Examples:
+        >>> cache = ResponseCache(ttls={'gps_clusters': 60}, path='~/.rubrik_polaris/response_cache.json')
+        >>> client = PolarisClient(json_keyfile='sa.json', response_cache=cache)
+        >>> client.get_cache_stats()
+        {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'entries': 0}
+    """
+
+    def __init__(self, ttls=None, default_ttl=None, max_entries=DEFAULT_MAX_ENTRIES, invalidations=None, path=None):
+        self._ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._invalidations = dict(DEFAULT_INVALIDATIONS, **(invalidations or {}))
+        self._path = os.path.expanduser(path) if path else None
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidated = 0
+        if self._path:
+            self._load()
+
+    def ttl(self, query_name):
+        """ Seconds `query_name` is cached for, or None when it is not cached. """
+        return self._ttls.get(query_name, self._default_ttl)
+
+    def get(self, scope, query_name, variables, operation_name=None):
+        """ Return (True, response) for a fresh cached response, or (False, None). """
+        key = _cache_key(scope, query_name, variables, operation_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires_at'] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            value = entry['value']
+        return True, copy.deepcopy(value)
+
+    def put(self, scope, query_name, variables, value, operation_name=None):
+        """ Cache `value` for the TTL of `query_name`, if it has one. """
+        ttl = self.ttl(query_name)
+        if not ttl:
+            return
+        entry = {'query_name': query_name, 'expires_at': time.time() + ttl, 'value': copy.deepcopy(value)}
+        with self._lock:
+            key = _cache_key(scope, query_name, variables, operation_name)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, mutation_name):
+        """ Drop the responses of every query family made stale by `mutation_name`. """
+        patterns = [pattern for mutation, families in self._invalidations.items()
+                    if fnmatch.fnmatchcase(mutation_name, mutation) for pattern in families]
+        if not patterns:
+            return
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if any(fnmatch.fnmatchcase(entry['query_name'], pattern) for pattern in patterns)]
+            for key in stale:
+                del self._entries[key]
+            self._invalidated += len(stale)
+
+    def clear(self):
+        """ Drop every cached response. """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns cache counters.
+
+        Returns:
+            dict: Hits, misses, evictions, invalidated entries and number of entries cached.
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'invalidations': self._invalidated,
+                'entries': len(self._entries)
+            }
+
+    def save(self):
+        """ Write the fresh entries to the cache file, if one was given. """
+        if not self._path:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [[key, entry] for key, entry in self._entries.items() if entry['expires_at'] > now]
+        directory = os.path.dirname(self._path) or '.'
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.response_cache')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self._path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _load(self):
+        try:
+            with open(self._path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in entries[-self._max_entries:]:
+            if entry.get('expires_at', 0) > now:
+                self._entries[key] = entry
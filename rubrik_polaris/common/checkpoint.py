@@ -0,0 +1,113 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Checkpoints of paginated queries, so that long exports can resume from their last committed page.
+
+Delivery is at-least-once: a page is committed once all of its entries have been read from the iterator, so a
+run that stops part way through a page yields the entries of that page again when it is resumed. Deduplicate
+resumed exports downstream, e.g. on the `id` of the entries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Variables that change from page to page of the same export
+_PAGE_VARIABLES = frozenset(['after', 'first'])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    operation TEXT NOT NULL,
+    variables_hash TEXT NOT NULL,
+    end_cursor TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (operation, variables_hash)
+)
+"""
+
+
+def variables_hash(variables, scope=None, query_text=None):
+    """ Hash identifying an export by its variables, leaving out the cursor and page size, and by the
+    Polaris URL (`scope`) and document it is read from, so that tenants sharing a store and projections
+    of the same query resume from their own cursors.
+    """
+    export_variables = {k: v for k, v in (variables or {}).items() if k not in _PAGE_VARIABLES}
+    normalized = json.dumps([scope, query_text, export_variables], sort_keys=True, separators=(',', ':'),
+                            default=str)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class CheckpointStore:
+    """SQLite store of the last committed cursor of paginated queries, and the number of entries read up to it.
+
+    Args:
+        path (str): Location of the database file, created when missing. ':memory:' keeps checkpoints in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path if path == ':memory:' else os.path.expanduser(path)
+        directory = os.path.dirname(self.path) if path != ':memory:' else None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute(_SCHEMA)
+
+    def load(self, operation, variables_hash):
+        """ Return the (end_cursor, rows) of the last committed page of an export, or None. """
+        with self._lock:
+            return self._db.execute(
+                "SELECT end_cursor, rows FROM checkpoints WHERE operation = ? AND variables_hash = ?",
+                (operation, variables_hash)).fetchone()
+
+    def commit(self, operation, variables_hash, end_cursor, rows):
+        """ Record that the entries of an export up to `end_cursor`, `rows` of them, have been read. """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints (operation, variables_hash, end_cursor, rows, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)", (operation, variables_hash, end_cursor, rows, time.time()))
+
+    def clear(self, operation=None, variables_hash=None):
+        """ Forget the checkpoint of an export, of every export of `operation`, or every checkpoint. """
+        query, params = "DELETE FROM checkpoints", ()
+        if operation is not None and variables_hash is not None:
+            query, params = query + " WHERE operation = ? AND variables_hash = ?", (operation, variables_hash)
+        elif operation is not None:
+            query, params = query + " WHERE operation = ?", (operation,)
+        with self._lock:
+            self._db.execute(query, params)
+
+    def list(self):
+        """ Return the checkpoints of the exports that haven't completed. """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT operation, variables_hash, end_cursor, rows, updated_at FROM checkpoints").fetchall()
+        return [dict(zip(('operation', 'variables_hash', 'end_cursor', 'rows', 'updated_at'), row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -24,10 +24,22 @@ Collection of methods that control connection with Polaris.
 """
 
 import requests
+import contextlib
 import http
 import os
-from rubrik_polaris.exceptions import RequestException, AuthenticationException, ProxyException
+import threading
+import time
+from rubrik_polaris.exceptions import RequestException, AuthenticationException, ProxyException, \
+    PersistedQueryException, ValidationException
 from rubrik_polaris.logger import logging_setup
+from rubrik_polaris.common.decoding import iter_streamed_nodes
+from rubrik_polaris.common.singleflight import single_flight_key
+from rubrik_polaris.common.persisted import persisted_query_extension, _check_persisted_query
+from rubrik_polaris.common.projection import _projected_query
+from rubrik_polaris.common.prefetch import prefetch_pages
+from rubrik_polaris.common.checkpoint import CheckpointStore, variables_hash
+from rubrik_polaris.common.pagesize import get_page_size_tuner, page_size_stats, DEFAULT_MIN_PAGE_SIZE, \
+    DEFAULT_MAX_PAGE_SIZE
 
 HTTP_ERRORS = {
     400: "Bad request: An error occurred while fetching the data",
@@ -43,6 +55,10 @@ ERROR_MESSAGES = {
     "REQUEST_INVALID_STATUS": "Failed request to Polaris, got {} ({}).\nDetailed message: {}",
     "NOT_A_NUMBER": "'{}' is not a valid number.",
     "INVALID_TIMEOUT": "'{}' is an invalid value for 'timeout'. Timeout must be an integer greater than 0.",
+    "INVALID_COUNT": "'{}' is an invalid value for '{}'. It must be an integer of at least {}.",
+    "CHECKPOINT_STORE_REQUIRED": "Resuming a paginated query requires a 'checkpoint' store.",
+    "STREAMING_CONFLICT": "'{}' can't be used with 'stream_pages': streamed pages are neither prefetched nor "
+                          "resized.",
     "INVALID_RAW_QUERY": 'The query name inside the raw query should be "RubrikPolarisSDKRequest".',
     "ACCESS_TOKEN_NOT_FOUND": 'Authentication Failed: Access Token not found. Please check credentials.',
     "MFA_TOKEN_NOT_FOUND": 'Authentication Failed: Multi Factor Authentication Token not found. Please check '
@@ -52,123 +68,633 @@ ERROR_MESSAGES = {
     "PROXY_ERROR": 'Proxy Error: Try removing the proxy parameter from the client or check the provided proxies.'
 }
 
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_AUTH_TIMEOUT = 30
 
-def _query_paginated(self, query_name=None, variables=None, timeout=60):
+# Size in bytes of the last response body decoded by the thread, read by the page size tuner
+_response_size = threading.local()
+
+
+def _query_paginated(self, query_name=None, variables=None, timeout=None, stream_pages=None, fields=None,
+                     page_size=None, limit=None, prefetch=None, adaptive=None, checkpoint=None, resume=False):
     """ Perform query against Polaris and return an iterator of entries. It
     handles responses that has more than one page of entries by requesting
     consecutive pages as entries are read from the iterator.
+    With `stream_pages` (default from the client option of the same name), the
+    entries of a page are yielded while its body is still being received.
+    With `fields`, only those fields of the entries are requested (see projection.normalize_projection).
+    `page_size` sets the `first` variable of every page, and no more than `limit` entries
+    are returned: the last page only requests the entries still needed.
+    With `prefetch` (default from the `prefetch_pages` client option), up to that many
+    pages are fetched on a background thread while the entries of the current one are read.
+    With `adaptive` (default from the `adaptive_page_size` client option), the page size
+    starts from `page_size` (or the `first` variable) and is tuned from the latency, size and
+    timeouts of the pages, within the `page_size_bounds` of the operation. The tuned size is
+    reused by later queries of the process.
+    Streamed pages are neither prefetched nor resized: passing `prefetch` or `adaptive` together
+    with `stream_pages` raises a ValidationException, and their client options are ignored.
+    With a `checkpoint` store (a CheckpointStore or the path of one, default from the
+    `checkpoint_store` client option), the cursor of every page is committed once its entries
+    have been read, and `resume` continues from the last committed page of the same query
+    and variables. Delivery is at-least-once, see rubrik_polaris.common.checkpoint.
     """
 
     q = self._graphql_query_map[query_name]
-    gql_query_name = q['gql_name']
-
-    api_response = {}
-    start = True
-    while start or \
-           (api_response['data'][gql_query_name]
-            and not isinstance(api_response['data'][gql_query_name], bool)
-            and 'pageInfo' in api_response['data'][gql_query_name]
-            and api_response['data'][gql_query_name]['pageInfo']['hasNextPage']):
-        if not start:
-            variables['after'] = api_response['data'][gql_query_name]['pageInfo']['endCursor']
-        api_response = self._query_raw(q['query_text'], q['operation_name'], variables, timeout)
-        start = False
-        nodes = self._dump_nodes(api_response)
-        if isinstance(nodes, list):
-            yield from nodes
-        else:
-            yield nodes
+    self._validate_required_variables(query_name, variables)
+    _validate_positive_int('page_size', page_size)
+    _validate_positive_int('limit', limit, minimum=0)
+    _validate_positive_int('prefetch', prefetch, minimum=0)
+    query_text, operation_name = _projected_query(self, q, fields)
+    variables = dict(variables or {})
+    if stream_pages is None:
+        stream_pages = self._stream_pages
+    if stream_pages:
+        for name, value in (('prefetch', prefetch), ('adaptive', adaptive)):
+            if value:
+                raise ValidationException(ERROR_MESSAGES['STREAMING_CONFLICT'].format(name))
+    if prefetch is None:
+        prefetch = self._prefetch_pages
+    if adaptive is None:
+        adaptive = self._adaptive_page_size
+    if page_size is not None and 'first' in q:
+        variables['first'] = page_size
+    store = _checkpoint_store(self, checkpoint)
+    export_key = variables_hash(variables, self._baseurl, query_text)
+    rows = 0
+    if resume:
+        if store is None:
+            raise ValidationException(ERROR_MESSAGES['CHECKPOINT_STORE_REQUIRED'])
+        saved = store.load(query_name, export_key)
+        if saved is not None:
+            variables['after'], rows = saved
+            self.logger.info("Resuming {} after {} entries.".format(query_name, rows))
+            if limit is not None:
+                limit = max(limit - rows, 0)
+    first_row = rows
+
+    if stream_pages:
+        pages = _iter_streamed_pages(self, q, query_text, operation_name, variables, limit, timeout)
+    else:
+        tuner = None
+        if adaptive and 'first' in q:
+            minimum, maximum = self._page_size_bounds.get(query_name, (DEFAULT_MIN_PAGE_SIZE, DEFAULT_MAX_PAGE_SIZE))
+            tuner = get_page_size_tuner(operation_name, variables.get('first'), minimum, maximum)
+        pages = _iter_pages(self, q, query_text, operation_name, variables, limit, timeout, tuner)
+        if prefetch:
+            pages = prefetch_pages(pages, prefetch, self._prefetch_stats, operation_name)
+    try:
+        for nodes, api_response in pages:
+            for node in nodes:
+                rows += 1
+                yield node
+            if store is not None and (limit is None or rows - first_row < limit):
+                cursor = _get_next_cursor(api_response, q['page_path'])
+                if cursor is None:
+                    store.clear(query_name, export_key)
+                else:
+                    store.commit(query_name, export_key, cursor, rows)
+    finally:
+        pages.close()
+
+
+def _checkpoint_store(self, checkpoint=None):
+    """ Return the store designated by `checkpoint` (default: the client checkpoint store). Stores given
+    by path are opened once and kept until the client is closed.
+    """
+    store = checkpoint if checkpoint is not None else self._checkpoint_store
+    if isinstance(store, str):
+        with self._checkpoint_stores_lock:
+            if store not in self._checkpoint_stores:
+                self._checkpoint_stores[store] = CheckpointStore(store)
+            store = self._checkpoint_stores[store]
+    return store or None
+
+
+def _iter_pages(self, q, query_text, operation_name, variables, limit=None, timeout=None, tuner=None):
+    """ Yield the entries of consecutive pages as lists, with the response they were read from,
+    up to `limit` entries in total. With a PageSizeTuner, the size of every page is taken from it, and a page that timed out is
+    requested again with a smaller size.
+    """
+    page_size = variables.get('first')
+    remaining = limit
+    while remaining is None or remaining > 0:
+        if tuner is not None:
+            page_size = tuner.size
+            variables['first'] = page_size
+        if remaining is not None and page_size:
+            variables['first'] = min(page_size, remaining)
+        _response_size.value = None
+        start = time.monotonic()
+        try:
+            api_response = self._query_raw(query_text, operation_name, variables, timeout)
+        except RequestException as err:
+            if tuner is not None and isinstance(err.__cause__, requests.exceptions.Timeout) and \
+                    tuner.timed_out(variables['first']):
+                self.logger.warning("{} timed out with pages of {} entries, retrying with {}.".format(
+                    operation_name, variables['first'], tuner.size))
+                continue
+            raise
+        nodes = _dump_page_nodes(self, api_response, q['page_path'])
+        if not isinstance(nodes, list):
+            nodes = [nodes]
+        if tuner is not None:
+            tuner.observe(variables['first'], len(nodes), time.monotonic() - start, _response_size.value)
+        if remaining is not None:
+            nodes = nodes[:remaining]
+            remaining -= len(nodes)
+        yield nodes, api_response
+        cursor = _get_next_cursor(api_response, q['page_path'])
+        if cursor is None:
+            break
+        variables['after'] = cursor
+
+
+def _iter_streamed_pages(self, q, query_text, operation_name, variables, limit=None, timeout=None):
+    """ Yield the entries of consecutive pages as iterators over the entries being received, with
+    the response that is filled once they have been read, up to `limit` entries in total.
+    """
+    page_size = variables.get('first')
+    remaining = [limit]
+
+    def take(nodes):
+        try:
+            for node in nodes:
+                if remaining[0] is not None:
+                    if remaining[0] == 0:
+                        return
+                    remaining[0] -= 1
+                yield node
+        finally:
+            nodes.close()
+
+    while remaining[0] is None or remaining[0] > 0:
+        if remaining[0] is not None and page_size:
+            variables['first'] = min(page_size, remaining[0])
+        api_response = {}
+        nodes = _query_streamed(self, query_text, operation_name, variables, api_response, timeout)
+        yield take(nodes), api_response
+        cursor = _get_next_cursor(api_response, q['page_path'])
+        if cursor is None:
+            break
+        variables['after'] = cursor
+
+
+def _query_all(self, query_name=None, variables=None, stream=False, **kwargs):
+    """ Perform a paginated query against Polaris and return the entries of every page, or with
+    `stream` an iterator that only holds one page in memory at a time. The other arguments are
+    those of _query_paginated, e.g. `fields`, `page_size` and `limit`.
+    """
+    entries = self._query_paginated(query_name, variables, **kwargs)
+    return entries if stream else list(entries)
+
+
+def _validate_positive_int(name, value, minimum=1):
+    if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < minimum):
+        raise ValidationException(ERROR_MESSAGES['INVALID_COUNT'].format(value, name, minimum))
 
 
-def _query(self, query_name=None, variables=None, timeout=60):
-    """ Perform query against Polaris
+def _get_connection(api_response, page_path):
+    """ Return the object at `page_path` (a list of response keys, or the root field name) of a
+    response, or None when the path is missing.
+    """
+    if page_path is None:
+        return None
+    result = api_response.get('data')
+    for key in [page_path] if isinstance(page_path, str) else page_path:
+        if not isinstance(result, dict):
+            return None
+        result = result.get(key)
+    return result
+
+
+def _get_next_cursor(api_response, page_path):
+    """ Return the cursor of the next page of a paginated response, or None when
+    the response is not paginated or the last page has been reached.
+    """
+    result = _get_connection(api_response, page_path)
+    if isinstance(result, dict) and result.get('pageInfo') and result['pageInfo']['hasNextPage']:
+        return result['pageInfo']['endCursor']
+    return None
+
+
+def _dump_page_nodes(self, api_response, page_path):
+    """ Return the nodes of a page, read from the connection at `page_path` when it is below the root field. """
+    if page_path is None or len(page_path) < 2:
+        return self._dump_nodes(api_response)
+    connection = _get_connection(api_response, page_path)
+    if not isinstance(connection, dict) or 'edges' not in connection:
+        return self._dump_nodes(api_response)
+    return [edge['node'] for edge in connection['edges']]
+
+
+def _query(self, query_name=None, variables=None, timeout=None, fields=None):
+    """ Perform query against Polaris, requesting only `fields` of the result when given.
     """
     q = self._graphql_query_map[query_name]
-    api_response = self._query_raw(q['query_text'], q['operation_name'], variables, timeout)
+    self._validate_required_variables(query_name, variables)
+    api_response = self._query_raw(*_projected_query(self, q, fields), variables, timeout)
     if api_response['data'].get('pageInfo'):
         raise Exception("use _query_paginated instead of _query for when expected response is paged")
 
     return self._dump_nodes(api_response)
 
 
-def _named_raw_query(self, query_name=None, variables=None, timeout=60):
+def _named_raw_query(self, query_name=None, variables=None, timeout=None, fields=None):
     """ Perform query against Polaris and return the raw GraphQL response.
     NOTE! This shouldn't be used in normal circumstances, use _query instead (or
     _query_paginated when the response is paginated).
     """
     q = self._graphql_query_map[query_name]
-    return self._query_raw(q['query_text'], q['operation_name'], variables, timeout)
+    self._validate_required_variables(query_name, variables)
+    return self._query_raw(*_projected_query(self, q, fields), variables, timeout)
 
 
-def _query_raw(self, raw_query, operation_name, variables, timeout):
+def _query_raw(self, raw_query, operation_name, variables, timeout=None):
     """ Perform raw GraphQL request and return the raw response in json format.
+    Transient failures are retried according to the client retry policy.
     NOTE! This shouldn't be used in normal circumstances, use _query instead (or
     _query_paginated when the response is paginated).
     """
+    body = _build_request_body(raw_query, operation_name, variables)
+    is_mutation = _is_mutation(raw_query)
+    query_name = self._query_names.get(operation_name)
+    cached = _is_cached(self, query_name, is_mutation)
+    if cached:
+        hit, api_response = self._response_cache.get(self._baseurl, query_name, variables, operation_name)
+        if hit:
+            return api_response
+
+    def send():
+        api_response = _send_with_retries(self, lambda: _send_document(self, body, operation_name, timeout),
+                                          operation_name, is_mutation)
+        if cached:
+            self._response_cache.put(self._baseurl, query_name, variables, api_response, operation_name)
+        return api_response
+
+    if is_mutation:
+        try:
+            return send()
+        finally:
+            _invalidate_cache(self, query_name)
+    if self._single_flight is None:
+        return send()
+    # Concurrent identical reads share one request
+    return self._single_flight.do(single_flight_key(raw_query, variables), send)
+
+
+def _is_cached(self, query_name, is_mutation):
+    return self._response_cache is not None and query_name is not None and not is_mutation \
+        and bool(self._response_cache.ttl(query_name))
+
+
+def _invalidate_cache(self, mutation_name):
+    if self._response_cache is not None and mutation_name is not None:
+        self._response_cache.invalidate(mutation_name)
+
+
+def _query_streamed(self, raw_query, operation_name, variables, api_response, timeout=None):
+    """ Perform raw GraphQL request and yield the nodes of its root connection as they
+    are received. The rest of the response, including pageInfo, is stored in
+    `api_response` once the body has been read. Failures before the body starts
+    arriving are retried according to the client retry policy.
+    """
+    body = _build_request_body(raw_query, operation_name, variables)
+    raw_resp = _send_with_retries(self, lambda: _open_graphql_stream(self, body, timeout), operation_name,
+                                  _is_mutation(raw_query))
     try:
-        body = {"query": "{}".format(raw_query)}
-        if variables:
-            body['variables'] = variables
-        if operation_name:
-            body['operationName'] = operation_name
-
-        raw_resp = requests.post(
-            "{}/graphql".format(self._baseurl),
-            headers=self.prepare_headers(),
-            json=body,
-            verify=self._verify,
-            proxies=self._proxies,
-            timeout=timeout
-        )
+        raw_resp.raw.decode_content = True
+        yield from iter_streamed_nodes(raw_resp.raw, api_response)
+    except RequestException:
+        raise
+    except Exception as e:
+        raise RequestException(e, status_code=raw_resp.status_code) from e
+    finally:
+        raw_resp.close()
 
-        resp = raw_resp.json()
-        if 'errors' in resp and len(resp['errors']) > 0:
-            error = resp['errors'][0]
-            self.logger.error(error)
-            status_code = error['extensions']['code']
-            trace_id = error['extensions'].get('trace') if error['extensions']['trace'].get('traceId', "N/A") else "N/A"
-            if error.get('path'):
-                raise RequestException(ERROR_MESSAGES['REQUEST_ERROR_WITH_PATH'].format(
-                    status_code,
-                    return_http_error_message(status_code),
-                    trace_id,
-                    error['path'], error['message']))
-            raise RequestException(ERROR_MESSAGES['REQUEST_ERROR_WITHOUT_PATH'].format(
-                status_code, return_http_error_message(status_code),
-                trace_id,
-                error['message']))
+    streamed = api_response.pop('streamed')
+    _check_response(self, api_response)
+    if not streamed:
+        nodes = self._dump_nodes(api_response)
+        if isinstance(nodes, list):
+            yield from nodes
+        else:
+            yield nodes
+
+
+def _send_with_retries(self, send, operation_name, is_mutation):
+    """ Call `send` within the client rate limits, retrying transient failures
+    according to the client retry policy.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        self._retry_stats.record_attempt(operation_name, attempt)
+        try:
+            with _rate_limited(self, 'mutation' if is_mutation else 'query'):
+                return send()
+        except RequestException as err:
+            if not self._retry_policy.should_retry(err, attempt, operation_name, is_mutation):
+                self._retry_stats.record_failure(operation_name)
+                raise
+            delay = self._retry_policy.backoff(attempt, err.retry_after)
+            self.logger.warning("Retrying {} in {:.2f}s after attempt {} failed: {}".format(
+                operation_name, delay, attempt, err))
+            self._retry_stats.record_retry(operation_name, delay)
+            time.sleep(delay)
+
+
+def _send_document(self, body, operation_name, timeout=None):
+    """ Send a GraphQL request, only carrying the hash of its document when persisted queries are
+    enabled and registering the document when Polaris doesn't know the hash yet.
+    """
+    persisted = self._persisted_queries
+    query_text = body['query']
+    source_size = _source_size(self, operation_name, query_text)
+    if not persisted.send_hash(query_text):
+        resp = _send_graphql(self, body, timeout)
+        persisted.record(operation_name, source_size, len(query_text.encode('utf-8')))
+        return resp
+
+    try:
+        resp = _send_graphql(self, _hashed_body(body), timeout)
+        persisted.record(operation_name, source_size, 0, persisted=True)
+        return resp
+    except RequestException as err:
+        if not isinstance(err.__cause__, PersistedQueryException):
+            raise
+        persisted.rejected(query_text, err.__cause__.error_code)
+
+    if persisted.enabled:
+        body = dict(body, extensions=persisted_query_extension(query_text))
+    resp = _send_graphql(self, body, timeout)
+    persisted.registered(query_text)
+    persisted.record(operation_name, source_size, len(query_text.encode('utf-8')), persisted=False)
+    return resp
+
+
+def _hashed_body(body):
+    """ Return the request body with the hash of its document instead of the document. """
+    hashed = {key: value for key, value in body.items() if key != 'query'}
+    hashed['extensions'] = persisted_query_extension(body['query'])
+    return hashed
+
+
+def _source_size(self, operation_name, query_text):
+    """ Return the size in bytes of the document a query was minified from. """
+    query_name = self._query_names.get(operation_name)
+    if query_name is not None:
+        return self._graphql_query_map[query_name]['source_size']
+    return len(query_text.encode('utf-8'))
+
+
+def _send_graphql(self, body, timeout=None, graphql_errors=True):
+    """ Send a single GraphQL request and return the decoded response, raising a
+    RequestException carrying the HTTP status and GraphQL error code on failure.
+    With `graphql_errors` False, errors listed in a successful response are left to the caller.
+    """
+    raw_resp = None
+    try:
+        raw_resp = _post_graphql(self, body, timeout)
+        if raw_resp.status_code == 401:
+            # The access token was revoked or expired early, retry once with a new one
+            self._token_manager.invalidate()
+            raw_resp = _post_graphql(self, body, timeout)
 
-        if 'code' in resp and 'message' in resp and resp['code'] >= 400:
-            raise RequestException(ERROR_MESSAGES['REQUEST_INVALID_STATUS'].format(resp['code'],
-                return_http_error_message(resp['code']),
-                resp['message']))
+        resp = _decode_json(self, raw_resp)
+        if 'query' not in body:
+            _check_persisted_query(resp)
+        _check_response(self, resp, graphql_errors)
 
         raw_resp.raise_for_status()
 
         return resp
 
     except Exception as e:
-        raise RequestException(e)
+        raise _request_error(e, raw_resp) from e
+
+
+def _open_graphql_stream(self, body, timeout=None):
+    """ Send a single GraphQL request and return the response once its headers have
+    been received, leaving the body unread. Error responses are read and raised like
+    in _send_graphql.
+    """
+    raw_resp = None
+    try:
+        raw_resp = _post_graphql(self, body, timeout, stream=True)
+        if raw_resp.status_code == 401:
+            raw_resp.close()
+            self._token_manager.invalidate()
+            raw_resp = _post_graphql(self, body, timeout, stream=True)
+
+        if raw_resp.status_code >= 400:
+            resp = _decode_json(self, raw_resp)
+            _check_response(self, resp)
+            raw_resp.raise_for_status()
+
+        return raw_resp
+
+    except Exception as e:
+        if raw_resp is not None:
+            raw_resp.close()
+        raise _request_error(e, raw_resp) from e
+
+
+def _request_error(error, raw_resp):
+    """ Wrap `error` in a RequestException carrying the HTTP status, GraphQL error code
+    and Retry-After header of the response, when one was received.
+    """
+    status_code = raw_resp.status_code if raw_resp is not None else None
+    retry_after = raw_resp.headers.get('Retry-After') if raw_resp is not None else None
+    return RequestException(error, status_code=status_code, error_code=getattr(error, 'error_code', None),
+                            retry_after=retry_after)
+
+
+def _decode_json(self, raw_resp):
+    _response_size.value = len(raw_resp.content)
+    if self._json_loads is None:
+        return raw_resp.json()
+    return self._json_loads(raw_resp.content)
+
 
+def _is_mutation(raw_query):
+    return bool(raw_query) and raw_query.lstrip().startswith('mutation')
 
-def _get_access_token_basic(self):
+
+def get_persisted_query_stats(self):
+    """Retrieves the query text bytes sent and saved by minification and persisted queries, per GraphQL
+    operation name.
+
+    Returns:
+        dict: Requests, persisted query hits and misses, query bytes sent and saved, per operation.
+    """
+    return self._persisted_queries.stats()
+
+
+def get_retry_stats(self):
+    """Retrieves retry counters of the requests sent by the client, per GraphQL operation name.
+
+    Returns:
+        dict: Requests, attempts, retries, failures and seconds spent backing off, per operation.
+
+    Examples:
+        >>> client.get_retry_stats()['SdkPythonCoreReportData']
+        {'requests': 40, 'attempts': 42, 'retries': 2, 'failures': 0, 'backoff_seconds': 1.37}
+    """
+    return self._retry_stats.snapshot()
+
+
+def get_prefetch_stats(self):
+    """Retrieves the page prefetching counters of paginated queries, per GraphQL operation name.
+
+    `wait_seconds` is the time the consumer waited for pages that weren't fetched yet, and
+    `consume_seconds` the time it spent on the entries of pages before asking for the next one.
+
+    Returns:
+        dict: Pages prefetched, seconds spent fetching, waiting and consuming, in total and per page.
+
+    Examples:
+        >>> client.get_prefetch_stats()['SdkPythonCoreReportData']['wait_seconds_per_page']
+        0.02
+    """
+    return self._prefetch_stats.snapshot()
+
+
+def get_page_size_stats(self):
+    """Retrieves the page sizes tuned for paginated operations by the adaptive page size mode. They are
+    shared by every client of the process.
+
+    Returns:
+        dict: Current page size, its bounds, and the number of pages, size increases, decreases and timeouts,
+        per operation.
+
+    Examples:
+        >>> client.get_page_size_stats()['SdkPythonCoreReportData']
+        {'pages': 12, 'grown': 2, 'shrunk': 1, 'timeouts': 0, 'size': 800, 'minimum': 10, 'maximum': 1000}
+    """
+    return page_size_stats()
+
+
+def get_deduplication_stats(self):
+    """Retrieves the counters of identical concurrent read queries that shared a single request.
+
+    Returns:
+        dict: Number of read requests sent and of requests saved, or an empty dict when deduplication is disabled.
+
+    Examples:
+        >>> client.get_deduplication_stats()
+        {'requests': 57, 'requests_saved': 12}
+    """
+    if self._single_flight is None:
+        return {}
+    return self._single_flight.stats()
+
+
+def get_cache_stats(self):
+    """Retrieves the counters of the client response cache.
+
+    Returns:
+        dict: Hits, misses, evictions, invalidated entries and number of entries cached, or an empty dict when
+        the response cache is disabled.
+
+    Examples:
+        >>> client.get_cache_stats()
+        {'hits': 31, 'misses': 6, 'evictions': 0, 'invalidations': 2, 'entries': 4}
+    """
+    if self._response_cache is None:
+        return {}
+    return self._response_cache.stats()
+
+
+def get_rate_limit_stats(self):
+    """Retrieves the state of the client rate limiter, shared with every client using the same limiter.
+
+    Returns:
+        dict: Current rate, concurrency limit, requests in flight and waiting (queue depth), and
+        throttled/slow response counters per operation class, or an empty dict when rate limiting is disabled.
+
+    Examples:
+        >>> client.get_rate_limit_stats()['query']
+        {'rate': 12.5, 'max_rate': 20.0, 'concurrency_limit': 8, 'in_flight': 8, 'queue_depth': 3, ...}
+    """
+    if self._rate_limiter is None:
+        return {}
+    return self._rate_limiter.stats()
+
+
+def _rate_limited(self, operation_class):
+    """ Hold a slot of the client rate limiter, if any, for the duration of a request. """
+    if self._rate_limiter is None:
+        return contextlib.nullcontext()
+    return self._rate_limiter.limit(operation_class)
+
+
+def _post_graphql(self, body, timeout=None, stream=False):
+    return self._session_pool.post(
+        "{}/graphql".format(self._baseurl),
+        headers=self.prepare_headers(),
+        json=body,
+        verify=self._verify,
+        proxies=self._proxies,
+        timeout=_request_timeout(self, timeout),
+        stream=stream
+    )
+
+
+def _build_request_body(raw_query, operation_name, variables):
+    """ Build the JSON body of a GraphQL request.
+    """
+    body = {"query": "{}".format(raw_query)}
+    if variables:
+        body['variables'] = variables
+    if operation_name:
+        body['operationName'] = operation_name
+    return body
+
+
+def _check_response(self, resp, graphql_errors=True):
+    """ Raise a RequestException when a decoded GraphQL response carries errors
+    or an error status.
+    """
+    if graphql_errors and 'errors' in resp and len(resp['errors']) > 0:
+        error = resp['errors'][0]
+        self.logger.error(error)
+        status_code = error['extensions']['code']
+        trace_id = error['extensions'].get('trace') if error['extensions']['trace'].get('traceId', "N/A") else "N/A"
+        if error.get('path'):
+            raise RequestException(ERROR_MESSAGES['REQUEST_ERROR_WITH_PATH'].format(
+                status_code,
+                return_http_error_message(status_code),
+                trace_id,
+                error['path'], error['message']), error_code=status_code)
+        raise RequestException(ERROR_MESSAGES['REQUEST_ERROR_WITHOUT_PATH'].format(
+            status_code, return_http_error_message(status_code),
+            trace_id,
+            error['message']), error_code=status_code)
+
+    if 'code' in resp and 'message' in resp and resp['code'] >= 400:
+        raise RequestException(ERROR_MESSAGES['REQUEST_INVALID_STATUS'].format(resp['code'],
+            return_http_error_message(resp['code']),
+            resp['message']), error_code=resp['code'])
+
+
+def _get_access_token_basic(self, username, password):
     try:
         session_url = "{}/session".format(self._baseurl)
         payload = {
-            "username": self._username,
-            "password": self._password
+            "username": username,
+            "password": password
         }
         headers = {
             'Content-Type': 'application/json;charset=UTF-8',
             'Accept': 'application/json, text/plain'
         }
-        response = requests.post(
+        response = self._session_pool.post(
             session_url,
             json=payload,
             headers=headers,
             verify=self._verify,
             proxies=self._proxies,
-            timeout=30
+            timeout=_request_timeout(self, DEFAULT_AUTH_TIMEOUT)
         )
 
         del payload
@@ -186,18 +712,18 @@ def _get_access_token_basic(self):
 
         mfa_token = response_json['mfa_token']
         payload = {
-            "username": self._username,
-            "password": self._password,
+            "username": username,
+            "password": password,
             "mfa_remember_token": mfa_token
         }
 
-        response = requests.post(
+        response = self._session_pool.post(
             session_url,
             json=payload,
             headers=headers,
             verify=self._verify,
             proxies=self._proxies,
-            timeout=30
+            timeout=_request_timeout(self, DEFAULT_AUTH_TIMEOUT)
         )
 
         response_json = response.json()
@@ -232,13 +758,13 @@ def _get_access_token_keyfile(self, json_key=None):
             'Content-Type': 'application/json;charset=UTF-8',
             'Accept': 'application/json, text/plain'
         }
-        response = requests.post(
+        response = self._session_pool.post(
             session_url,
             json=payload,
             headers=headers,
             verify=self._verify,
             proxies=self._proxies,
-            timeout=30
+            timeout=_request_timeout(self, DEFAULT_AUTH_TIMEOUT)
         )
 
         response_json = response.json()
@@ -259,6 +785,29 @@ def _get_access_token_keyfile(self, json_key=None):
         raise
 
 
+def _request_timeout(self, timeout=None):
+    """ Build the requests timeout for a call, combining the per-call read timeout
+    (or the client default) with the client connect timeout when one is set.
+    """
+    read_timeout = timeout if timeout is not None else self._read_timeout
+    if self._connect_timeout is not None:
+        return self._connect_timeout, read_timeout
+    return read_timeout
+
+
+def get_connection_stats(self):
+    """Retrieves connection reuse counters of the client HTTP connection pool.
+
+    Returns:
+        dict: Number of requests sent, connections opened and connections reused.
+
+    Examples:
+        >>> client.get_connection_stats()
+        {'requests': 120, 'connections_opened': 2, 'connections_reused': 118}
+    """
+    return self._session_pool.stats()
+
+
 def return_http_error_message(status_code):
     """
     Returns HTTP error message, either custom or standard based on the status code input
@@ -64,26 +64,30 @@ def get_sla_domains(self, sla_domain_name=""):
         raise
 
 
-def submit_on_demand(self, object_ids, sla_id, wait=False):
+def submit_on_demand(self, object_ids, sla_id, wait=False, return_handle=False):
     """Submits On Demand Snapshot request for the given set of object id's and assign the given SLA to the snapshots.
 
     Args:
         object_ids (list): List of Rubrik Object IDs
         sla_id (str): Rubrik SLA Domain ID
-        wait (bool): Threaded wait for all processes to complete
+        wait (bool): Wait for all processes to complete
+        return_handle (bool): Return a JobHandle per object instead, see wait_for_jobs
 
     Returns:
-        list: List of errors if any occurred
+        list: List of errors if any occurred, the task status of every snapshot with `wait`, or the job handles
+        with `return_handle`, where the handles of objects Polaris refused to snapshot raise their error
 
     Raises:
         RequestException: If the query to Polaris returned an error
+        PolarisException: If the status of a snapshot task can't be read while waiting
 
     Examples:
         >>> object_ids = client.get_object_ids_gce(region='us-west-1')
         >>> sla_domain_id = client.get_sla_domains('Gold')[0]['id']
         >>> client.submit_on_demand(object_ids, sla_domain_id, wait=True)
     """
-    from rubrik_polaris.exceptions import RequestException
+    from rubrik_polaris.common.jobs import _on_demand_handles
+
     try:
         mutation_name = "core_snappable_on_demand"
         variables = {
@@ -98,11 +102,11 @@ def submit_on_demand(self, object_ids, sla_id, wait=False):
             for error_object in response['errors']:
                 results.append(error_object)
 
-        try:
-            if wait:
-                results = self._monitor_task(response['taskchainUuids'])
-        except Exception as e:
-            pass
+        if return_handle:
+            return _on_demand_handles(self, response)
+
+        if wait and response['taskchainUuids']:
+            results = self._monitor_task(response['taskchainUuids'])
 
         return results
     except Exception:
@@ -137,7 +141,7 @@ def submit_assign_sla(self, object_ids=[], sla_id=None, apply_to_existing_snapsh
         mutation_name = "core_sla_assign"
         variables = {
             "shouldApplyToExistingSnapshots": apply_to_existing_snapshots,
-            "existingSnapshotRetention": existing_snapshot_retention,
+            "existing_snapshot_retention": existing_snapshot_retention,
             "globalSlaAssignType": global_sla_assign_type,
             "objectIds": object_ids,
             "slaId": sla_id
@@ -173,10 +177,10 @@ def get_task_status(self, task_chain_id):
     """Retrieve task status from Polaris
 
     Args:
-        task_chain_id (str): Task Chain UUID from request
+        task_chain_id (str or list): Task Chain UUID from request, or a list of them to retrieve in batched requests
 
     Returns:
-        str: Task state
+        str: Task state, or a dict of task state by Task Chain UUID when a list was given
 
     Raises:
         RequestException: If the query to Polaris returned an error
@@ -185,6 +189,12 @@ def get_task_status(self, task_chain_id):
 
     try:
         query_name = "core_taskchain_status"
+        if isinstance(task_chain_id, (list, tuple, set)):
+            task_chain_ids = list(task_chain_id)
+            responses = self._query_batch([(query_name, {"filter": i}) for i in task_chain_ids],
+                                          return_exceptions=True)
+            return {i: "FAILED" if isinstance(response, Exception) else response['taskchain']
+                    for i, response in zip(task_chain_ids, responses)}
         variables = {
             "filter": task_chain_id
         }
@@ -219,7 +229,9 @@ def get_snapshots(self, snappable_id=None, recovery_point=None):
         recovery_point (str): Optional datetime of snapshot to return, or 'latest', or not defined to return all
 
     Returns:
-        dict: A dictionary of snapshots or a single snapshot if 'latest' was passed as `recovery_point`. If no snapshots are found, an empty dict is returned.
+        dict: A list of snapshots, or the latest snapshot if 'latest' was passed as `recovery_point`, or the closest
+        snapshot at or after a datetime `recovery_point`. If no snapshots are found, an empty dict is returned.
+        Use `resolve_snapshots` to find the snapshots of many snappables.
 
     Raises:
         RequestException: If the query to Polaris returned an error
@@ -232,7 +244,7 @@ def get_snapshots(self, snappable_id=None, recovery_point=None):
         ...        print(snapshot[0])
     """
     from dateutil.parser import parse
-    from dateutil.tz import tzlocal
+    from rubrik_polaris.common.bulk import _parse_recovery_point
 
     try:
         query_name = "core_snappable_snapshots"
@@ -247,19 +259,23 @@ def get_snapshots(self, snappable_id=None, recovery_point=None):
         if len(response) == 0:
             return {}
 
-        snapshot_comparison = {}
+        if recovery_point is None:
+            return response
+        if recovery_point == 'latest':
+            return response[0]
+
+        parsed_recovery_point = _parse_recovery_point(recovery_point)
+        closest_date = None
+        closest_snapshot = {}
         for snapshot in response:
-            if recovery_point != 'latest':
-                parsed_snapshot_date = parse(snapshot['date']).astimezone()
-                parsed_recovery_point = parse(recovery_point)
-                parsed_recovery_point = parsed_recovery_point.replace(tzinfo=tzlocal())
-                snapshot['date_local'] = parsed_snapshot_date.isoformat()
-                if parsed_snapshot_date >= parsed_recovery_point:
-                    snapshot_comparison[abs(parsed_recovery_point - parsed_snapshot_date)] = snapshot
-
-        if recovery_point != 'latest':
-            return snapshot_comparison[min(snapshot_comparison)][0]
-        return response[0]
+            parsed_snapshot_date = parse(snapshot['date']).astimezone()
+            snapshot['date_local'] = parsed_snapshot_date.isoformat()
+            if parsed_snapshot_date < parsed_recovery_point:
+                continue
+            if closest_date is None or parsed_snapshot_date < closest_date:
+                closest_date = parsed_snapshot_date
+                closest_snapshot = snapshot
+        return closest_snapshot
     except Exception:
         raise
 
@@ -306,15 +322,23 @@ def get_event_series_list(self, object_type=[], status=[], activity_type=[],
         raise
 
 
-def get_report_data(self, object_type=[], cluster_ids=[]):
+def get_report_data(self, object_type=[], cluster_ids=[], fields=None, page_size=None, limit=None, checkpoint=None,
+                    resume=False):
     """Retrieve Report Data from Polaris
 
     Args:
         object_type (list): List of object type
         cluster_ids (list): List of cluster id's
+        fields (list): Optional fields of the report rows to return, e.g. ['id', 'name', 'complianceStatus']
+        page_size (int): Optional number of rows requested per page, defaults to 1000
+        limit (int): Optional maximum number of rows to return
+        checkpoint (CheckpointStore or str): Optional store (or SQLite file) the progress of the export is committed
+            to after every page, defaults to the `checkpoint_store` client option
+        resume (bool): Continue from the last page committed to the checkpoint store by an export with the same
+            arguments. Rows of a page that wasn't fully read are returned again
 
     Returns:
-        list: A list of dictionaries of Report data
+        iterator: Dictionaries of Report data, pages are fetched as it is read
 
     Raises:
         RequestException: If the query to Polaris returned an error
@@ -332,7 +356,8 @@ def get_report_data(self, object_type=[], cluster_ids=[]):
                 },
             },
         }
-        response = self._query_paginated(query_name, variables)
+        response = self._query_paginated(query_name, variables, fields=fields, page_size=page_size, limit=limit,
+                                         checkpoint=checkpoint, resume=resume)
         return response
     except Exception:
         raise
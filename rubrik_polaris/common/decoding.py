@@ -0,0 +1,123 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Fast and streaming decoding of GraphQL responses.
+"""
+
+import json
+
+from rubrik_polaris.exceptions import PolarisException
+
+JSON_BACKENDS = ('orjson', 'ujson', 'json')
+
+ERROR_MESSAGES = {
+    "INVALID_JSON_BACKEND": "'{}' is an invalid value for 'json_backend'. Use 'auto' or one of {}.",
+    "JSON_BACKEND_NOT_INSTALLED": "The '{0}' JSON backend is not installed. Install it with 'pip install {0}'.",
+    "IJSON_NOT_INSTALLED": "Streaming GraphQL responses requires the 'ijson' package. Install it with "
+                           "'pip install ijson'."
+}
+
+
+def get_json_loads(backend):
+    """ Return the `loads` function of a JSON backend.
+
+    Args:
+        backend (str): 'orjson', 'ujson', 'json', or 'auto' for the fastest one installed.
+
+    Returns:
+        callable: Decodes a str or bytes JSON document.
+    """
+    if backend == 'auto':
+        for name in JSON_BACKENDS:
+            try:
+                return _import_backend(name)
+            except ImportError:
+                continue
+    if backend not in JSON_BACKENDS:
+        raise PolarisException(ERROR_MESSAGES['INVALID_JSON_BACKEND'].format(backend, list(JSON_BACKENDS)))
+    try:
+        return _import_backend(backend)
+    except ImportError:
+        raise PolarisException(ERROR_MESSAGES['JSON_BACKEND_NOT_INSTALLED'].format(backend))
+
+
+def _import_backend(name):
+    if name == 'orjson':
+        import orjson
+        return orjson.loads
+    if name == 'ujson':
+        import ujson
+        return ujson.loads
+    return json.loads
+
+
+def _import_ijson():
+    try:
+        import ijson
+    except ImportError:
+        raise PolarisException(ERROR_MESSAGES['IJSON_NOT_INSTALLED'])
+    return ijson
+
+
+def iter_streamed_nodes(fp, response):
+    """ Incrementally parse a GraphQL response read from the file-like `fp` and yield every
+    `edges[].node` of its root field as soon as it has been received, so that only one node
+    is held in memory at a time. Everything else (`pageInfo`, `errors`, ...) is collected in
+    `response`, where `response['streamed']` tells whether the root field had edges.
+    When it had none, the caller is expected to extract the nodes from `response` itself.
+    """
+    ijson = _import_ijson()
+
+    builder = ijson.ObjectBuilder()
+    node_builder = None
+    root_prefix = edges_prefix = node_prefix = None
+    streamed = False
+
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        if node_builder is not None:
+            node_builder.event(event, value)
+            if prefix == node_prefix and event in ('end_map', 'end_array'):
+                yield node_builder.value
+                node_builder = None
+            continue
+
+        if root_prefix is None and prefix == 'data' and event == 'map_key':
+            root_prefix = 'data.{}'.format(value)
+            edges_prefix = root_prefix + '.edges'
+            node_prefix = edges_prefix + '.item.node'
+        elif prefix == root_prefix and event == 'map_key' and value == 'edges':
+            streamed = True
+            continue
+        elif edges_prefix is not None and (prefix == edges_prefix or prefix.startswith(edges_prefix + '.')):
+            if prefix == node_prefix:
+                if event in ('start_map', 'start_array'):
+                    node_builder = ijson.ObjectBuilder()
+                    node_builder.event(event, value)
+                else:
+                    yield value
+            continue
+
+        builder.event(event, value)
+
+    response.update(builder.value)
+    response['streamed'] = streamed
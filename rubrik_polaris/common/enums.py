@@ -0,0 +1,82 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Precompiled table of the enum values defined by the Polaris GraphQL schema.
+
+The table is generated from the bundled schema.graphql with:
+
+    python -m rubrik_polaris.common.enums schema.graphql
+"""
+
+import json
+import os
+import re
+import sys
+
+from rubrik_polaris.common.shared import load_json_table
+
+ENUM_TABLE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'enum_table.json')
+
+_ENUM_BLOCK = re.compile(r'^enum\s+(\w+)[^{]*\{(.*?)\}', re.MULTILINE | re.DOTALL)
+_STRING = re.compile(r'"""(?:.|\n)*?"""|"(?:\\.|[^"\\])*"')
+_COMMENT = re.compile(r'#[^\n]*')
+_VALUE = re.compile(r'(@?)(\w+)(\s*\([^)]*\))?')
+
+
+def parse_enums(schema_text):
+    """ Return the values of every enum of a GraphQL schema, by enum name. Deprecated values
+    are left out, like the live introspection of enumValues does.
+    """
+    enums = {}
+    for match in _ENUM_BLOCK.finditer(schema_text):
+        body = _COMMENT.sub('', _STRING.sub('', match.group(2)))
+        values = []
+        for directive, name, _ in _VALUE.findall(body):
+            if not directive:
+                values.append(name)
+            elif name == 'deprecated' and values:
+                values.pop()
+        enums[match.group(1)] = values
+    return enums
+
+
+def load_enum_table():
+    """ Return the precompiled enum table, loading it on first use. An empty table is
+    returned when it is not available, so that enums are introspected live instead.
+    """
+    return load_json_table(ENUM_TABLE_PATH)
+
+
+def write_enum_table(schema_path, table_path=ENUM_TABLE_PATH):
+    """ Generate the enum table of the schema at `schema_path`. """
+    with open(schema_path) as f:
+        enums = parse_enums(f.read())
+    with open(table_path, 'w') as f:
+        json.dump(enums, f, separators=(',', ':'), sort_keys=True)
+        f.write('\n')
+    return enums
+
+
+if __name__ == '__main__':
+    table = write_enum_table(sys.argv[1] if len(sys.argv) > 1 else 'schema.graphql')
+    print("Wrote {} enums to {}".format(len(table), ENUM_TABLE_PATH))
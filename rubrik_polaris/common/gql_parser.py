@@ -0,0 +1,417 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Dependency-free parser of GraphQL executable documents (operations and fragments).
+"""
+
+import re
+from collections import namedtuple
+
+from rubrik_polaris.exceptions import ValidationException
+
+ERROR_MESSAGES = {
+    "UNEXPECTED_CHARACTER": "Syntax error in GraphQL document at offset {}: unexpected character '{}'.",
+    "UNEXPECTED_TOKEN": "Syntax error in GraphQL document at offset {}: expected {}, found '{}'.",
+    "UNEXPECTED_END": "Syntax error in GraphQL document: expected {}, found the end of the document."
+}
+
+# Skips ignored tokens (whitespace, commas and comments) and captures the next token, the single
+# character that can't start one, or an empty string at the end of the document.
+_TOKEN = re.compile(r'''
+    (?:[\s,\ufeff]|\#[^\n\r]*)*
+    (
+        \.\.\.|[!$&():=@\[\]{|}]
+      | [_A-Za-z][_0-9A-Za-z]*
+      | -?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?
+      | """(?:\\"""|[^"]|"(?!""))*"""
+      | "(?:\\.|[^"\\\n\r])*"
+      | [^\s,\ufeff\#]
+      | \Z
+    )
+''', re.VERBOSE)
+_NAME_START = frozenset('_ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz')
+_KINDS = dict([(c, 'name') for c in _NAME_START] + [(c, 'number') for c in '-0123456789'] +
+              [(c, 'punctuator') for c in '!$&():=@[]{|}.'] + [('"', 'string')])
+_SINGLE_CHARACTER_TOKENS = frozenset('!$&():=@[]{|}0123456789') | _NAME_START
+
+Document = namedtuple('Document', 'operations fragments')
+OperationDefinition = namedtuple('OperationDefinition', 'operation name variable_definitions directives selection_set')
+VariableDefinition = namedtuple('VariableDefinition', 'name type default_value')
+TypeRef = namedtuple('TypeRef', 'kind name of_type')
+Field = namedtuple('Field', 'alias name arguments directives selection_set')
+FragmentSpread = namedtuple('FragmentSpread', 'name directives')
+InlineFragment = namedtuple('InlineFragment', 'type_condition directives selection_set')
+FragmentDefinition = namedtuple('FragmentDefinition', 'name type_condition directives selection_set')
+Directive = namedtuple('Directive', 'name arguments')
+Value = namedtuple('Value', 'kind value text')
+
+
+def type_to_string(type_ref):
+    """ Return the GraphQL notation of a type reference, e.g. '[UUID!]!'. """
+    if type_ref.kind == 'NON_NULL':
+        return type_to_string(type_ref.of_type) + '!'
+    if type_ref.kind == 'LIST':
+        return '[{}]'.format(type_to_string(type_ref.of_type))
+    return type_ref.name
+
+
+def named_type(type_ref):
+    """ Return the name of the type wrapped by list and non-null modifiers. """
+    while type_ref.kind != 'NAMED':
+        type_ref = type_ref.of_type
+    return type_ref.name
+
+
+def is_list_type(type_ref):
+    """ Whether the type, or the type it makes non-null, is a list. """
+    while type_ref.kind != 'NAMED':
+        if type_ref.kind == 'LIST':
+            return True
+        type_ref = type_ref.of_type
+    return False
+
+
+def response_key(field):
+    """ Return the key of a field in the response, its alias when it has one. """
+    return field.alias or field.name
+
+
+def _tokenize(text):
+    """ Return the kinds and values of the tokens of `text`, followed by an end token. """
+    values = _TOKEN.findall(text)
+    while values and not values[-1]:
+        values.pop()
+    invalid = [i for i, v in enumerate(values) if len(v) == 1 and v not in _SINGLE_CHARACTER_TOKENS]
+    if invalid:
+        raise ValidationException(ERROR_MESSAGES['UNEXPECTED_CHARACTER'].format(
+            _token_offset(text, invalid[0]), values[invalid[0]]))
+    kinds = [_KINDS[v[0]] for v in values]
+    kinds.append(None)
+    values.append(None)
+    return kinds, values
+
+
+def _token_offset(text, index):
+    """ Return the offset in `text` of its `index`-th token, only needed to report errors. """
+    for i, m in enumerate(_TOKEN.finditer(text)):
+        if i == index:
+            return m.start(1)
+    return len(text)
+
+
+class _Parser:
+    """Recursive descent parser over the tokens of a document. Punctuators and names are told apart by
+    their value alone, since no other token can be equal to them.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.kinds, self.values = _tokenize(text)
+        self.position = 0
+
+    def expect(self, value):
+        if self.values[self.position] != value:
+            raise self.error("'{}'".format(value))
+        self.position += 1
+
+    def error(self, expected):
+        """ Return the exception reporting that `expected` was not found at the current token. """
+        found = self.values[self.position]
+        if found is None:
+            return ValidationException(ERROR_MESSAGES['UNEXPECTED_END'].format(expected))
+        return ValidationException(ERROR_MESSAGES['UNEXPECTED_TOKEN'].format(
+            _token_offset(self.text, self.position), expected, found))
+
+    def name(self):
+        position = self.position
+        if self.kinds[position] != 'name':
+            raise self.error('a name')
+        self.position = position + 1
+        return self.values[position]
+
+    def document(self):
+        operations = []
+        fragments = {}
+        while self.values[self.position] is not None:
+            if self.values[self.position] == 'fragment':
+                fragment = self.fragment_definition()
+                fragments[fragment.name] = fragment
+            else:
+                operations.append(self.operation_definition())
+        return Document(tuple(operations), fragments)
+
+    def operation_definition(self):
+        if self.values[self.position] == '{':
+            return OperationDefinition('query', None, (), (), self.selection_set())
+        if self.values[self.position] not in ('query', 'mutation', 'subscription'):
+            raise self.error('an operation type')
+        operation = self.name()
+        name = self.name() if self.kinds[self.position] == 'name' else None
+        variable_definitions = self.variable_definitions()
+        directives = self.directives()
+        return OperationDefinition(operation, name, variable_definitions, directives, self.selection_set())
+
+    def variable_definitions(self):
+        definitions = []
+        values = self.values
+        if values[self.position] == '(':
+            self.position += 1
+            while values[self.position] != ')':
+                self.expect('$')
+                name = self.name()
+                self.expect(':')
+                type_ref = self.type_ref()
+                default_value = None
+                if values[self.position] == '=':
+                    self.position += 1
+                    default_value = self.value(const=True)
+                self.directives()
+                definitions.append(VariableDefinition(name, type_ref, default_value))
+            self.position += 1
+        return tuple(definitions)
+
+    def type_ref(self):
+        if self.values[self.position] == '[':
+            self.position += 1
+            type_ref = TypeRef('LIST', None, self.type_ref())
+            self.expect(']')
+        else:
+            type_ref = TypeRef('NAMED', self.name(), None)
+        if self.values[self.position] == '!':
+            self.position += 1
+            type_ref = TypeRef('NON_NULL', None, type_ref)
+        return type_ref
+
+    def value(self, const=False):
+        position = self.position
+        kind, text = self.kinds[position], self.values[position]
+        if text == '$' and not const:
+            self.position += 1
+            name = self.name()
+            return Value('Variable', name, '$' + name)
+        if text == '[':
+            self.position += 1
+            items = []
+            while self.values[self.position] != ']':
+                items.append(self.value(const))
+            self.position += 1
+            return Value('List', items, '[{}]'.format(', '.join(item.text for item in items)))
+        if text == '{':
+            self.position += 1
+            fields = {}
+            while self.values[self.position] != '}':
+                field_name = self.name()
+                self.expect(':')
+                fields[field_name] = self.value(const)
+            self.position += 1
+            return Value('Object', fields, '{{{}}}'.format(', '.join(
+                '{}: {}'.format(name, field.text) for name, field in fields.items())))
+        if kind == 'number':
+            value = Value('Float', float(text), text) if re.search(r'[.eE]', text) else Value('Int', int(text), text)
+        elif kind == 'string' and text.startswith('"""'):
+            value = Value('String', text[3:-3].replace('\\"""', '"""'), text)
+        elif kind == 'string':
+            value = Value('String', _unescape(text[1:-1]), text)
+        elif kind == 'name':
+            if text in ('true', 'false'):
+                value = Value('Boolean', text == 'true', text)
+            elif text == 'null':
+                value = Value('Null', None, text)
+            else:
+                value = Value('Enum', text, text)
+        else:
+            raise self.error('a value')
+        self.position += 1
+        return value
+
+    def arguments(self, const=False):
+        arguments = []
+        values = self.values
+        if values[self.position] == '(':
+            self.position += 1
+            while values[self.position] != ')':
+                name = self.name()
+                self.expect(':')
+                arguments.append((name, self.value(const)))
+            self.position += 1
+        return tuple(arguments)
+
+    def directives(self):
+        directives = []
+        while self.values[self.position] == '@':
+            self.position += 1
+            directives.append(Directive(self.name(), self.arguments()))
+        return tuple(directives)
+
+    def selection_set(self):
+        self.expect('{')
+        selections = []
+        values = self.values
+        while values[self.position] != '}':
+            if values[self.position] is None:
+                raise self.error("'}'")
+            selections.append(self.selection())
+        self.position += 1
+        return tuple(selections)
+
+    def selection(self):
+        values = self.values
+        if values[self.position] == '...':
+            self.position += 1
+            if values[self.position] == 'on':
+                self.position += 1
+                type_condition = self.name()
+            elif self.kinds[self.position] == 'name':
+                return FragmentSpread(self.name(), self.directives())
+            else:
+                type_condition = None
+            return InlineFragment(type_condition, self.directives(), self.selection_set())
+        alias = None
+        name = self.name()
+        if values[self.position] == ':':
+            self.position += 1
+            alias, name = name, self.name()
+        arguments = self.arguments() if values[self.position] == '(' else ()
+        directives = self.directives() if values[self.position] == '@' else ()
+        selection_set = self.selection_set() if values[self.position] == '{' else None
+        return Field(alias, name, arguments, directives, selection_set)
+
+    def fragment_definition(self):
+        self.expect('fragment')
+        name = self.name()
+        self.expect('on')
+        type_condition = self.name()
+        return FragmentDefinition(name, type_condition, self.directives(), self.selection_set())
+
+
+def _unescape(text):
+    if '\\' not in text:
+        return text
+    import json
+    return json.loads('"{}"'.format(text))
+
+
+def parse(text):
+    """ Parse a GraphQL executable document.
+
+    Args:
+        text (str): The document.
+
+    Returns:
+        Document: The operations of the document, and its fragment definitions by name.
+
+    Raises:
+        ValidationException: If the document is not valid GraphQL syntax.
+    """
+    return _Parser(text).document()
+
+
+def minify(text):
+    """ Return `text` without comments, commas and the whitespace that doesn't separate two tokens.
+    String values are kept as they are.
+    """
+    kinds, values = _tokenize(text)
+    parts = []
+    previous = None
+    for kind, value in zip(kinds[:-1], values[:-1]):
+        if previous in ('name', 'number') and kind in ('name', 'number'):
+            parts.append(' ')
+        parts.append(value)
+        previous = kind
+    return ''.join(parts)
+
+
+def print_document(document):
+    """ Return the minified GraphQL text of a Document. """
+    parts = [_print_operation(operation) for operation in document.operations]
+    parts += ['fragment {} on {}{} {}'.format(fragment.name, fragment.type_condition,
+                                              _print_directives(fragment.directives),
+                                              _print_selection_set(fragment.selection_set))
+              for fragment in document.fragments.values()]
+    return minify('\n'.join(parts))
+
+
+def _print_operation(operation):
+    variables = ''
+    if operation.variable_definitions:
+        variables = '({})'.format(', '.join(
+            '${}: {}{}'.format(v.name, type_to_string(v.type), ' = ' + v.default_value.text if v.default_value else '')
+            for v in operation.variable_definitions))
+    return '{} {}{}{} {}'.format(operation.operation, operation.name or '', variables,
+                                 _print_directives(operation.directives),
+                                 _print_selection_set(operation.selection_set))
+
+
+def _print_selection_set(selection_set):
+    return '{{{}}}'.format(' '.join(_print_selection(selection) for selection in selection_set))
+
+
+def _print_selection(selection):
+    if isinstance(selection, Field):
+        text = '{}: {}'.format(selection.alias, selection.name) if selection.alias else selection.name
+        text += _print_arguments(selection.arguments) + _print_directives(selection.directives)
+        if selection.selection_set is not None:
+            text += ' ' + _print_selection_set(selection.selection_set)
+        return text
+    if isinstance(selection, FragmentSpread):
+        return '...{}{}'.format(selection.name, _print_directives(selection.directives))
+    return '...{}{} {}'.format(' on ' + selection.type_condition if selection.type_condition else '',
+                               _print_directives(selection.directives), _print_selection_set(selection.selection_set))
+
+
+def _print_arguments(arguments):
+    if not arguments:
+        return ''
+    return '({})'.format(', '.join('{}: {}'.format(name, value.text) for name, value in arguments))
+
+
+def _print_directives(directives):
+    return ''.join(' @{}{}'.format(directive.name, _print_arguments(directive.arguments)) for directive in directives)
+
+
+def iter_fields(selection_set, fragments):
+    """ Yield the fields of a selection set, expanding fragment spreads and inline fragments. """
+    for selection in selection_set or ():
+        if isinstance(selection, Field):
+            yield selection
+        elif isinstance(selection, InlineFragment):
+            yield from iter_fields(selection.selection_set, fragments)
+        elif selection.name in fragments:
+            yield from iter_fields(fragments[selection.name].selection_set, fragments)
+
+
+def find_page_path(selection_set, fragments):
+    """ Return the response keys leading to the first connection (a field selecting `pageInfo`),
+    searching breadth first from the operation root, or None when the operation is not paginated.
+    """
+    queue = [((), selection_set)]
+    while queue:
+        path, selections = queue.pop(0)
+        for field in iter_fields(selections, fragments):
+            if field.selection_set is None:
+                continue
+            field_path = path + (response_key(field),)
+            if any(f.name == 'pageInfo' for f in iter_fields(field.selection_set, fragments)):
+                return list(field_path)
+            queue.append((field_path, field.selection_set))
+    return None
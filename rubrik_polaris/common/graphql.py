@@ -23,79 +23,175 @@
 Collection of methods that interact with the raw GraphQL.
 """
 
+import functools
+import json
+import os
 import re
+import threading
+from collections.abc import Mapping
 
-def _build_graphql_maps(self):
-    from os import listdir
-    from os.path import isfile, join
+GRAPHQL_SOURCE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'graphql')
+GRAPHQL_INDEX_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'graphql_index.json')
+GRAPHQL_INDEX_VERSION = 3
+
+_operation_indexes = {}
+_operation_indexes_lock = threading.Lock()
 
-    # Assemble GraphQL query/mutation hash and name map
-    graphql_details = {}
 
+def _build_graphql_maps(self):
+    """ Return the operation index of the client, shared by every client of the process. It is read
+    from the index precompiled at build time when available, and from the .graphql files otherwise.
+    """
+    return load_operation_index(self._data_path)
+
+
+class OperationIndex(Mapping):
+    """Read-only mapping of query name to operation details (variables, gql_name, operation_name, the
+    minified query_text and the source_size in bytes of the document it was minified from). The details
+    of an operation are decoded or compiled on its first use.
+
+    Args:
+        loaders (dict): Callable returning the details of each operation, by query name.
+    """
+
+    def __init__(self, loaders):
+        self._loaders = loaders
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, query_name):
+        entry = self._entries.get(query_name)
+        if entry is None:
+            loader = self._loaders[query_name]
+            with self._lock:
+                entry = self._entries.get(query_name)
+                if entry is None:
+                    entry = self._entries[query_name] = loader()
+        return entry
+
+    def __contains__(self, query_name):
+        return query_name in self._loaders
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self):
+        return len(self._loaders)
+
+
+def load_operation_index(data_path=GRAPHQL_SOURCE_PATH, index_path=None):
+    """ Return the OperationIndex of the .graphql files in `data_path`, preferring the precompiled
+    index at `index_path` (GRAPHQL_INDEX_PATH by default). Falls back to the files bundled with the
+    package when `data_path` is missing.
+    """
+    index_path = index_path or GRAPHQL_INDEX_PATH
+    key = (data_path, index_path)
+    with _operation_indexes_lock:
+        index = _operation_indexes.get(key)
+        if index is None:
+            loaders = _compiled_index_loaders(index_path)
+            if loaders is None:
+                loaders = _source_loaders(data_path if os.path.isdir(data_path) else GRAPHQL_SOURCE_PATH)
+            index = _operation_indexes[key] = OperationIndex(loaders)
+        return index
+
+
+def _compiled_index_loaders(index_path):
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != GRAPHQL_INDEX_VERSION:
+        return None
+    # Entries are stored as JSON text, so that only the operations in use are decoded
+    return {query_name: functools.partial(json.loads, entry) for query_name, entry in index['operations'].items()}
+
+
+def _source_loaders(data_path):
+    loaders = {}
+    for f in os.listdir(data_path):
+        query_name = _query_name_from_file(f)
+        if query_name is not None and os.path.isfile(os.path.join(data_path, f)):
+            loaders[query_name] = functools.partial(_compile_operation_file, os.path.join(data_path, f), query_name)
+    return loaders
+
+
+def _query_name_from_file(file_name):
     file_query_prefix = 'query'
     file_mutation_prefix = 'mutation'
     file_suffix = '.graphql'
 
-    graphql_files = [f for f in listdir(self._data_path)
-                     if isfile(join(self._data_path, f)) and f.endswith(file_suffix)]
+    if not file_name.endswith(file_suffix):
+        return None
+    query_name = file_name.replace(file_suffix, '')
+    if file_name.startswith(file_query_prefix):
+        query_name = query_name.replace('{}_'.format(file_query_prefix), '')
+    elif file_name.startswith(file_mutation_prefix):
+        query_name = query_name.replace('{}_'.format(file_mutation_prefix), '')
+    return query_name
+
+
+def _compile_operation_file(path, query_name):
+    with open(path, 'r') as f:
+        return _compile_operation(query_name, f.read())
+
 
-    for f in graphql_files:
-        query_name = f.replace(file_suffix, '')
-        if f.startswith(file_query_prefix):
-            query_name = query_name.replace('{}_'.format(file_query_prefix), '')
-        elif f.startswith(file_mutation_prefix):
-            query_name = query_name.replace('{}_'.format(file_mutation_prefix), '')
+def _compile_operation(query_name, graphql_file):
+    from rubrik_polaris.common.gql_parser import minify
 
-        try:
-            graphql_file = open("{}{}".format(self._data_path, f), 'r').read()
-            graphql_details[query_name] = self._get_details_from_graphql_query(graphql_file)
-            op_name = "SdkPython" + ''.join(w[:1].upper() + w[1:] for w in query_name.split('_'))
-            graphql_details[query_name]['operation_name'] = op_name
-            query_text = """{}""".format(graphql_file)
-            query_text = re.sub("RubrikPolarisSDKRequest", op_name, query_text)
-            graphql_details[query_name]['query_text'] = query_text
+    details = _get_details_from_graphql_query(None, graphql_file)
+    op_name = _operation_name(query_name)
+    details['operation_name'] = op_name
+    query_text = re.sub("RubrikPolarisSDKRequest", op_name, graphql_file)
+    details['query_text'] = minify(query_text)
+    details['source_size'] = len(query_text.encode('utf-8'))
+    return details
 
-        except OSError as e:
-            raise  # TODO: Should we bail immediately or go on to the next file?
 
-    return graphql_details
+def write_operation_index(data_path=GRAPHQL_SOURCE_PATH, index_path=GRAPHQL_INDEX_PATH):
+    """ Compile every .graphql file of `data_path` into the operation index at `index_path`.
+
+    Returns:
+        int: Number of operations written.
+    """
+    operations = {}
+    for query_name, loader in sorted(_source_loaders(data_path).items()):
+        operations[query_name] = json.dumps(loader(), separators=(',', ':'))
+    with open(index_path, 'w') as f:
+        json.dump({'version': GRAPHQL_INDEX_VERSION, 'operations': operations}, f, separators=(',', ':'))
+    return len(operations)
+
+
+def _operation_name(query_name):
+    """ Return the GraphQL operation name the SDK sends for a query name. """
+    return "SdkPython" + ''.join(w[:1].upper() + w[1:] for w in query_name.split('_'))
 
 
 def _get_details_from_graphql_query(self, graphql_query_text):
-    import sys
-    try:
-        o = {}
-        try:
-            o['gql_name'] = re.findall(r' +(\S+) ?\(.*', graphql_query_text)[1]
-            paren = re.search(r'\((.*?)\)', graphql_query_text).group(1).split(',')
-            for i in paren:
-                item = re.search(r'^(.*):(.*$)', i)
-                var_name = item.group(1).strip()
-                o[var_name] = {}
-                if '=' in item.group(2):
-                    default_split = item.group(2).split('=')
-                    o[var_name]['default'] = default_split[1].strip()
-                    o[var_name]['type'] = default_split[0].strip()
-                else:
-                    o[var_name]['default'] = None
-                    o[var_name]['type'] = item.group(2).strip()
-                if '[' in o[var_name]['type']:
-                    o[var_name]['type'] = re.search(r'\[(.*)\]', o[var_name]['type']).group(1)
-                    o[var_name]['typeOf'] = 'arrayOf'
-                else:
-                    o[var_name]['typeOf'] = 'stringOf'
-                if '!' in o[var_name]['type']:
-                    o[var_name]['required'] = True
-                    o[var_name]['type'] = o[var_name]['type'].replace("!", "")
-                else:
-                    o[var_name]['required'] = False
-        except:  # Handle non-variable queries
-            o['gql_name'] = re.sub(r"[\{|\}]", "", re.search(r'\{(.*)\}', re.sub(r"[\n\t\s]*", "", graphql_query_text)).group(0))
-        return o
-    except:
-        print("Unexpected error:", sys.exc_info()[0])
-        print(graphql_query_text)
-        raise
+    """ Return the details of the first operation of a GraphQL document: its variables (by name, with their
+    type, type_ref, typeOf, default and required flag), the response key of its root field (gql_name), its
+    operation_type and the response keys leading to its paginated connection (page_path, or None).
+    """
+    from rubrik_polaris.common.gql_parser import parse, named_type, is_list_type, type_to_string, response_key, \
+        iter_fields, find_page_path
+
+    document = parse(graphql_query_text)
+    operation = document.operations[0]
+    o = {}
+    for variable in operation.variable_definitions:
+        o[variable.name] = {
+            'default': variable.default_value.text if variable.default_value is not None else None,
+            'type': named_type(variable.type),
+            'type_ref': type_to_string(variable.type),
+            'typeOf': 'arrayOf' if is_list_type(variable.type) else 'stringOf',
+            'required': variable.type.kind == 'NON_NULL' and variable.default_value is None
+        }
+    root = next(iter_fields(operation.selection_set, document.fragments))
+    o['gql_name'] = response_key(root)
+    o['operation_type'] = operation.operation
+    o['page_path'] = find_page_path(operation.selection_set, document.fragments)
+    return o
 
 
 def _dump_nodes(self, request):
@@ -121,10 +217,20 @@ def _dump_nodes(self, request):
 
 
 def get_enum_values(self, name=None):
-    """ Retrieve Enum Values via Introspection """
+    """ Retrieve Enum Values from the precompiled schema enum table, or via
+    Introspection for enums it doesn't know. Introspected values are kept for
+    the lifetime of the client.
+    """
+    from rubrik_polaris.common.enums import load_enum_table
+
     try:
-        query_name = "graphql_enum_values"
-        variables = {"enum_name": name}
-        return self._query(query_name, variables)
+        values = load_enum_table().get(name)
+        if values is not None:
+            return list(values)
+        if name not in self._enum_values:
+            query_name = "graphql_enum_values"
+            variables = {"enum_name": name}
+            self._enum_values[name] = self._query(query_name, variables)
+        return list(self._enum_values[name])
     except Exception:
         raise
@@ -0,0 +1,227 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+"""
+Future-compatible handles of Polaris jobs, resolved by a background taskchain poller.
+"""
+
+import concurrent.futures
+import threading
+from timeit import default_timer as timer
+
+from rubrik_polaris.common.monitor import TaskchainMonitor
+from rubrik_polaris.exceptions import PolarisException
+
+RETURN_WHEN = {
+    'any': concurrent.futures.FIRST_COMPLETED,
+    'all': concurrent.futures.ALL_COMPLETED
+}
+
+ERROR_MESSAGES = {
+    "INVALID_RETURN_WHEN": "return_when must be 'any' or 'all', got '{}'."
+}
+
+
+class JobHandle(concurrent.futures.Future):
+    """Future of a Polaris job, resolved with its task dict (see TaskchainMonitor.add) once the taskchain
+    reached a terminal state, whether it SUCCEEDED, FAILED or was CANCELED.
+
+    Handles work with `concurrent.futures.wait` and `as_completed`. Cancelling a handle only stops the local wait
+    for the taskchain, the job keeps running in Polaris.
+
+    Args:
+        task (dict): Task dict of the taskchain.
+        poller (JobPoller): Poller tracking the taskchain, None for a job that failed to start.
+    """
+
+    def __init__(self, task, poller=None):
+        super().__init__()
+        self.task = task
+        self._poller = poller
+        self._started = timer()
+
+    def __repr__(self):
+        return '<JobHandle {} state={}>'.format(self.taskchain_id, self.state)
+
+    @property
+    def taskchain_id(self):
+        return self.task.get('taskchainUuid')
+
+    @property
+    def state(self):
+        """ Last known state of the taskchain, None until it was first polled. """
+        return self.task.get('status')
+
+    @property
+    def progress(self):
+        """ Last known progress of the taskchain, as reported by Polaris. """
+        return self.task.get('progress')
+
+    @property
+    def elapsed(self):
+        """ Seconds since the job was submitted, until it finished. """
+        return self.task.get('elapsed', timer() - self._started)
+
+    def cancel(self):
+        """ Stop waiting for the taskchain. Returns False when the handle is already resolved. """
+        if not super().cancel():
+            return False
+        if self._poller is not None:
+            self._poller.discard(self)
+        return True
+
+
+class JobPoller:
+    """Resolves job handles from a daemon thread that polls their taskchains with a TaskchainMonitor.
+
+    The thread is started when a job is submitted and stops once every handle is resolved or cancelled. The
+    status requests are sent without holding the poller lock, so submitting and cancelling never wait for them.
+
+    Args:
+        client (PolarisClient): Client the statuses are requested with.
+        **kwargs: TaskchainMonitor arguments.
+    """
+
+    def __init__(self, client, **kwargs):
+        self._monitor = TaskchainMonitor(client, raise_errors=False, keep_tasks=False, **kwargs)
+        self._handles = {}
+        self._lock = threading.Condition(threading.RLock())
+        self._thread = None
+
+    def submit(self, task):
+        """ Track a taskchain, see TaskchainMonitor.add, and return its JobHandle. """
+        with self._lock:
+            task = self._monitor.add(task)
+            handle = JobHandle(task, self)
+            self._handles[id(task)] = handle
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='polaris-job-poller', daemon=True)
+                self._thread.start()
+            self._lock.notify()
+        return handle
+
+    def submit_all(self, tasks):
+        """ Track several taskchains at once, so that their first statuses are requested together. """
+        with self._lock:
+            return [self.submit(task) for task in tasks]
+
+    def discard(self, handle):
+        with self._lock:
+            if self._handles.pop(id(handle.task), None) is not None:
+                self._monitor.discard(handle.task)
+            self._lock.notify()
+
+    def stats(self):
+        with self._lock:
+            return self._monitor.stats()
+
+    def close(self):
+        """ Cancel the local wait of every pending handle and wait for the poller thread to stop. """
+        with self._lock:
+            handles = list(self._handles.values())
+            thread = self._thread
+        for handle in handles:
+            handle.cancel()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                delay = self._monitor.next_poll()
+                if delay is None:
+                    self._thread = None
+                    return
+                if delay > 0:
+                    self._lock.wait(delay)
+                    continue
+                polled = self._monitor.next_batch()
+
+            try:
+                responses = self._monitor.poll(polled)
+            except Exception as e:
+                responses = [e] * len(polled)
+
+            with self._lock:
+                finished = self._monitor.record(polled, responses)
+                handles = [self._handles.pop(id(task)) for task in finished]
+            for handle in handles:
+                _resolve(handle)
+
+
+def _resolve(handle):
+    if not handle.set_running_or_notify_cancel():
+        return
+    if 'error' in handle.task:
+        handle.set_exception(handle.task['error'])
+    else:
+        handle.set_result(handle.task)
+
+
+def _failed_job(task, message):
+    """ Return the already resolved handle of a job that Polaris refused to start. """
+    handle = JobHandle(task)
+    handle.set_running_or_notify_cancel()
+    handle.set_exception(PolarisException(message))
+    return handle
+
+
+def _on_demand_handles(self, response):
+    """ Return the handles of the taskchains of an on demand snapshot response, followed by the already failed
+    handles of the objects Polaris refused to snapshot.
+    """
+    return self._job_poller.submit_all(response['taskchainUuids']) + \
+        [_failed_job(dict(error_object), error_object['error']) for error_object in response['errors']]
+
+
+def wait_for_jobs(self, handles, timeout=None, return_when='all'):
+    """Waits for job handles returned with `return_handle=True`.
+
+    Args:
+        handles (list): JobHandle objects
+        timeout (float): Maximum number of seconds to wait, None to wait without limit
+        return_when (str): 'any' to return when one of the jobs finished, 'all' when every job finished
+
+    Returns:
+        tuple: Set of the finished handles and set of the pending ones
+
+    Raises:
+        ValidationException: If return_when is neither 'any' nor 'all'
+
+    Examples:
+        >>> jobs = client.submit_on_demand(object_ids, sla_domain_id, return_handle=True)
+        >>> done, pending = client.wait_for_jobs(jobs, timeout=600)
+        >>> failed = [job for job in done if job.exception() or job.state != 'SUCCEEDED']
+    """
+    from rubrik_polaris.exceptions import ValidationException
+
+    if return_when not in RETURN_WHEN:
+        raise ValidationException(ERROR_MESSAGES['INVALID_RETURN_WHEN'].format(return_when))
+    return concurrent.futures.wait(handles, timeout=timeout, return_when=RETURN_WHEN[return_when])
+
+
+def get_job_stats(self):
+    """Retrieves counters of the background poller resolving job handles.
+
+    Returns:
+        dict: Number of ticks, status requests, taskchain polls, finished taskchains and tracked taskchains
+    """
+    return self._job_poller.stats()
@@ -0,0 +1,96 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Lazily imported client methods, so that importing the SDK only loads the modules that are used.
+"""
+
+import importlib
+
+
+class LazyMethod:
+    """Class attribute standing for the function `name` of `module`, which is imported on first access.
+
+    The descriptor then replaces itself with the function on the class that declares it, so later
+    lookups are plain method lookups. Accessed on the class it returns the function, which keeps
+    `help()`, `inspect` and documentation tools working.
+
+    Args:
+        module (str): Module of the function, relative to the `rubrik_polaris` package when it starts with a dot.
+        name (str): Name of the function in the module.
+    """
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self._owner = None
+        self._attribute = name
+
+    def __set_name__(self, owner, name):
+        self._owner = owner
+        self._attribute = name
+
+    def __repr__(self):
+        return "<lazy method {}{}.{}>".format('rubrik_polaris' if self.module.startswith('.') else '',
+                                              self.module, self.name)
+
+    def resolve(self):
+        """ Import the function and install it on the declaring class in place of the descriptor. """
+        function = getattr(importlib.import_module(self.module, 'rubrik_polaris'), self.name)
+        if self._owner is not None and self._owner.__dict__.get(self._attribute) is self:
+            setattr(self._owner, self._attribute, function)
+        return function
+
+    def __get__(self, instance, owner=None):
+        function = self.resolve()
+        if instance is None:
+            return function
+        return function.__get__(instance, owner)
+
+
+def lazy_methods(*groups):
+    """ Class decorator declaring methods imported on first use. Each group is a tuple of the module
+    followed by the names of its functions, as in a `from module import name, ...` statement.
+    """
+    def decorate(cls):
+        for module, *names in groups:
+            for name in names:
+                method = LazyMethod(module, name)
+                setattr(cls, name, method)
+                method.__set_name__(cls, name)
+        return cls
+    return decorate
+
+
+def resolve_lazy_methods(cls):
+    """ Import every lazy method of `cls` and its bases, e.g. before forking workers.
+
+    Returns:
+        int: Number of methods imported.
+    """
+    resolved = 0
+    for klass in cls.__mro__:
+        for attribute in list(vars(klass).values()):
+            if isinstance(attribute, LazyMethod):
+                attribute.resolve()
+                resolved += 1
+    return resolved
@@ -23,56 +23,198 @@
 Collection of methods that monitor tasks
 """
 
-from multiprocessing.pool import ThreadPool
-from time import sleep
+import collections
+import time
 from timeit import default_timer as timer
 from rubrik_polaris.exceptions import PolarisException
 
-
-# Threader setup
-def _monitor_threader(self, tasks, thread_count, monitor_job):
-    if not isinstance(tasks, list):
-        tasks = [tasks]
-
-    task_list = [(self, t) for t in tasks]
-
-    thread_pool = ThreadPool(thread_count)
-
-    pool_instance = thread_pool.map_async(monitor_job, task_list, chunksize=1)
-    while not pool_instance.ready():
-        sleep(3)
-
-    thread_pool.close()
-    thread_pool.join()
-
-    return pool_instance.get()
-
-
-# Worker thread
-def _monitor_job(job):
-
-    self, task = job
-    try:
+TERMINAL_STATES = frozenset(['SUCCEEDED', 'FAILED', 'CANCELED'])
+DEFAULT_MONITOR_INTERVAL = 1
+DEFAULT_MONITOR_MAX_INTERVAL = 30
+DEFAULT_MONITOR_BACKOFF = 1.5
+DEFAULT_MONITOR_BATCH_SIZE = 100
+
+
+class TaskchainMonitor:
+    """Tracks any number of taskchains with a single poller.
+
+    Every tick sends one request with the status of up to `batch_size` of the taskchains that are due (as aliased
+    `getKorgTaskchainStatus` fields, see _query_batch), polling them in turn, and retires the ones that reached
+    a terminal state. A taskchain is first polled as soon as it is tracked, then after `interval` seconds, and the
+    delay grows by `backoff` after every poll up to `max_interval`, so short jobs finish quickly while long ones
+    are not polled needlessly. At most `max_in_flight` taskchains are polled, the others wait for one of them to
+    finish.
+
+    Args:
+        client (PolarisClient): Client the statuses are requested with.
+        batch_size (int): Maximum number of taskchains polled per tick.
+        max_in_flight (int): Maximum number of taskchains polled at the same time, None for no limit.
+        interval (float): Seconds between the first two polls of a taskchain.
+        max_interval (float): Upper bound in seconds of the delay between two polls of a taskchain.
+        backoff (float): Factor the delay between two polls of a taskchain grows by.
+        raise_errors (bool): Raise when the status of a taskchain can't be read, instead of retiring it with the
+            exception as its `error`.
+        keep_tasks (bool): Keep every tracked taskchain for `run` to return. Long-lived monitors driven by `tick`
+            or `record` turn it off, so that finished taskchains are forgotten.
+    """
+
+    def __init__(self, client, batch_size=DEFAULT_MONITOR_BATCH_SIZE, max_in_flight=None,
+                 interval=DEFAULT_MONITOR_INTERVAL, max_interval=DEFAULT_MONITOR_MAX_INTERVAL,
+                 backoff=DEFAULT_MONITOR_BACKOFF, raise_errors=True, keep_tasks=True):
+        self._client = client
+        self.batch_size = max(int(batch_size), 1)
+        self.max_in_flight = max(int(max_in_flight), 1) if max_in_flight else None
+        self.interval = interval
+        self.max_interval = max(max_interval, interval)
+        self.backoff = max(backoff, 1)
+        self.raise_errors = raise_errors
+        self.keep_tasks = keep_tasks
+        self._tasks = []
+        self._started = {}
+        self._due = {}
+        self._delay = {}
+        self._waiting = collections.deque()
+        self._in_flight = collections.deque()
+        self._stats = {'ticks': 0, 'requests': 0, 'polls': 0, 'finished': 0}
+
+    def add(self, task):
+        """ Track a taskchain, given as its UUID or a dict with a `taskchainUuid` (or `jobId`). The dict
+        gets the `status` and `progress` of the taskchain, and its `elapsed` seconds once it finished.
+        """
+        if not isinstance(task, dict):
+            task = {'taskchainUuid': task}
         if 'jobId' in task:
             task['taskchainUuid'] = task['jobId']
-        start = timer()
-        task_status = self.get_task_status(task['taskchainUuid'])
-        while task_status is None or task_status['state'] not in ["SUCCEEDED", "FAILED"]:
-            task_status = self.get_task_status(task['taskchainUuid'])
-            sleep(3)
-        task['status'] = task_status['state']
-        task['elapsed'] = timer() - start
+        self._started[id(task)] = timer()
+        if self.keep_tasks:
+            self._tasks.append(task)
+        self._waiting.append(task)
         return task
 
-    except Exception as err:
-        raise PolarisException("Failed to get status of task {}".format(task['taskchainUuid']))
-
+    def discard(self, task):
+        """ Stop tracking a taskchain, it is left out of the tasks returned by run. """
+        if id(task) in self._started:
+            self._retire(task)
+            self._tasks = [t for t in self._tasks if t is not task]
+
+    @property
+    def done(self):
+        return not self._waiting and not self._in_flight
+
+    def next_poll(self):
+        """ Return the number of seconds until a taskchain is due, None when none is tracked. """
+        self._admit()
+        if not self._in_flight:
+            return None
+        return max(min(self._due[id(task)] for task in self._in_flight) - timer(), 0)
+
+    def tick(self):
+        """ Poll the taskchains that are due in one request and return the ones that finished. """
+        polled = self.next_batch()
+        if not polled:
+            return []
+        return self.record(polled, self.poll(polled))
+
+    def next_batch(self):
+        """ Take up to `batch_size` of the taskchains that are due, in turn. """
+        self._admit()
+        now = timer()
+        polled = [task for task in self._in_flight if self._due[id(task)] <= now][:self.batch_size]
+        if polled:
+            # Rotate the polled taskchains to the back so that every due taskchain gets its turn
+            polled_ids = set(id(task) for task in polled)
+            self._in_flight = collections.deque(t for t in self._in_flight if id(t) not in polled_ids)
+            self._in_flight.extend(polled)
+        return polled
+
+    def poll(self, polled):
+        """ Request the status of the given taskchains in one batch, see _query_batch. """
+        self._stats['ticks'] += 1
+        self._stats['requests'] += 1
+        self._stats['polls'] += len(polled)
+        return self._client._query_batch(
+            [("core_taskchain_status", {"filter": task['taskchainUuid']}) for task in polled],
+            return_exceptions=True, batch_size=len(polled))
+
+    def record(self, polled, responses):
+        """ Update the taskchains from their polled statuses, and return the ones that finished. """
+        finished = []
+        now = timer()
+        for task, response in zip(polled, responses):
+            if id(task) not in self._started:
+                continue
+            if isinstance(response, Exception) or not response or not response.get('taskchain'):
+                error = PolarisException("Failed to get status of task {}".format(task['taskchainUuid']))
+                if self.raise_errors:
+                    raise error
+                task['error'] = error
+            else:
+                task['status'] = response['taskchain']['state']
+                task['progress'] = response['taskchain'].get('progress')
+            if 'error' in task or task['status'] in TERMINAL_STATES:
+                task['elapsed'] = now - self._started[id(task)]
+                self._retire(task)
+                finished.append(task)
+                continue
+            delay = self._delay.get(id(task))
+            self._delay[id(task)] = self.interval if delay is None else min(delay * self.backoff, self.max_interval)
+            self._due[id(task)] = now + self._delay[id(task)]
+        self._stats['finished'] += len(finished)
+        return finished
+
+    def run(self):
+        """ Poll until every tracked taskchain finished, and return them in the order they were added (none
+        without `keep_tasks`).
+        """
+        while True:
+            self.tick()
+            if self.done:
+                return self._tasks
+            time.sleep(self.next_poll())
+
+    def stats(self):
+        """ Return the number of ticks, requests, taskchain polls and finished taskchains. """
+        return dict(self._stats, in_flight=len(self._in_flight), waiting=len(self._waiting))
+
+    def _retire(self, task):
+        del self._started[id(task)]
+        self._due.pop(id(task), None)
+        self._delay.pop(id(task), None)
+        self._waiting = collections.deque(t for t in self._waiting if t is not task)
+        self._in_flight = collections.deque(t for t in self._in_flight if t is not task)
+
+    def _admit(self):
+        now = timer()
+        while self._waiting and (self.max_in_flight is None or len(self._in_flight) < self.max_in_flight):
+            task = self._waiting.popleft()
+            self._due[id(task)] = now
+            self._in_flight.append(task)
+
+
+def _monitor_task(self, tasks, batch_size=None, max_in_flight=None, interval=None, max_interval=None):
+    """ Wait for taskchains to finish, see TaskchainMonitor. Returns the task dict of a single
+    taskchain, or the list of task dicts.
+    """
+    if not isinstance(tasks, list):
+        tasks = [tasks]
 
-# Start threader
-def _monitor_task(self, tasks):
-    outcome = (_monitor_threader(self, tasks, len(tasks), _monitor_job))
+    monitor = TaskchainMonitor(self, **_monitor_options(self, batch_size, max_in_flight, interval, max_interval))
+    for task in tasks:
+        monitor.add(task)
+    outcome = monitor.run()
 
     if len(outcome) > 1:
         return outcome
 
     return outcome[0]
+
+
+def _monitor_options(self, batch_size=None, max_in_flight=None, interval=None, max_interval=None):
+    """ TaskchainMonitor arguments, defaulting to the monitor options of the client. """
+    return {
+        'batch_size': batch_size or self._monitor_batch_size,
+        'max_in_flight': max_in_flight if max_in_flight is not None else self._monitor_max_in_flight,
+        'interval': interval if interval is not None else self._monitor_interval,
+        'max_interval': max_interval if max_interval is not None else self._monitor_max_interval,
+        'backoff': self._monitor_backoff
+    }
@@ -0,0 +1,140 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Adaptive page sizes for paginated queries, tuned from the latency, payload size and timeouts of their pages.
+"""
+
+import threading
+
+DEFAULT_MIN_PAGE_SIZE = 10
+DEFAULT_MAX_PAGE_SIZE = 1000
+DEFAULT_INITIAL_PAGE_SIZE = 100
+DEFAULT_TARGET_LATENCY = 5.0
+DEFAULT_MAX_PAYLOAD = 8 * 1024 * 1024
+# Smallest factor a page size is shrunk by after a single slow page
+_MIN_SHRINK_FACTOR = 0.25
+
+_tuners = {}
+_tuners_lock = threading.Lock()
+
+
+class PageSizeTuner:
+    """Tunes the `first` variable of the pages of one paginated operation.
+
+    The size doubles after full pages that took less than half the target latency and payload, and shrinks in
+    proportion to the overshoot after pages that took longer or were larger than the targets. It halves after a
+    timeout. The size always stays within `minimum` and `maximum`.
+
+    Args:
+        initial (int): Page size of the first page.
+        minimum (int): Smallest page size.
+        maximum (int): Largest page size.
+        target_latency (float): Seconds a page should take at most.
+        max_payload (int): Bytes a page response should carry at most.
+    """
+
+    def __init__(self, initial=DEFAULT_INITIAL_PAGE_SIZE, minimum=DEFAULT_MIN_PAGE_SIZE,
+                 maximum=DEFAULT_MAX_PAGE_SIZE, target_latency=DEFAULT_TARGET_LATENCY, max_payload=DEFAULT_MAX_PAYLOAD):
+        self.minimum = max(int(minimum), 1)
+        self.maximum = max(int(maximum), self.minimum)
+        self.target_latency = target_latency
+        self.max_payload = max_payload
+        self._lock = threading.Lock()
+        self._size = self._bounded(initial)
+        self._stats = {'pages': 0, 'grown': 0, 'shrunk': 0, 'timeouts': 0}
+
+    def _bounded(self, size):
+        return min(max(int(size), self.minimum), self.maximum)
+
+    @property
+    def size(self):
+        with self._lock:
+            return self._size
+
+    def observe(self, size, rows, latency, payload=None):
+        """ Adjust the page size after a page of `size` returned `rows` entries in `latency` seconds,
+        and `payload` bytes when known. Pages requested at another size than the current one (e.g. the last
+        page of a limited query) can only shrink it.
+        """
+        with self._lock:
+            self._stats['pages'] += 1
+            factor = 1.0
+            if latency > self.target_latency:
+                factor = self.target_latency / latency
+            if payload and payload > self.max_payload:
+                factor = min(factor, self.max_payload / payload)
+            current_size = size == self._size
+            full_page = rows >= size
+            fast = latency < self.target_latency / 2
+            small_payload = not payload or payload < self.max_payload / 2
+            if factor < 1.0:
+                new_size = self._bounded(min(size * max(factor, _MIN_SHRINK_FACTOR), size - 1))
+            elif current_size and full_page and fast and small_payload:
+                new_size = self._bounded(size * 2)
+            else:
+                return self._size
+            if new_size > self._size:
+                self._stats['grown'] += 1
+            elif new_size < self._size:
+                self._stats['shrunk'] += 1
+            self._size = new_size
+            return self._size
+
+    def timed_out(self, size):
+        """ Halve the page size after a page of `size` timed out. Returns whether a smaller page can be tried. """
+        with self._lock:
+            self._stats['timeouts'] += 1
+            new_size = self._bounded(min(size // 2, self._size))
+            if new_size >= size:
+                return False
+            self._stats['shrunk'] += 1
+            self._size = new_size
+            return True
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._stats, size=self._size, minimum=self.minimum, maximum=self.maximum)
+
+
+def get_page_size_tuner(operation_name, initial=None, minimum=DEFAULT_MIN_PAGE_SIZE, maximum=DEFAULT_MAX_PAGE_SIZE):
+    """ Return the tuner of `operation_name`, shared by every client of the process so that the page size it
+    converged to is reused by later queries. `initial` and the bounds only apply when the tuner is created.
+    """
+    with _tuners_lock:
+        tuner = _tuners.get(operation_name)
+        if tuner is None:
+            tuner = _tuners[operation_name] = PageSizeTuner(initial or DEFAULT_INITIAL_PAGE_SIZE, minimum, maximum)
+        return tuner
+
+
+def page_size_stats():
+    """ Return the page size and counters of every tuned operation. """
+    with _tuners_lock:
+        tuners = dict(_tuners)
+    return {name: tuner.snapshot() for name, tuner in tuners.items()}
+
+
+def reset_page_size_tuners():
+    """ Forget the page sizes tuned so far. """
+    with _tuners_lock:
+        _tuners.clear()
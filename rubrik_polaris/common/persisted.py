@@ -0,0 +1,123 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Automatic persisted queries: documents are sent as their SHA-256 hash once Polaris knows them.
+"""
+
+import functools
+import hashlib
+import threading
+
+from rubrik_polaris.exceptions import PersistedQueryException
+
+PERSISTED_QUERY_VERSION = 1
+PERSISTED_QUERY_NOT_FOUND = 'PERSISTED_QUERY_NOT_FOUND'
+PERSISTED_QUERY_NOT_SUPPORTED = 'PERSISTED_QUERY_NOT_SUPPORTED'
+_ERROR_CODES = {
+    'PersistedQueryNotFound': PERSISTED_QUERY_NOT_FOUND,
+    'PersistedQueryNotSupported': PERSISTED_QUERY_NOT_SUPPORTED,
+    PERSISTED_QUERY_NOT_FOUND: PERSISTED_QUERY_NOT_FOUND,
+    PERSISTED_QUERY_NOT_SUPPORTED: PERSISTED_QUERY_NOT_SUPPORTED
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def query_hash(query_text):
+    """ Return the hex SHA-256 of a GraphQL document, as sent in the persistedQuery extension. """
+    return hashlib.sha256(query_text.encode('utf-8')).hexdigest()
+
+
+def persisted_query_extension(query_text):
+    """ Return the request extensions identifying `query_text` by its hash. """
+    return {'persistedQuery': {'version': PERSISTED_QUERY_VERSION, 'sha256Hash': query_hash(query_text)}}
+
+
+def _check_persisted_query(resp):
+    """ Raise a PersistedQueryException when the response rejects the hash of a persisted query. """
+    for error in resp.get('errors') or ():
+        if not isinstance(error, dict):
+            continue
+        code = _ERROR_CODES.get(error.get('message')) or \
+            _ERROR_CODES.get((error.get('extensions') or {}).get('code'))
+        if code:
+            raise PersistedQueryException(error.get('message'), error_code=code)
+
+
+class PersistedQueries:
+    """Decides when a document is sent as its hash only, and counts the query bytes that were not uploaded.
+
+    A document is first sent as its hash. When Polaris doesn't know the hash, the request is sent again with
+    the full document, which registers it. Documents that are rejected again after being registered are
+    always sent in full, and persisted queries are disabled for good when Polaris doesn't support them.
+
+    Args:
+        enabled (bool): Send hashes instead of documents.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._registered = set()
+        self._unpersisted = set()
+        self._stats = {}
+
+    def send_hash(self, query_text):
+        """ Whether the next request of `query_text` should only carry its hash. """
+        return self.enabled and query_hash(query_text) not in self._unpersisted
+
+    def rejected(self, query_text, error_code):
+        """ Record that Polaris rejected the hash of `query_text` with `error_code`. """
+        with self._lock:
+            if error_code == PERSISTED_QUERY_NOT_SUPPORTED:
+                self.enabled = False
+            elif query_hash(query_text) in self._registered:
+                self._unpersisted.add(query_hash(query_text))
+
+    def record(self, operation_name, source_size, sent_size, persisted=None):
+        """ Count a request of `operation_name` whose document of `source_size` bytes was sent as
+        `sent_size` bytes of query text. `persisted` tells whether its hash was accepted (True),
+        rejected (False) or not sent (None).
+        """
+        with self._lock:
+            entry = self._stats.setdefault(operation_name or 'anonymous', {
+                'requests': 0,
+                'persisted_hits': 0,
+                'persisted_misses': 0,
+                'query_bytes_sent': 0,
+                'query_bytes_saved': 0
+            })
+            entry['requests'] += 1
+            if persisted is not None:
+                entry['persisted_hits' if persisted else 'persisted_misses'] += 1
+            entry['query_bytes_sent'] += sent_size
+            entry['query_bytes_saved'] += max(source_size - sent_size, 0)
+
+    def registered(self, query_text):
+        """ Record that Polaris received the full document of `query_text` with its hash. """
+        with self._lock:
+            self._registered.add(query_hash(query_text))
+
+    def stats(self):
+        """ Return the counters of every operation. """
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
@@ -0,0 +1,142 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Background prefetching of the pages of paginated queries.
+"""
+
+import queue
+import threading
+import time
+
+_PUT_INTERVAL = 0.1
+
+
+class PrefetchStats:
+    """Thread-safe per-operation counters of prefetched pages, the time spent fetching them on the worker,
+    the time the consumer waited for them and the time it spent on them before asking for the next one."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _entry(self, operation_name):
+        return self._stats.setdefault(operation_name or 'anonymous', {
+            'pages': 0,
+            'fetch_seconds': 0.0,
+            'wait_seconds': 0.0,
+            'consume_seconds': 0.0
+        })
+
+    def record_fetch(self, operation_name, seconds):
+        with self._lock:
+            entry = self._entry(operation_name)
+            entry['pages'] += 1
+            entry['fetch_seconds'] += seconds
+
+    def record_wait(self, operation_name, seconds):
+        with self._lock:
+            self._entry(operation_name)['wait_seconds'] += seconds
+
+    def record_consume(self, operation_name, seconds):
+        with self._lock:
+            self._entry(operation_name)['consume_seconds'] += seconds
+
+    def snapshot(self):
+        """ Return the counters with the average fetch, wait and consume seconds per page. """
+        with self._lock:
+            stats = {}
+            for name, entry in self._stats.items():
+                stats[name] = dict(entry)
+                for key in ('fetch', 'wait', 'consume'):
+                    stats[name]['{}_seconds_per_page'.format(key)] = \
+                        entry['{}_seconds'.format(key)] / entry['pages'] if entry['pages'] else 0.0
+            return stats
+
+
+def prefetch_pages(pages, depth, stats, operation_name):
+    """ Iterate over `pages` on a background thread, fetching up to `depth` pages ahead of the consumer.
+
+    The worker blocks when `depth` pages are waiting to be consumed, and stops after its current page when the
+    returned iterator is closed. Exceptions raised while fetching are raised to the consumer after the pages
+    fetched before them.
+
+    Args:
+        pages (iterator): Pages, fetched as they are read.
+        depth (int): Maximum number of pages fetched but not consumed yet.
+        stats (PrefetchStats): Counters to record the fetch, wait and consume times into.
+        operation_name (str): Operation the counters are recorded under.
+
+    Returns:
+        iterator: The pages, in order.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=_PUT_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def work():
+        try:
+            while True:
+                start = time.monotonic()
+                try:
+                    page = next(pages)
+                except StopIteration:
+                    break
+                stats.record_fetch(operation_name, time.monotonic() - start)
+                if not put((page, None)):
+                    return
+            put((None, None))
+        except BaseException as e:
+            put((None, e))
+        finally:
+            pages.close()
+
+    worker = threading.Thread(target=work, name='polaris-prefetch-{}'.format(operation_name), daemon=True)
+    worker.start()
+    return _consume(buffer, stopped, stats, operation_name)
+
+
+def _consume(buffer, stopped, stats, operation_name):
+    consumed_at = None
+    try:
+        while True:
+            start = time.monotonic()
+            if consumed_at is not None:
+                stats.record_consume(operation_name, start - consumed_at)
+            page, error = buffer.get()
+            stats.record_wait(operation_name, time.monotonic() - start)
+            if error is not None:
+                raise error
+            if page is None:
+                return
+            yield page
+            consumed_at = time.monotonic()
+    finally:
+        stopped.set()
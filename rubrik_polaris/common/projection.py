@@ -0,0 +1,311 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Field projections: GraphQL documents pruned to the fields a caller needs, validated against the schema.
+
+The schema field table is generated from the bundled schema.graphql with:
+
+    python -m rubrik_polaris.common.projection schema.graphql
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+
+from rubrik_polaris.common.enums import _STRING, _COMMENT
+from rubrik_polaris.common.gql_parser import parse, print_document, iter_fields, response_key, Field, \
+    FragmentSpread, InlineFragment
+from rubrik_polaris.common.shared import load_json_table
+from rubrik_polaris.exceptions import ValidationException
+
+FIELD_TABLE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'field_table.json')
+
+ERROR_MESSAGES = {
+    "INVALID_PROJECTION": "Invalid field projection {!r}: expected a list of (dotted) field names or a dict.",
+    "UNKNOWN_FIELD": "'{}' is not a field of {}.",
+    "SUBFIELDS_REQUIRED": "'{}' of {} is an object, select its sub-fields (e.g. '{}.id').",
+    "NOT_AN_OBJECT": "'{}' of {} has no sub-fields.",
+    "NO_SELECTION": "The operation has no selection at '{}' to project."
+}
+
+_TYPE_BLOCK = re.compile(r'^(?:type|interface)\s+(\w+)[^{]*\{(.*?)^\}', re.MULTILINE | re.DOTALL)
+_FIELD = re.compile(r'^\s*(\w+)\s*(?:\([^)]*\))?\s*:\s*[\[\s]*(\w+)', re.MULTILINE)
+
+
+def parse_schema_fields(schema_text):
+    """ Return the fields of every object type and interface of a GraphQL schema, as a mapping of
+    type name to field name to the named type of the field (list and non-null modifiers removed).
+    """
+    types = {}
+    for match in _TYPE_BLOCK.finditer(schema_text):
+        body = _COMMENT.sub('', _STRING.sub('', match.group(2)))
+        types[match.group(1)] = dict(_FIELD.findall(body))
+    return types
+
+
+def load_field_table():
+    """ Return the precompiled schema field table, loading it on first use. An empty table is
+    returned when it is not available, so that projections can only remove fields.
+    """
+    return load_json_table(FIELD_TABLE_PATH)
+
+
+def write_field_table(schema_path, table_path=FIELD_TABLE_PATH):
+    """ Generate the field table of the schema at `schema_path`. """
+    with open(schema_path) as f:
+        types = parse_schema_fields(f.read())
+    with open(table_path, 'w') as f:
+        json.dump(types, f, separators=(',', ':'), sort_keys=True)
+        f.write('\n')
+    return types
+
+
+def normalize_projection(fields):
+    """ Return a projection as a hashable tree of (field name, sub-projection or None) pairs.
+
+    Args:
+        fields (list or dict): Field names, with dots for nested fields (e.g. ['id', 'tags.key']), or a
+            dict of field name to its sub-projection (a list, a dict, or None/True for the whole field).
+
+    Returns:
+        tuple: Sorted (name, sub-tree) pairs, where a sub-tree of None selects the whole field.
+    """
+    tree = {}
+
+    def add(node, path):
+        name, _, rest = path.partition('.')
+        if not name:
+            raise ValidationException(ERROR_MESSAGES['INVALID_PROJECTION'].format(fields))
+        if not rest:
+            node.setdefault(name, None)
+        else:
+            child = node.get(name)
+            if child is None:
+                child = node[name] = {}
+            add(child, rest)
+
+    def add_all(node, value, prefix=''):
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, dict):
+            for name, sub in value.items():
+                if sub is None or sub is True:
+                    add(node, prefix + name)
+                else:
+                    add_all(node, sub, prefix + name + '.')
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            for path in value:
+                if not isinstance(path, str):
+                    raise ValidationException(ERROR_MESSAGES['INVALID_PROJECTION'].format(fields))
+                add(node, prefix + path.strip())
+        else:
+            raise ValidationException(ERROR_MESSAGES['INVALID_PROJECTION'].format(fields))
+
+    def freeze(node):
+        if node is None:
+            return None
+        return tuple(sorted((name, freeze(sub)) for name, sub in node.items()))
+
+    add_all(tree, fields)
+    return freeze(tree)
+
+
+def projection_name(operation_name, projection):
+    """ Return the operation name of a projected document, distinct per projection. """
+    return '{}Projection{}'.format(operation_name, hashlib.sha256(repr(projection).encode('utf-8')).hexdigest()[:8])
+
+
+_parse = functools.lru_cache(maxsize=256)(parse)
+
+
+def _target_path(document, page_path, gql_name):
+    """ Response keys of the selection that is projected: the nodes of the paginated connection or of the
+    root field when it is a connection, or the root field itself.
+    """
+    path = tuple(page_path) if page_path else (gql_name,)
+    selections = document.operations[0].selection_set
+    for key in path + ('edges', 'node'):
+        field = next((f for f in iter_fields(selections, document.fragments) if response_key(f) == key), None)
+        if field is None or field.selection_set is None:
+            break
+        if key == 'node':
+            return path + ('edges', 'node')
+        selections = field.selection_set
+    return path
+
+
+def projection_type(query_text, page_path, gql_name):
+    """ Return the schema type of the objects a projection of the document selects from, or None when the
+    field table doesn't know it.
+    """
+    document = _parse(query_text)
+    operation = document.operations[0]
+    table = load_field_table()
+    type_name = operation.operation.capitalize()
+    selections = operation.selection_set
+    for key in _target_path(document, page_path, gql_name):
+        field = next((f for f in iter_fields(selections, document.fragments) if response_key(f) == key), None)
+        if field is None:
+            return None
+        type_name = table.get(type_name, {}).get(field.name)
+        selections = field.selection_set
+    return type_name
+
+
+@functools.lru_cache(maxsize=256)
+def project_document(query_text, page_path, gql_name, projection, operation_name=None):
+    """ Return the document pruned to the fields of `projection` (see normalize_projection) below its
+    projected selection, keeping everything else such as pageInfo. Fields the document doesn't select
+    are added when the schema field table knows them.
+
+    Args:
+        query_text (str): The GraphQL document.
+        page_path (tuple): Response keys of the paginated connection, or None.
+        gql_name (str): Response key of the root field.
+        projection (tuple): Normalized projection.
+        operation_name (str): New name of the operation.
+
+    Returns:
+        str: The minified, projected document.
+
+    Raises:
+        ValidationException: If the projection names unknown fields, or objects without their sub-fields.
+    """
+    document = _parse(query_text)
+    operation = document.operations[0]
+    table = load_field_table()
+    type_name = operation.operation.capitalize()
+
+    def descend(selections, path, type_name):
+        key = path[0]
+        replaced = []
+        found = False
+        for selection in selections:
+            if isinstance(selection, Field) and response_key(selection) == key and not found:
+                found = True
+                field_type = table.get(type_name, {}).get(selection.name)
+                if selection.selection_set is None:
+                    raise ValidationException(ERROR_MESSAGES['NO_SELECTION'].format('.'.join(path)))
+                if len(path) == 1:
+                    pruned, _ = _prune(selection.selection_set, projection, field_type, document.fragments, table)
+                else:
+                    pruned = descend(selection.selection_set, path[1:], field_type)
+                selection = selection._replace(selection_set=pruned)
+            replaced.append(selection)
+        if not found:
+            raise ValidationException(ERROR_MESSAGES['NO_SELECTION'].format('.'.join(path)))
+        return tuple(replaced)
+
+    selection_set = descend(operation.selection_set, _target_path(document, page_path, gql_name), type_name)
+    operation = operation._replace(selection_set=selection_set, name=operation_name or operation.name)
+    used = _used_fragments(selection_set, document.fragments)
+    fragments = {name: fragment for name, fragment in document.fragments.items() if name in used}
+    return print_document(document._replace(operations=(operation,), fragments=fragments))
+
+
+def _prune(selections, projection, type_name, fragments, table, add_missing=True):
+    """ Return the selections kept or added for `projection`, and the response keys of the projected
+    fields they contain. Fields of the document are matched by response key, fields it doesn't select are
+    added from the schema. Fragment spreads are inlined, so that only the fields used are kept from them.
+    """
+    wanted = dict(projection)
+    kept = []
+    found = set()
+    for selection in selections or ():
+        if isinstance(selection, Field):
+            key = response_key(selection)
+            if key not in wanted:
+                continue
+            found.add(key)
+            sub = wanted[key]
+            if sub is not None and selection.selection_set is None:
+                raise ValidationException(ERROR_MESSAGES['NOT_AN_OBJECT'].format(key, type_name))
+            if sub is not None:
+                field_type = table.get(type_name, {}).get(selection.name)
+                selection = selection._replace(
+                    selection_set=_prune(selection.selection_set, sub, field_type, fragments, table)[0])
+            kept.append(selection)
+            continue
+        if isinstance(selection, FragmentSpread):
+            fragment = fragments[selection.name]
+            inner_type, inner = fragment.type_condition, fragment.selection_set
+        else:
+            inner_type, inner = selection.type_condition or type_name, selection.selection_set
+        pruned, inner_found = _prune(inner, projection, inner_type, fragments, table, add_missing=False)
+        if pruned:
+            kept.append(InlineFragment(inner_type, selection.directives, pruned))
+            found |= inner_found
+
+    for name, sub in projection:
+        if name in found or not add_missing:
+            continue
+        fields = table.get(type_name, {})
+        if name not in fields:
+            raise ValidationException(ERROR_MESSAGES['UNKNOWN_FIELD'].format(name, type_name or 'the selection'))
+        field_type = fields[name]
+        if field_type in table:
+            if sub is None:
+                raise ValidationException(ERROR_MESSAGES['SUBFIELDS_REQUIRED'].format(name, type_name, name))
+            kept.append(Field(None, name, (), (), _prune((), sub, field_type, fragments, table)[0]))
+        else:
+            if sub is not None:
+                raise ValidationException(ERROR_MESSAGES['NOT_AN_OBJECT'].format(name, type_name))
+            kept.append(Field(None, name, (), (), None))
+    return tuple(kept), found
+
+
+def _used_fragments(selections, fragments, used=None):
+    used = set() if used is None else used
+    for selection in selections or ():
+        if isinstance(selection, FragmentSpread):
+            if selection.name not in used:
+                used.add(selection.name)
+                _used_fragments(fragments[selection.name].selection_set, fragments, used)
+        else:
+            _used_fragments(selection.selection_set, fragments, used)
+    return used
+
+
+def _projected_query(self, q, fields):
+    """ Return the query text and operation name of the operation details `q` projected to `fields`,
+    or the operation itself when no projection is requested. The projected operation name is
+    registered under the query name of `q`, so projections are cached, invalidated and measured
+    like the query they come from.
+    """
+    if fields is None:
+        return q['query_text'], q['operation_name']
+    projection = normalize_projection(fields)
+    operation_name = projection_name(q['operation_name'], projection)
+    page_path = tuple(q['page_path']) if q.get('page_path') else None
+    query_text = project_document(q['query_text'], page_path, q['gql_name'], projection, operation_name)
+    if operation_name not in self._query_names:
+        self._query_names[operation_name] = self._query_names.get(q['operation_name'])
+    return query_text, operation_name
+
+
+if __name__ == '__main__':
+    table = write_field_table(sys.argv[1] if len(sys.argv) > 1 else 'schema.graphql')
+    print("Wrote the fields of {} types to {}".format(len(table), FIELD_TABLE_PATH))
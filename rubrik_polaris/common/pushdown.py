@@ -0,0 +1,134 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Translation of object id lookup criteria into the server-side filter inputs of the inventory queries.
+"""
+
+import collections
+
+from rubrik_polaris.common.enums import load_enum_table
+
+# Where each criterion is evaluated: SERVER when the filter input selects exactly the matching objects,
+# SERVER_AND_CLIENT when it only narrows them down and the criterion is checked again on the client.
+SERVER = 'server'
+SERVER_AND_CLIENT = 'server+client'
+CLIENT = 'client'
+
+Pushdown = collections.namedtuple('Pushdown', ['filters', 'placement', 'client_criterias'])
+
+
+def _enum_list(filter_name, input_field, enum_name):
+    def rule(value):
+        values = load_enum_table().get(enum_name)
+        if not isinstance(value, str) or (values is not None and value not in values):
+            return None
+        return filter_name, {input_field: [value]}, SERVER
+    return rule
+
+
+def _string_list(filter_name, input_field):
+    def rule(value):
+        if not isinstance(value, str):
+            return None
+        return filter_name, {input_field: [value]}, SERVER
+    return rule
+
+
+def _substring(filter_name):
+    def rule(value):
+        if not isinstance(value, str) or not value:
+            return None
+        return filter_name, {'nameOrIdSubstring': value}, SERVER_AND_CLIENT
+    return rule
+
+
+def _relic(value):
+    if not isinstance(value, bool):
+        return None
+    return 'relicFilter', {'relic': value}, SERVER
+
+
+def _tags(value):
+    if not isinstance(value, dict) or not value:
+        return None
+    params = [{'filterType': 'TAG_KEY_VALUE', 'tagKey': key, 'tagValue': tag_value}
+              for key, tag_value in value.items()]
+    return 'tagFilter', {'tagFilterParams': params}, SERVER_AND_CLIENT
+
+
+def _account(value):
+    if not isinstance(value, dict) or not isinstance(value.get('id'), str):
+        return None
+    return 'accountFilter', {'accountIds': [value['id']]}, SERVER_AND_CLIENT
+
+
+PUSHDOWN_RULES = {
+    'compute_aws_ec2': {
+        'region': _enum_list('regionFilter', 'regions', 'AwsNativeRegion'),
+        'instanceType': _enum_list('typeFilter', 'ec2InstanceTypes', 'AwsNativeEc2InstanceType'),
+        'vpcId': _string_list('vpcFilter', 'vpcIds'),
+        'isRelic': _relic,
+        'instanceName': _substring('nameOrIdSubstringFilter'),
+        'tags': _tags,
+        'awsNativeAccount': _account,
+    },
+    'storage_aws_ebs': {
+        'region': _enum_list('regionFilter', 'regions', 'AwsNativeRegion'),
+        'volumeType': _enum_list('typeFilter', 'ebsVolumeTypes', 'AwsNativeEbsVolumeType'),
+        'isRelic': _relic,
+        'volumeName': _substring('nameOrIdSubstringFilter'),
+        'tags': _tags,
+        'awsNativeAccount': _account,
+    }
+}
+
+
+def plan_pushdown(query_name, criterias, match_all=True):
+    """ Split object id lookup criteria into the filters sent with `query_name` and the criteria matched on the
+    client. Criteria are only pushed down when all of them must match, and when their value can be expressed
+    with a filter input (e.g. a known enum value); everything else is matched on the client.
+
+    Args:
+        query_name (str): Name of the inventory query, a key of PUSHDOWN_RULES.
+        criterias (dict): Response keys of the objects and the values they must be equal to.
+        match_all (bool): Whether all criteria must match, or any of them.
+
+    Returns:
+        Pushdown: The `filters` variable, the placement (SERVER, SERVER_AND_CLIENT or CLIENT) of every
+        criterion, and the criteria left to match on the client.
+    """
+    rules = PUSHDOWN_RULES.get(query_name, {}) if match_all else {}
+    filters = {}
+    placement = {}
+    client_criterias = {}
+    for key, value in criterias.items():
+        pushed = rules[key](value) if key in rules else None
+        if pushed is None:
+            placement[key] = CLIENT
+            client_criterias[key] = value
+            continue
+        filter_name, filter_input, placement[key] = pushed
+        filters[filter_name] = filter_input
+        if placement[key] == SERVER_AND_CLIENT:
+            client_criterias[key] = value
+    return Pushdown(filters, placement, client_criterias)
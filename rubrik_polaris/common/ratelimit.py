@@ -0,0 +1,232 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Adaptive client-side rate limiting of the requests sent to Polaris.
+"""
+
+import contextlib
+import threading
+import time
+
+from rubrik_polaris.common.shared import shared
+
+OPERATION_CLASSES = ('query', 'mutation', 'auth')
+DEFAULT_LIMITS = {
+    'query': {'rate': 20.0, 'burst': 20, 'max_concurrency': 16},
+    'mutation': {'rate': 5.0, 'burst': 5, 'max_concurrency': 4},
+    'auth': {'rate': 1.0, 'burst': 2, 'max_concurrency': 1},
+}
+THROTTLED_STATUS_CODE = 429
+# Upper bound of a single wait, so that a waiter notices rate changes made by other threads
+MAX_WAIT = 1.0
+ASYNC_POLL_INTERVAL = 0.01
+
+
+def get_shared_rate_limiter():
+    """ Return the process-wide RateLimiter used by clients created with `rate_limiter=True`. """
+    return shared('rate_limiter', RateLimiter)
+
+
+def _is_throttled(error):
+    return getattr(error, 'status_code', None) == THROTTLED_STATUS_CODE or \
+        getattr(error, 'error_code', None) == THROTTLED_STATUS_CODE
+
+
+class _OperationClassLimiter:
+    """Token bucket bounding the request rate combined with an AIMD concurrency window."""
+
+    def __init__(self, rate, burst, max_concurrency, min_rate, decrease_factor, slow_factor, latency_threshold):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.burst = max(float(burst), 1.0)
+        self.tokens = self.burst
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.concurrency = float(self.max_concurrency)
+        self.decrease_factor = decrease_factor
+        self.slow_factor = slow_factor
+        self.latency_threshold = latency_threshold
+        self.latency = None
+        self.samples = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.throttled = 0
+        self.slow = 0
+        self._updated = time.monotonic()
+
+    def try_acquire(self):
+        """ Take a slot and a token and return 0, or return the seconds to wait for the next
+        token, or None when every slot of the concurrency window is in use.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.in_flight >= int(self.concurrency):
+            return None
+        if self.tokens < 1:
+            return min((1 - self.tokens) / self.rate, MAX_WAIT)
+        self.tokens -= 1
+        self.in_flight += 1
+        self.requests += 1
+        return 0
+
+    def release(self, latency, throttled):
+        self.in_flight -= 1
+        if throttled:
+            # Multiplicative decrease of both the rate and the concurrency window
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.concurrency = max(1.0, self.concurrency * self.decrease_factor)
+            self.tokens = min(self.tokens, 0.0)
+            return
+        if latency is None:
+            return
+        is_slow = self._is_slow(latency)
+        self.latency = latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+        self.samples += 1
+        if is_slow:
+            self.slow += 1
+            self.concurrency = max(1.0, self.concurrency * (1 + self.decrease_factor) / 2)
+        else:
+            # Additive increase: one extra slot per window of successful requests
+            self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+            self.rate = min(self.max_rate, self.rate + max(self.max_rate / 20, self.min_rate))
+
+    def _is_slow(self, latency):
+        if self.latency_threshold is not None:
+            return latency > self.latency_threshold
+        return self.samples >= 10 and latency > self.slow_factor * self.latency
+
+    def stats(self):
+        return {
+            'rate': round(self.rate, 3),
+            'max_rate': self.max_rate,
+            'concurrency_limit': int(self.concurrency),
+            'in_flight': self.in_flight,
+            'queue_depth': self.waiting,
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'slow': self.slow,
+            'avg_latency': round(self.latency, 4) if self.latency is not None else None
+        }
+
+
+class RateLimiter:
+    """Shapes the traffic of one or more clients with a token bucket and an AIMD concurrency window
+    per operation class ('query', 'mutation' and 'auth').
+
+    Every request takes a token (bounding the request rate) and a concurrency slot. When Polaris
+    answers 429 the rate and the number of slots are halved; slow responses shrink the window more
+    gently, and successful ones grow it back one slot at a time up to the configured maximum.
+    A single instance can be passed to several clients to share one budget.
+
+    Args:
+        limits (dict): Per operation class overrides of 'rate' (requests per second), 'burst' and
+            'max_concurrency', merged with DEFAULT_LIMITS.
+        min_rate (float): Lowest rate the limiter backs off to, in requests per second.
+        decrease_factor (float): Multiplier applied to the rate and concurrency on throttling.
+        slow_factor (float): A response is slow when it takes this many times the average latency.
+        latency_threshold (float): Absolute latency in seconds above which a response is slow,
+            used instead of slow_factor when set.
+
+    Examples:
+        >>> limiter = RateLimiter(limits={'query': {'rate': 50, 'max_concurrency': 8}})
+        >>> clients = [PolarisClient(json_keyfile=f, rate_limiter=limiter) for f in keyfiles]
+        >>> limiter.stats()['query']['queue_depth']
+        0
+    """
+
+    def __init__(self, limits=None, min_rate=0.5, decrease_factor=0.5, slow_factor=3.0, latency_threshold=None):
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._classes = {}
+        limits = limits or {}
+        for operation_class in OPERATION_CLASSES:
+            options = dict(DEFAULT_LIMITS[operation_class], **limits.get(operation_class, {}))
+            self._classes[operation_class] = _OperationClassLimiter(
+                min_rate=min_rate, decrease_factor=decrease_factor, slow_factor=slow_factor,
+                latency_threshold=latency_threshold, **options)
+
+    def acquire(self, operation_class='query'):
+        """ Block until a request of `operation_class` may be sent. """
+        limiter = self._classes[operation_class]
+        with self._released:
+            limiter.waiting += 1
+            try:
+                while True:
+                    delay = limiter.try_acquire()
+                    if delay == 0:
+                        return
+                    self._released.wait(MAX_WAIT if delay is None else delay)
+            finally:
+                limiter.waiting -= 1
+
+    async def aacquire(self, operation_class='query'):
+        """ Wait on the event loop until a request of `operation_class` may be sent. """
+        import asyncio
+
+        limiter = self._classes[operation_class]
+        with self._lock:
+            limiter.waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    delay = limiter.try_acquire()
+                if delay == 0:
+                    return
+                await asyncio.sleep(ASYNC_POLL_INTERVAL if delay is None else delay)
+        finally:
+            with self._lock:
+                limiter.waiting -= 1
+
+    def release(self, operation_class='query', latency=None, error=None):
+        """ Return the slot taken by `acquire`, adapting the limits to the outcome of the request. """
+        with self._released:
+            self._classes[operation_class].release(latency, _is_throttled(error))
+            self._released.notify_all()
+
+    @contextlib.contextmanager
+    def limit(self, operation_class='query'):
+        """ Hold a slot of `operation_class` for the duration of the block. """
+        self.acquire(operation_class)
+        start = time.monotonic()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            latency = time.monotonic() - start if error is None else None
+            self.release(operation_class, latency, error)
+
+    def stats(self):
+        """Returns the current state of every operation class.
+
+        Returns:
+            dict: Current rate, concurrency limit, requests in flight and waiting (queue depth),
+            and throttled/slow response counters, per operation class.
+        """
+        with self._lock:
+            return {name: limiter.stats() for name, limiter in self._classes.items()}
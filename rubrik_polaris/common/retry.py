@@ -0,0 +1,164 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+"""
+Retry policy with exponential backoff for transient Polaris request failures.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from rubrik_polaris.common.graphql import _operation_name
+
+RETRYABLE_STATUS_CODES = frozenset([429, 502, 503, 504])
+DEFAULT_IDEMPOTENT_MUTATIONS = frozenset([
+    'core_sla_assign',
+    'accounts_azure_default_sa_set',
+    'accounts_gcp_default_sa_set',
+])
+
+
+def _parse_retry_after(value):
+    """ Return the number of seconds requested by a Retry-After header value, or None. """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy:
+    """Decides whether a failed request is retried and how long to wait before the next attempt.
+
+    Errors are classified from the HTTP status, the GraphQL `extensions.code` of the first error and
+    connection failures. Mutations are only retried when their query name (or operation name) is listed
+    in `idempotent_mutations`. Subclass and override `should_retry` or `backoff` for custom behaviour.
+
+    Args:
+        max_attempts (int): Total number of attempts per request, 1 disables retries.
+        backoff_base (float): Delay in seconds before the first retry, doubled on every attempt.
+        backoff_max (float): Upper bound in seconds of a single backoff delay.
+        jitter (bool): Randomise delays ("full jitter") so that concurrent clients do not retry in lockstep.
+        retry_status_codes (iterable): HTTP statuses and GraphQL error codes that are retried.
+        retry_connection_errors (bool): Retry connection resets and timeouts.
+        idempotent_mutations (iterable): Names of mutations that are safe to send more than once.
+        max_retry_after (float): Upper bound in seconds honoured from a Retry-After header.
+    """
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_max=30.0, jitter=True,
+                 retry_status_codes=RETRYABLE_STATUS_CODES, retry_connection_errors=True,
+                 idempotent_mutations=DEFAULT_IDEMPOTENT_MUTATIONS, max_retry_after=300.0):
+        self.max_attempts = max(int(max_attempts), 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.retry_connection_errors = retry_connection_errors
+        self.max_retry_after = max_retry_after
+        self.idempotent_mutations = frozenset(idempotent_mutations) | \
+            frozenset(_operation_name(name) for name in idempotent_mutations)
+
+    def is_idempotent(self, operation_name, is_mutation):
+        return not is_mutation or operation_name in self.idempotent_mutations
+
+    def should_retry(self, error, attempt, operation_name=None, is_mutation=False):
+        """ Whether the request that raised `error` on its `attempt`-th try should be sent again. """
+        import requests
+
+        if attempt >= self.max_attempts or not self.is_idempotent(operation_name, is_mutation):
+            return False
+        if getattr(error, 'status_code', None) in self.retry_status_codes or \
+                getattr(error, 'error_code', None) in self.retry_status_codes:
+            return True
+        cause = error.__cause__ if error.__cause__ is not None else error
+        if self.retry_connection_errors:
+            if isinstance(cause, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                return not isinstance(cause, requests.exceptions.ProxyError)
+            try:
+                import aiohttp
+                import asyncio
+                if isinstance(cause, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                    return True
+            except ImportError:
+                pass
+        return False
+
+    def backoff(self, attempt, retry_after=None):
+        """ Seconds to wait after the `attempt`-th try, at least the server requested Retry-After. """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        requested = _parse_retry_after(retry_after)
+        if requested is not None:
+            delay = max(delay, min(requested, self.max_retry_after))
+        return delay
+
+
+class NoRetryPolicy(RetryPolicy):
+    """Policy that never retries, every failure is raised immediately."""
+
+    def __init__(self):
+        super().__init__(max_attempts=1)
+
+
+class RetryStats:
+    """Thread-safe per-operation counters of attempts, retries and time spent backing off."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _entry(self, operation_name):
+        return self._stats.setdefault(operation_name or 'anonymous', {
+            'requests': 0,
+            'attempts': 0,
+            'retries': 0,
+            'failures': 0,
+            'backoff_seconds': 0.0
+        })
+
+    def record_attempt(self, operation_name, attempt):
+        with self._lock:
+            entry = self._entry(operation_name)
+            entry['attempts'] += 1
+            if attempt == 1:
+                entry['requests'] += 1
+
+    def record_retry(self, operation_name, delay):
+        with self._lock:
+            entry = self._entry(operation_name)
+            entry['retries'] += 1
+            entry['backoff_seconds'] += delay
+
+    def record_failure(self, operation_name):
+        with self._lock:
+            self._entry(operation_name)['failures'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
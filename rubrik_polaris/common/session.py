@@ -0,0 +1,98 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+"""
+Pooled keep-alive HTTP sessions shared by every request of a PolarisClient.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive connections to Polaris.
+
+    Every thread gets its own ``requests.Session`` (sessions carry cookie state and are not
+    safe to share), but all of them mount the same ``HTTPAdapter`` so the underlying urllib3
+    connection pool, and therefore the TCP/TLS connections, are shared by the whole client.
+
+    Args:
+        pool_connections (int): Number of per-host connection pools to cache.
+        pool_maxsize (int): Maximum number of connections kept alive per host.
+        pool_block (bool): Block when the pool is exhausted instead of opening extra connections.
+        keep_alive (bool): Set to False to close every connection after its request.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_block=False, keep_alive=True):
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                    pool_block=pool_block, max_retries=0)
+        self._keep_alive = keep_alive
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._requests = 0
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self._adapter)
+            session.mount('http://', self._adapter)
+            if not self._keep_alive:
+                session.headers['Connection'] = 'close'
+            self._local.session = session
+        return session
+
+    def post(self, url, **kwargs):
+        """Sends a POST request through the pooled session of the calling thread."""
+        with self._lock:
+            self._requests += 1
+        return self._session().post(url, **kwargs)
+
+    def stats(self):
+        """Returns connection reuse counters.
+
+        Returns:
+            dict: Number of requests sent, connections opened and connections reused.
+        """
+        opened = 0
+        managers = [self._adapter.poolmanager] + list(self._adapter.proxy_manager.values())
+        for manager in managers:
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+        with self._lock:
+            sent = self._requests
+        return {
+            'requests': sent,
+            'connections_opened': opened,
+            'connections_reused': max(sent - opened, 0)
+        }
+
+    def close(self):
+        """Closes every pooled connection."""
+        self._adapter.close()
@@ -0,0 +1,61 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Process-wide values shared by every client, created by their first user.
+"""
+
+import json
+import threading
+
+_MISSING = object()
+
+_values = {}
+_values_lock = threading.RLock()
+
+
+def shared(key, factory):
+    """ Return the process-wide value of `key`, created with `factory()` on first use. Concurrent first
+    users wait for a single call of `factory`.
+    """
+    value = _values.get(key, _MISSING)
+    if value is _MISSING:
+        with _values_lock:
+            value = _values.get(key, _MISSING)
+            if value is _MISSING:
+                value = _values[key] = factory()
+    return value
+
+
+def load_json_table(path):
+    """ Return the JSON table at `path`, read once per process. An empty table is returned when it is not
+    available, e.g. when the package was built without it.
+    """
+    return shared(('json_table', path), lambda: _read_json_table(path))
+
+
+def _read_json_table(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,142 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+
+"""
+Deduplication of identical read queries that are in flight at the same time.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+
+
+def single_flight_key(raw_query, variables):
+    """ Key identifying a request by its document and normalized variables. """
+    normalized = json.dumps(variables or {}, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256("{}\n{}".format(raw_query, normalized).encode('utf-8')).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.copies = []
+        self.error = None
+        # Set by ado, awaited by the followers on the event loop
+        self.future = None
+
+    def finish(self, waiters, result=None, error=None):
+        """ Hand the result, or exception, of the leader to its `waiters` followers and wake them. """
+        # Copy before waking the followers, so that the leader's caller is free to modify its result
+        self.copies = [copy.deepcopy(result) for _ in range(waiters)] if error is None else []
+        self.error = error
+        self.done.set()
+        if self.future is not None and not self.future.done():
+            self.future.set_result(None)
+
+    def outcome(self):
+        """ Return the copy of the result of the leader kept for a follower, or raise its exception. """
+        if self.error is not None:
+            raise self.error
+        return self.copies.pop()
+
+
+class SingleFlight:
+    """Lets concurrent callers of the same request share a single execution.
+
+    The first caller of a key (the leader) runs the request; callers arriving while it is
+    in flight wait for it and receive a deep copy of its result, or its exception.
+    Results are never kept once the request completed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self._requests = 0
+        self._shared = 0
+
+    def do(self, key, fn):
+        """ Return the result of `fn()`, shared with concurrent callers of the same key. """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._requests += 1
+            else:
+                call.waiters += 1
+                self._shared += 1
+        if not leader:
+            call.done.wait()
+            return call.outcome()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._complete(self._calls, key, error=e)
+            raise
+        self._complete(self._calls, key, result=result)
+        return result
+
+    async def ado(self, key, coroutine_fn):
+        """ Return the result of `await coroutine_fn()`, shared with concurrent callers on the event loop. """
+        import asyncio
+
+        call = self._async_calls.get(key)
+        if call is not None:
+            call.waiters += 1
+            with self._lock:
+                self._shared += 1
+            await asyncio.shield(call.future)
+            return call.outcome()
+
+        call = self._async_calls[key] = _Call()
+        call.future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._requests += 1
+        try:
+            result = await coroutine_fn()
+        except BaseException as e:
+            self._complete(self._async_calls, key, error=e)
+            raise
+        self._complete(self._async_calls, key, result=result)
+        return result
+
+    def _complete(self, calls, key, result=None, error=None):
+        with self._lock:
+            call = calls.pop(key)
+            waiters = call.waiters
+        call.finish(waiters, result, error)
+
+    def stats(self):
+        """Returns deduplication counters.
+
+        Returns:
+            dict: Number of requests sent and of callers that shared an in-flight request instead.
+        """
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'requests_saved': self._shared
+            }
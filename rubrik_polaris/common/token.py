@@ -0,0 +1,269 @@
+# Copyright 2020 Rubrik, Inc.
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+#  DEALINGS IN THE SOFTWARE.
+
+
+"""
+Access token lifetime tracking, proactive refresh and cross-process token cache.
+"""
+
+import base64
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+DEFAULT_TOKEN_LIFETIME = 3600
+DEFAULT_REFRESH_MARGIN = 300
+RETRY_REFRESH_DELAY = 30
+
+
+def _decode_token_expiry(token):
+    """ Return the expiry (epoch seconds) stored in the 'exp' claim of a JWT access
+    token, or None when the token is not a decodable JWT. The signature is not verified.
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode('ascii')))
+        return float(claims['exp'])
+    except Exception:
+        return None
+
+
+def token_cache_key(client_id, domain):
+    """ Build the on-disk cache key of a token from the client id (or username) and Polaris domain. """
+    return hashlib.sha256("{}@{}".format(client_id, domain).encode('utf-8')).hexdigest()
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """ Hold an exclusive advisory lock on `path` for the duration of the block. """
+    with open(path, 'a+') as lock_file:
+        if os.name == 'nt':
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == 'nt':
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class TokenFileCache:
+    """File-locked JSON store of access tokens shared by every process on a host.
+
+    Args:
+        path (str): Location of the cache file. It is created with owner-only permissions.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._lock_path = self.path + '.lock'
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.token_cache')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @contextlib.contextmanager
+    def locked(self):
+        """ Serialise access to the cache across threads and processes. """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        with _file_lock(self._lock_path):
+            yield
+
+    def get(self, key):
+        """ Return the (token, expires_at) tuple stored under `key`, or None. """
+        entry = self._read().get(key)
+        if not entry:
+            return None
+        return entry['token'], entry['expires_at']
+
+    def put(self, key, token, expires_at):
+        """ Store a token, dropping entries that already expired. """
+        now = time.time()
+        entries = {k: v for k, v in self._read().items() if v.get('expires_at', 0) > now}
+        entries[key] = {'token': token, 'expires_at': expires_at}
+        self._write(entries)
+
+    def delete(self, key, token=None):
+        """ Remove `key`, only if it still holds `token` when one is given. """
+        entries = self._read()
+        if key in entries and (token is None or entries[key]['token'] == token):
+            del entries[key]
+            self._write(entries)
+
+
+class TokenManager:
+    """Keeps a valid access token, refreshing it shortly before it expires.
+
+    The lifetime is read from the token itself when it is a JWT, and falls back to
+    `lifetime` seconds otherwise. When a file cache is given, tokens are shared by
+    every process using the same credentials and domain, so only the first one pays
+    the authentication round trip.
+
+    Args:
+        fetch (callable): Returns a new access token from Polaris.
+        logger (logging.Logger): Client logger.
+        lifetime (int): Fallback token lifetime in seconds when it cannot be decoded.
+        refresh_margin (int): Refresh the token this many seconds before it expires.
+        background_refresh (bool): Refresh on a daemon timer instead of on the next request.
+        cache (TokenFileCache): Optional cross-process token store.
+        cache_key (str): Key of the token in the cache, see `token_cache_key`.
+    """
+
+    def __init__(self, fetch, logger, lifetime=DEFAULT_TOKEN_LIFETIME, refresh_margin=DEFAULT_REFRESH_MARGIN,
+                 background_refresh=False, cache=None, cache_key=None):
+        self._fetch = fetch
+        self._logger = logger
+        self._lifetime = lifetime
+        self._refresh_margin = refresh_margin
+        self._background_refresh = background_refresh
+        self._cache = cache
+        self._cache_key = cache_key
+        self._lock = threading.RLock()
+        self._timer = None
+        self.token = None
+        self.expires_at = None
+        self._refresh_at = None
+
+    def set_token(self, token, expires_at=None):
+        """ Use `token` until `expires_at` (decoded from the token when not given). """
+        with self._lock:
+            self.token = token
+            if token and expires_at is None:
+                expires_at = _decode_token_expiry(token) or time.time() + self._lifetime
+            self.expires_at = expires_at if token else None
+            self._refresh_at = None
+            if self.expires_at is not None:
+                # Never refresh earlier than half way through the lifetime of short-lived tokens
+                remaining = max(self.expires_at - time.time(), 0)
+                self._refresh_at = self.expires_at - min(self._refresh_margin, remaining / 2)
+            self._schedule_refresh()
+
+    def needs_refresh(self):
+        """ Whether the current token is missing or within the refresh margin of its expiry. """
+        return not self.token or (self._refresh_at is not None and time.time() >= self._refresh_at)
+
+    def get_token(self):
+        """ Return a valid token, loading it from the cache or fetching a new one when needed. """
+        if not self.needs_refresh():
+            return self.token
+        with self._lock:
+            if not self.needs_refresh():
+                return self.token
+            return self._refresh(use_cache=True)
+
+    def refresh(self):
+        """ Fetch a new token from Polaris regardless of the current one. """
+        with self._lock:
+            return self._refresh(use_cache=False)
+
+    def invalidate(self):
+        """ Drop the current token, e.g. after Polaris rejected it. """
+        with self._lock:
+            if self._cache is not None and self.token:
+                with self._cache.locked():
+                    self._cache.delete(self._cache_key, self.token)
+            self.token = None
+            self.expires_at = None
+            self._refresh_at = None
+
+    def stop(self):
+        """ Cancel the background refresh timer. """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _refresh(self, use_cache):
+        if self._cache is None:
+            return self._fetch_and_set()
+
+        with self._cache.locked():
+            if use_cache:
+                cached = self._cache.get(self._cache_key)
+                if cached and time.time() < cached[1] - self._refresh_margin:
+                    self._logger.info("Retrieved access token from the token cache.")
+                    self.set_token(*cached)
+                    return self.token
+            token = self._fetch_and_set()
+            self._cache.put(self._cache_key, token, self.expires_at)
+            return token
+
+    def _fetch_and_set(self):
+        try:
+            token = self._fetch()
+        except Exception:
+            if self.token and self.expires_at is not None and time.time() < self.expires_at:
+                self._logger.warning("Failed to refresh the access token, using the current one until it expires.")
+                return self.token
+            raise
+        self.set_token(token)
+        return token
+
+    def _schedule_refresh(self):
+        if not self._background_refresh or self._refresh_at is None:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = max(self._refresh_at - time.time(), 0)
+        self._timer = threading.Timer(delay, self._background_tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_tick(self):
+        try:
+            self.get_token()
+        except Exception as e:
+            self._logger.error("Background access token refresh failed: {}".format(e))
+            with self._lock:
+                self._timer = threading.Timer(RETRY_REFRESH_DELAY, self._background_tick)
+                self._timer.daemon = True
+                self._timer.start()
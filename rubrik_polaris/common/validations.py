@@ -28,7 +28,8 @@ ERROR_MESSAGES = {
     'INVALID_FIELD_TYPE': "'{}' is an invalid value for '{}'. Value must be in {}.",
     'INVALID_INPUT': "{} is an invalid input type. Value must be str or list.",
     'INVALID_NUMBER': "'{}' is an invalid number.",
-    'INVALID_ID_FORMAT': "'{}' is an invalid value for '{}'. Please remove leading/trailing spaces."
+    'INVALID_ID_FORMAT': "'{}' is an invalid value for '{}'. Please remove leading/trailing spaces.",
+    'MISSING_VARIABLES': "Missing required variables of {}: {}."
 }
 
 
@@ -44,6 +45,16 @@ def _validate(self, **kwargs):
                     globals()['_' + validation + '_validation'](self, test_variable=kwargs[validation]))
 
 
+def _validate_required_variables(self, query_name, variables=None):
+    """ Raise a ValidationException when a non-null variable without default of `query_name` is not set. """
+    q = self._graphql_query_map[query_name]
+    variables = variables or {}
+    missing = [name for name, details in q.items()
+               if isinstance(details, dict) and details.get('required') and variables.get(name) is None]
+    if missing:
+        raise ValidationException(ERROR_MESSAGES['MISSING_VARIABLES'].format(query_name, ', '.join(missing)))
+
+
 def _mutation_name_validation(self, test_variable=None):
     if test_variable not in self._graphql_query_map:
         raise ValidationException("mutation_name not found : {}".format(test_variable))
@@ -38,16 +38,23 @@ def get_compute_object_ids_azure(self, match_all=True, **kwargs):
         RequestException: If the query to Polaris returned an error
     """
     try:
-        return self._get_compute_object_ids(self.get_compute_azure(), kwargs, match_all=match_all)
+        fields = self._object_ids_projection("compute_azure_iaas", kwargs)
+        return self._get_compute_object_ids(self.get_compute_azure(fields=fields), kwargs, match_all=match_all)
     except Exception:
         raise
 
 
-def get_compute_azure(self):
+def get_compute_azure(self, fields=None, stream=False, page_size=None, limit=None):
     """Retrieves all Azure IAAS object details
 
+    Args:
+        fields (list): optional fields to return, e.g. ['id', 'name']
+        stream (bool): optional return an iterator that fetches pages as it is read instead of a list
+        page_size (int): optional number of objects requested per page
+        limit (int): optional maximum number of objects to return
+
     Returns:
-        dict: details of Azure IAAS objects
+        list: details of Azure IAAS objects, of every page
 
     Raises:
         RequestException: If the query to Polaris returned an error
@@ -57,7 +64,8 @@ def get_compute_azure(self):
         self._validate(
             query_name=query_name
         )
-        return self._query(self.query_name, None)
+        return self._query_all(self.query_name, None, stream=stream, fields=fields, page_size=page_size,
+                               limit=limit)
     except Exception:
         raise
 
@@ -70,6 +78,7 @@ def submit_compute_restore_azure(self, snapshot_id, **kwargs):
         should_power_on (bool): Defaults to `False`
         should_restore_tags (bool): Defaults to `False`
         wait (bool): Return once complete Defaults to `False`
+        return_handle (bool): Return the JobHandle of the restore Defaults to `False`
 
     Returns:
         dict -- List of errors if any occurred during the restore
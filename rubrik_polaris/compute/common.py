@@ -21,6 +21,8 @@
 Collection of functions that manipulate compute components
 """
 
+from rubrik_polaris.exceptions import ValidationException
+
 
 def _get_compute_object_ids(self, instances, criterias, match_all=True):
     try:
@@ -40,6 +42,71 @@ def _get_compute_object_ids(self, instances, criterias, match_all=True):
         raise
 
 
+def _object_ids_projection(self, query_name, criterias):
+    """ Return the fields of `query_name` objects needed to match `criterias`, or None to request
+    whole objects when the criterias can't be projected (e.g. they aren't fields of the objects).
+    """
+    from rubrik_polaris.common.projection import _projected_query
+
+    fields = ['id'] + list(criterias)
+    try:
+        _projected_query(self, self._graphql_query_map[query_name], fields)
+    except ValidationException:
+        return None
+    return fields
+
+
+def _match_criterias(instance, criterias, match_all=True):
+    """ Whether an object matches all (or with `match_all` False, any but not all) of the criterias. Each
+    pair of a `tags` criteria, given in {Name: Value} format, counts as one criteria.
+    """
+    num_criteria = len(criterias)
+    if 'tags' in criterias:
+        num_criteria = num_criteria + len(criterias['tags']) - 1
+    num_unmatched_criteria = num_criteria
+    for key in criterias:
+        if key == 'tags' and 'tags' in instance:
+            for instance_tag in instance['tags']:
+                if instance_tag['key'] in criterias['tags'] and \
+                        instance_tag['value'] == criterias['tags'][instance_tag['key']]:
+                    num_unmatched_criteria -= 1
+        elif key in instance and instance[key] == criterias[key]:
+            num_unmatched_criteria -= 1
+    if match_all:
+        return num_unmatched_criteria == 0
+    return num_criteria > num_unmatched_criteria >= 1
+
+
+def _get_object_ids_filtered(self, query_name, criterias, match_all=True):
+    """ Return the ids of the objects of `query_name` that match `criterias`, evaluating the criterias that
+    the inventory filters support on the server (see pushdown.plan_pushdown) and the rest on the client.
+    """
+    from rubrik_polaris.common.pushdown import plan_pushdown
+
+    plan = plan_pushdown(query_name, criterias, match_all)
+    fields = self._object_ids_projection(query_name, plan.client_criterias)
+    variables = {"filters": plan.filters} if plan.filters else None
+    object_ids = []
+    for instance in self._query_paginated(query_name, variables, fields=fields):
+        if _match_criterias(instance, plan.client_criterias, match_all):
+            object_ids.append(instance['id'])
+    return object_ids
+
+
+def _explain_object_ids(self, query_name, criterias, match_all=True):
+    """ Describe where each criteria of an object id lookup of `query_name` is evaluated. """
+    from rubrik_polaris.common.pushdown import plan_pushdown
+
+    plan = plan_pushdown(query_name, criterias, match_all)
+    return {
+        "query_name": query_name,
+        "match_all": match_all,
+        "filters": plan.filters,
+        "criterias": plan.placement,
+        "fields": self._object_ids_projection(query_name, plan.client_criterias)
+    }
+
+
 def _submit_compute_restore(self, snapshot_id=None, mutation_name=None,  should_power_on=True, should_restore_tags=True, **kwargs):
     """Submits a Restore of a compute instance
 
@@ -49,6 +116,7 @@ def _submit_compute_restore(self, snapshot_id=None, mutation_name=None,  should_
         should_power_on {bool} -- Defaults to False
         should_restore_tags {bool} -- Defaults to False
         wait {bool} -- Return once complete Defaults to False
+        return_handle {bool} -- Return the JobHandle of the restore Defaults to False
     """
 
     self._validate(
@@ -67,8 +135,10 @@ def _submit_compute_restore(self, snapshot_id=None, mutation_name=None,  should_
         if 'errors' in result and result['errors']:
             return {'errors': result['errors'][0]['message']}
 
+        if kwargs.get('return_handle'):
+            return self._job_poller.submit(result)
         results = []
-        if 'wait' in kwargs:
+        if kwargs.get('wait'):
             results = self._monitor_task(result)
 
         return results
@@ -76,7 +146,7 @@ def _submit_compute_restore(self, snapshot_id=None, mutation_name=None,  should_
         raise
 
 
-def _submit_compute_export(self, mutation_name=None, variables=None, wait=False):
+def _submit_compute_export(self, mutation_name=None, variables=None, wait=False, return_handle=False):
     try:
 
         self._validate(
@@ -85,6 +155,8 @@ def _submit_compute_export(self, mutation_name=None, variables=None, wait=False)
         result = self._query(self.mutation_name, variables)
         if 'errors' in result and result['errors']:
             return {'errors': result['errors'][0]['message']}
+        if return_handle:
+            return self._job_poller.submit(result)
         results = []
         if wait:
             results = self._monitor_task(result)
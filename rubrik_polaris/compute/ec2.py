@@ -27,6 +27,9 @@ Collection of functions that manipulate EC2 compute components
 def get_compute_object_ids_ec2(self, match_all=True, **kwargs):
     """Retrieves all AWS EC2 object IDs that match query
 
+    When all criteria must match, `tags`, `region`, `instanceType`, `vpcId`, `isRelic`, `instanceName` and
+    `awsNativeAccount` are sent to Polaris as filters, see explain_compute_object_ids_ec2.
+
     Args:
         match_all (bool): Set to false to match ANY defined criteria
         tags (dict): Tags in {Name: Value} format to filter on
@@ -39,37 +42,41 @@ def get_compute_object_ids_ec2(self, match_all=True, **kwargs):
         RequestException: If the query to Polaris returned an error
     """
     try:
-        object_ids = []
-        num_criteria = len(kwargs)
-        if 'tags' in kwargs:
-            num_criteria = num_criteria + len(kwargs['tags']) - 1
-        for instance in self.get_compute_ec2():
-            num_unmatched_criteria = num_criteria
-            for key in kwargs:
-                if key == 'tags' and 'tags' in instance:
-                    for instance_tag in instance['tags']:
-                        if instance_tag['key'] in kwargs['tags'] and \
-                                instance_tag['value'] == kwargs['tags'][instance_tag['key']]:
-                            num_unmatched_criteria -= 1
-                elif key in instance and instance[key] == kwargs[key]:
-                    num_unmatched_criteria -= 1
-            if match_all and num_unmatched_criteria == 0:
-                object_ids.append(instance['id'])
-            elif not match_all and num_criteria > num_unmatched_criteria >= 1:
-                object_ids.append(instance['id'])
-        return object_ids
+        return self._get_object_ids_filtered("compute_aws_ec2", kwargs, match_all=match_all)
     except Exception:
         raise
 
 
-def get_compute_ec2(self, object_id=None):
+def explain_compute_object_ids_ec2(self, match_all=True, **kwargs):
+    """Describes how get_compute_object_ids_ec2 evaluates the given criteria, without querying Polaris
+
+    Args:
+        match_all (bool): Set to false to match ANY defined criteria
+        kwargs (str): The criteria of the get_compute_object_ids_ec2 call
+
+    Returns:
+        dict: The `filters` sent to Polaris, where each criteria runs (`server`, `server+client` when the filter
+        only narrows the results down, or `client`) and the `fields` requested
+
+    Examples:
+        >>> client.explain_compute_object_ids_ec2(region='US_EAST_1', vpcName='prod')['criterias']
+        {'region': 'server', 'vpcName': 'client'}
+    """
+    return self._explain_object_ids("compute_aws_ec2", kwargs, match_all=match_all)
+
+
+def get_compute_ec2(self, object_id=None, fields=None, stream=False, page_size=None, limit=None):
     """Retrieves all AWS EC2 object details
 
     Args:
         object_id (str): optional specific object id to return
+        fields (list): optional fields to return, e.g. ['id', 'tags', 'effectiveSlaDomain.name']
+        stream (bool): optional return an iterator that fetches pages as it is read instead of a list
+        page_size (int): optional number of objects requested per page
+        limit (int): optional maximum number of objects to return
 
     Returns:
-        dict: details of AWS instance objects
+        dict: details of the `object_id` instance, otherwise a list of the details of AWS instance objects
 
     Raises:
         RequestException: If the query to Polaris returned an error
@@ -83,13 +90,14 @@ def get_compute_ec2(self, object_id=None):
             variables = {
                 "object_id": object_id
             }
-            return self._query(self.query_name, variables)
+            return self._query(self.query_name, variables, fields=fields)
 
         query_name = "compute_aws_ec2"
         self._validate(
             query_name=query_name
         )
-        return self._query(self.query_name, None)
+        return self._query_all(self.query_name, None, stream=stream, fields=fields, page_size=page_size,
+                               limit=limit)
     except Exception:
         raise
 
@@ -102,6 +110,7 @@ def submit_compute_restore_ec2(self, snapshot_id, **kwargs):
         should_power_on (bool): Defaults to `False`
         should_restore_tags (bool): Defaults to `False`
         wait (bool): Return once complete Defaults to `False`
+        return_handle (bool): Return the JobHandle of the restore Defaults to `False`
 
     Returns:
         dict -- List of errors if any occurred during the restore
@@ -167,7 +176,8 @@ def _get_aws_region_vpcs(self, aws_region, aws_native_account_id):
 
 
 def submit_compute_export_ec2(self, snapshot_id=None, aws_account_number=None, aws_region=None, aws_vpc=None,
-                              aws_security_groups=None, aws_subnet=None, wait=False, aws_instance_type=None, aws_instance_name=None, copy_tags=True, use_replica=False):
+                              aws_security_groups=None, aws_subnet=None, wait=False, aws_instance_type=None, aws_instance_name=None, copy_tags=True, use_replica=False,
+                              return_handle=False):
     """Submits an export of a EC2 instance
 
     Args:
@@ -178,6 +188,7 @@ def submit_compute_export_ec2(self, snapshot_id=None, aws_account_number=None, a
         aws_security_groups (list): aws security groups to assign to export
         aws_subnet (str): aws subnet to assign to export
         wait (bool): Return once complete Defaults to False
+        return_handle (bool): Return the JobHandle of the export Defaults to False
 
     Returns:
         dict -- List of errors if any occurred during the export
@@ -214,5 +225,6 @@ def submit_compute_export_ec2(self, snapshot_id=None, aws_account_number=None, a
         # "kms_key_id":
     }
 
-    result = self._submit_compute_export(self, mutation_name=self.mutation_name, variables=variables, wait=wait)
+    result = self._submit_compute_export(mutation_name=self.mutation_name, variables=variables, wait=wait,
+                                         return_handle=return_handle)
     return result
@@ -38,16 +38,23 @@ def get_compute_object_ids_gce(self, match_all=True, **kwargs):
         RequestException: If the query to Polaris returned an error
     """
     try:
-        return self._get_compute_object_ids(self.get_compute_gce(), kwargs, match_all=match_all)
+        fields = self._object_ids_projection("compute_gcp_gce", kwargs)
+        return self._get_compute_object_ids(self.get_compute_gce(fields=fields), kwargs, match_all=match_all)
     except Exception:
         raise
 
 
-def get_compute_gce(self):
+def get_compute_gce(self, fields=None, stream=False, page_size=None, limit=None):
     """Retrieves all GCP GCE object details
 
+    Args:
+        fields (list): optional fields to return, e.g. ['id', 'name']
+        stream (bool): optional return an iterator that fetches pages as it is read instead of a list
+        page_size (int): optional number of objects requested per page
+        limit (int): optional maximum number of objects to return
+
     Returns:
-        dict: details of GCP GCE objects
+        list: details of GCP GCE objects, of every page
 
     Raises:
         RequestException: If the query to Polaris returned an error
@@ -57,7 +64,8 @@ def get_compute_gce(self):
         self._validate(
             query_name=query_name
         )
-        return self._query(self.query_name, None)
+        return self._query_all(self.query_name, None, stream=stream, fields=fields, page_size=page_size,
+                               limit=limit)
     except Exception:
         raise
 
@@ -70,8 +78,9 @@ def submit_compute_restore_gce(self, snapshot_id, **kwargs):
         should_power_on (bool): Defaults to `False`
         should_restore_tags (bool): Defaults to `False`
         wait (bool): Return once complete Defaults to `False`
+        return_handle (bool): Return the JobHandle of the restore Defaults to `False`
 
     Returns:
         dict -- List of errors if any occurred during the restore
     """
-    return self._submit_compute_restore(snapshot_id=snapshot_id, mutation_name="compute_restore_gce")
\ No newline at end of file
+    return self._submit_compute_restore(snapshot_id=snapshot_id, mutation_name="compute_restore_gce", **kwargs)
\ No newline at end of file
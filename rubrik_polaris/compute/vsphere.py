@@ -29,19 +29,26 @@ def get_compute_object_ids_vsphere(self, match_all=True, **kwargs):
 
     Arguments:
         match_all {bool} -- Set to false to match ANY defined criteria
-        kwargs {} -- Any top level object from the get_compute_ec2 call
+        kwargs {} -- Any top level object from the get_compute_vsphere call
     """
     try:
-        return self._get_object_ids_instances(self.get_instances_vsphere(), kwargs, match_all=match_all)
+        fields = self._object_ids_projection("compute_vmware_vsphere", kwargs)
+        return self._get_compute_object_ids(self.get_compute_vsphere(fields=fields), kwargs, match_all=match_all)
     except Exception:
         raise
 
 
-def get_compute_vsphere(self):
+def get_compute_vsphere(self, fields=None, stream=False, page_size=None, limit=None):
     """Retrieves all VMware VM object details (Under development)
 
+    Args:
+        fields (list): optional fields to return, e.g. ['id', 'name']
+        stream (bool): optional return an iterator that fetches pages as it is read instead of a list
+        page_size (int): optional number of objects requested per page
+        limit (int): optional maximum number of objects to return
+
     Returns:
-        dict: details of VMware VM objects
+        list: details of VMware VM objects, of every page
 
     Raises:
         RequestException: If the query to Polaris returned an error
@@ -52,6 +59,6 @@ def get_compute_vsphere(self):
         #     query_name=query_name
         # )
         variables = {"filter": [], "first": 500}
-        return self._query(query_name, variables)
+        return self._query_all(query_name, variables, stream=stream, fields=fields, page_size=page_size, limit=limit)
     except Exception:
         raise
\ No newline at end of file
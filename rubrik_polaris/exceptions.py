@@ -25,8 +25,19 @@ class PolarisException(Exception):
 
 
 class RequestException(PolarisException):
-    """Exceptions during requests, e.g. connection, timeout, HTTP errors."""
-    pass
+    """Exceptions during requests, e.g. connection, timeout, HTTP errors.
+
+    Args:
+        status_code (int): HTTP status of the response, if one was received.
+        error_code (int): Code reported in the GraphQL error `extensions.code` or response body.
+        retry_after (str): Value of the Retry-After response header, if any.
+    """
+
+    def __init__(self, *args, status_code=None, error_code=None, retry_after=None):
+        super().__init__(*args)
+        self.status_code = status_code
+        self.error_code = error_code
+        self.retry_after = retry_after
 
 
 class ValidationException(PolarisException):
@@ -42,3 +53,8 @@ class AuthenticationException(RequestException):
 class ProxyException(RequestException):
     """Exception during proxy call"""
     pass
+
+
+class PersistedQueryException(RequestException):
+    """Exception when Polaris doesn't know or doesn't support the hash of a persisted query"""
+    pass
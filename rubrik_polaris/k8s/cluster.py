@@ -83,12 +83,13 @@ def create_k8s_cluster(
         raise PolarisException("Failed to create cluster: {}".format(e))
 
 
-def refresh_k8s_cluster(self, kupr_cluster_id, wait=False):
+def refresh_k8s_cluster(self, kupr_cluster_id, wait=False, return_handle=False):
     """Refresh resources of a Kubernetes cluster.
 
     Args:
         kupr_cluster_id (uuid): The ID of the kupr cluster to be refreshed.
         wait (bool): Wait for taskchain completion before return
+        return_handle (bool): Return the JobHandle of the refresh taskchain
 
     Returns:
         dict: Details of the refresh job
@@ -106,6 +107,8 @@ def refresh_k8s_cluster(self, kupr_cluster_id, wait=False):
             "kupr_cluster_id": self.kupr_cluster_id
         }
         _response = self._query(self.mutation_name, _variables)
+        if return_handle:
+            return self._job_poller.submit({'taskchainUuid': _response.get('taskchainId')})
         if wait:
             return self._monitor_task({'taskchainUuid': _response.get('taskchainId')})
         return _response
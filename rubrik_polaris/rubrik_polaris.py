@@ -23,9 +23,30 @@ import pprint
 import urllib3
 import re
 import json
+import threading
 import logging
-from .exceptions import RequestException
+from .exceptions import RequestException, AuthenticationException
 from .logger import logging_setup
+from .common.session import ConnectionPool, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+from .common.connection import DEFAULT_READ_TIMEOUT
+from .common.token import TokenManager, TokenFileCache, token_cache_key, DEFAULT_TOKEN_LIFETIME, \
+    DEFAULT_REFRESH_MARGIN
+
+from .common.retry import RetryPolicy, RetryStats
+from .common.ratelimit import get_shared_rate_limiter
+from .common.decoding import get_json_loads, _import_ijson
+from .common.batch import DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL
+from .common.singleflight import SingleFlight
+from .common.cache import ResponseCache
+from .common.lazy import lazy_methods
+from .common.persisted import PersistedQueries
+from .common.prefetch import PrefetchStats
+from .common.checkpoint import CheckpointStore
+from .common.jobs import JobPoller
+from .common.monitor import DEFAULT_MONITOR_INTERVAL, DEFAULT_MONITOR_MAX_INTERVAL, DEFAULT_MONITOR_BACKOFF, \
+    DEFAULT_MONITOR_BATCH_SIZE
+
+DEFAULT_TOKEN_CACHE_PATH = os.path.join('~', '.rubrik_polaris', 'token_cache.json')
 
 """Instantiates Polaris connection context
 Args:
@@ -35,72 +56,118 @@ Args:
     root_domain (str): Polaris root domain only if not *.my.rubrik.com
     insecure (bool): Allow unverified SSL keys
     json_keyfile (str): Service account credential file (used exclusive of first 4 options.
+    pool_connections (int): Number of per-host connection pools to keep (default 10)
+    pool_maxsize (int): Maximum number of keep-alive connections per host (default 10)
+    pool_block (bool): Block when all pooled connections are busy instead of opening more
+    keep_alive (bool): Reuse connections between requests (default True)
+    connect_timeout (float): Seconds to wait for a connection to be established
+    read_timeout (float): Default seconds to wait for a response (default 60)
+    token_refresh_margin (int): Refresh the access token this many seconds before it expires (default 300)
+    token_lifetime (int): Assumed access token lifetime in seconds when it cannot be decoded (default 3600)
+    token_background_refresh (bool): Refresh the access token on a background timer (default False)
+    token_cache (str or bool): Share access tokens between processes through this file, or True for
+        ~/.rubrik_polaris/token_cache.json (default disabled)
+    max_retries (int): Number of times a transient request failure is retried (default 2)
+    retry_policy (RetryPolicy): Custom retry policy, takes precedence over max_retries
+    rate_limiter (RateLimiter or bool): Shape requests with this adaptive rate limiter, which can be shared by
+        several clients, or True for the process-wide limiter (default disabled)
+    json_backend (str): Decode responses with 'orjson', 'ujson', 'json', or 'auto' for the fastest one installed
+        (default: the decoder of requests)
+    stream_pages (bool): Yield the entries of paginated queries while each page is still being received, keeping
+        one entry in memory at a time. Requires the optional 'ijson' package (default False)
+    prefetch_pages (int): Number of pages of paginated queries fetched on a background thread ahead of the entries
+        being read, 0 to fetch each page when the previous one has been read (default 0)
+    adaptive_page_size (bool): Tune the page size of paginated queries from the latency, size and timeouts of their
+        pages, starting from the requested page size, and remember it per operation for the process (default False)
+    page_size_bounds (dict): Smallest and largest adaptive page size by query name, e.g.
+        {'core_report_data': (100, 5000)} (default 10 and 1000)
+    monitor_interval (float): Seconds between the first two polls of a taskchain waited for (default 1)
+    monitor_max_interval (float): Upper bound in seconds of the delay between two polls of a taskchain, which grows
+        by `monitor_backoff` after every poll (default 30)
+    monitor_backoff (float): Factor the delay between two polls of a taskchain grows by (default 1.5)
+    monitor_batch_size (int): Maximum number of taskchain statuses requested per poll (default 100)
+    monitor_max_in_flight (int): Maximum number of taskchains polled at the same time (default no limit)
+    checkpoint_store (CheckpointStore or str): Commit the cursor of every page of paginated queries to this SQLite
+        store (or file), so that they can be resumed with `resume=True` (default disabled)
+    deduplicate_queries (bool): Let identical read queries in flight at the same time share one request
+        (default True)
+    response_cache (ResponseCache or bool): Cache read-only query responses in this cache, which can be shared by
+        several clients, or True for a cache with the default TTLs (default disabled)
+    batch_size (int): Maximum number of requests combined into one batched GraphQL document (default 25)
+    batch_flush_interval (float): Seconds a QueryBatcher waits for more requests before sending a partial batch
+        (default 0.05)
+    persisted_queries (bool): Send the SHA-256 hash of GraphQL documents instead of their text, falling back to
+        the full document when Polaris doesn't know the hash yet (default False)
 Returns:
     object: Polaris connection context
 Raises:
     RequestException: If the query to Polaris returned an error
 """
-class PolarisClient:
+@lazy_methods(
     # Public
-    from .common.core import get_sla_domains, submit_on_demand, submit_assign_sla, get_task_status, \
-        get_snapshots, get_event_series_list, get_report_data, get_polaris_version
-    from .accounts.aws import get_accounts_aws, get_accounts_aws_detail, get_account_aws_native_id, add_account_aws, \
-        delete_account_aws
-    from .accounts.azure import get_accounts_azure_native, add_account_azure, delete_account_azure, \
-        set_account_azure_default_sa, get_accounts_azure_cloud
-    from .accounts.gcp import get_accounts_gcp, add_project_gcp, delete_project_gcp, \
-        get_account_gcp_default_sa, set_account_gcp_default_sa
-    from .compute.ec2 import get_compute_object_ids_ec2, get_compute_ec2, submit_compute_export_ec2, \
-        submit_compute_restore_ec2
-    from .compute.azurevm import get_compute_object_ids_azure, get_compute_azure, submit_compute_restore_azure
-    from .compute.gce import get_compute_object_ids_gce, get_compute_gce, submit_compute_restore_gce
-    from .compute.vsphere import get_compute_vsphere, get_compute_object_ids_vsphere
-    from .storage.ebs import get_storage_object_ids_ebs, get_storage_ebs
-    from .common.graphql import get_enum_values
-    from .cluster import get_cdm_cluster_location, get_cdm_cluster_connection_status
-    from .appflows import get_appflows_blueprints
-    from .common.validations import check_first_arg, to_boolean, validate_id, check_enum
-    from .common.object import list_vm_objects, search_object, get_object_metadata, get_object_snapshot
-    from .sonar.policy import list_policy_analyzer_groups, list_policies
-    from .sonar.scan import trigger_on_demand_scan, get_on_demand_scan_status, get_on_demand_scan_result
-    from .sonar.object import get_sensitive_hits_object_list, get_sensitive_hits_object_detail, get_sensitive_hits
-    from .radar.csv import get_csv_result
-    from .sonar.csv import get_csv_download, get_csv_result_download
-    from .gps.files import get_snapshot_files, request_download_snapshot_files
-    from .gps.vm import create_vm_snapshot, create_vm_livemount, create_vm_livemount_v2, list_vsphere_hosts, export_vm_snapshot, \
-        list_vsphere_datastores, get_async_request_result, recover_vsphere_vm_files
-    from .gps.sla import list_sla_domains
-    from .gps.cluster import list_clusters
-    from .radar.anomaly import get_analysis_status
-    from .radar.ioc import trigger_ioc_scan, get_ioc_scan_list, get_ioc_scan_result
-    from .common.core import list_event_series
-    from .common.object import list_objects
-    from .common.object import list_object_snapshots
-    from .k8s.cluster import create_k8s_cluster, refresh_k8s_cluster, list_k8s_clusters, get_k8s_status
-    from .k8s.namespace import get_k8s_namespaces, get_k8s_namespace
-
+    ('.common.core', 'get_sla_domains', 'submit_on_demand', 'submit_assign_sla', 'get_task_status', 'get_snapshots',
+     'get_event_series_list', 'get_report_data', 'get_polaris_version'),
+    ('.accounts.aws', 'get_accounts_aws', 'get_accounts_aws_detail', 'get_account_aws_native_id', 'add_account_aws',
+     'delete_account_aws'),
+    ('.accounts.azure', 'get_accounts_azure_native', 'add_account_azure', 'delete_account_azure',
+     'set_account_azure_default_sa', 'get_accounts_azure_cloud'),
+    ('.accounts.gcp', 'get_accounts_gcp', 'add_project_gcp', 'delete_project_gcp', 'get_account_gcp_default_sa',
+     'set_account_gcp_default_sa'),
+    ('.compute.ec2', 'get_compute_object_ids_ec2', 'explain_compute_object_ids_ec2', 'get_compute_ec2',
+     'submit_compute_export_ec2', 'submit_compute_restore_ec2'),
+    ('.compute.azurevm', 'get_compute_object_ids_azure', 'get_compute_azure', 'submit_compute_restore_azure'),
+    ('.compute.gce', 'get_compute_object_ids_gce', 'get_compute_gce', 'submit_compute_restore_gce'),
+    ('.compute.vsphere', 'get_compute_vsphere', 'get_compute_object_ids_vsphere'),
+    ('.storage.ebs', 'get_storage_object_ids_ebs', 'explain_storage_object_ids_ebs', 'get_storage_ebs'),
+    ('.common.graphql', 'get_enum_values'),
+    ('.cluster', 'get_cdm_cluster_location', 'get_cdm_cluster_connection_status'),
+    ('.appflows', 'get_appflows_blueprints'),
+    ('.common.validations', 'check_first_arg', 'to_boolean', 'validate_id', 'check_enum'),
+    ('.common.object', 'list_vm_objects', 'search_object', 'get_object_metadata', 'get_object_snapshot'),
+    ('.sonar.policy', 'list_policy_analyzer_groups', 'list_policies'),
+    ('.sonar.scan', 'trigger_on_demand_scan', 'get_on_demand_scan_status', 'get_on_demand_scan_result'),
+    ('.sonar.object', 'get_sensitive_hits_object_list', 'get_sensitive_hits_object_detail', 'get_sensitive_hits'),
+    ('.radar.csv', 'get_csv_result'),
+    ('.sonar.csv', 'get_csv_download', 'get_csv_result_download'),
+    ('.gps.files', 'get_snapshot_files', 'request_download_snapshot_files'),
+    ('.gps.vm', 'create_vm_snapshot', 'create_vm_livemount', 'create_vm_livemount_v2', 'list_vsphere_hosts',
+     'export_vm_snapshot', 'list_vsphere_datastores', 'get_async_request_result', 'recover_vsphere_vm_files'),
+    ('.gps.sla', 'list_sla_domains'),
+    ('.gps.cluster', 'list_clusters'),
+    ('.radar.anomaly', 'get_analysis_status'),
+    ('.radar.ioc', 'trigger_ioc_scan', 'get_ioc_scan_list', 'get_ioc_scan_result'),
+    ('.common.core', 'list_event_series'),
+    ('.common.object', 'list_objects', 'list_object_snapshots'),
+    ('.k8s.cluster', 'create_k8s_cluster', 'refresh_k8s_cluster', 'list_k8s_clusters', 'get_k8s_status'),
+    ('.k8s.namespace', 'get_k8s_namespaces', 'get_k8s_namespace'),
+    ('.common.connection', 'get_connection_stats', 'get_retry_stats', 'get_rate_limit_stats',
+     'get_deduplication_stats', 'get_cache_stats', 'get_persisted_query_stats', 'get_prefetch_stats',
+     'get_page_size_stats'),
+    ('.common.jobs', 'wait_for_jobs', 'get_job_stats'),
+    ('.common.bulk', 'submit_on_demand_bulk', 'reconcile_sla_assignments', 'resolve_snapshots'),
     # Private
-    from .common.connection import _query, _query_paginated, _query_raw, _named_raw_query, _get_access_token_basic, _get_access_token_keyfile
-    from .common.validations import _validate
-    from .compute.ec2 import _get_aws_region_vpcs, _get_aws_region_kmskeys, _get_aws_region_sshkeypairs
-    from .compute.common import _submit_compute_restore, _get_compute_object_ids, _submit_compute_export
-    from .common.monitor import _monitor_job, _monitor_threader, _monitor_task
-    from .common.graphql import _dump_nodes, _get_details_from_graphql_query
-    from .common.core import _get_snapshot
-    from .common.user import get_user_downloads
-    from .accounts.aws import _invoke_account_delete_aws, _invoke_aws_stack, _commit_account_delete_aws, \
-        _update_account_aws, \
-        _destroy_aws_stack, _disable_account_aws, _get_aws_profiles, _add_account_aws, _delete_account_aws, \
-        _update_account_aws_initiate, _get_account_map_aws
-    from .accounts.gcp import _get_gcp_native_project, _delete_account_gcp_project, \
-        _disable_account_gcp_project, _get_account_gcp_project, _get_account_gcp_permissions_cnp, \
-        _get_account_gcp_project_uuid_by_string
-    from .accounts.azure import _get_native_subscription_id_and_name, _get_accounts_azure_permission_version
-    from .common.connection import _get_access_token_keyfile, _get_access_token_basic
-
+    ('.common.connection', '_query', '_query_paginated', '_query_all', '_query_raw', '_named_raw_query',
+     '_get_access_token_basic', '_get_access_token_keyfile', '_rate_limited'),
+    ('.common.batch', '_query_batch'),
+    ('.common.validations', '_validate', '_validate_required_variables'),
+    ('.compute.ec2', '_get_aws_region_vpcs', '_get_aws_region_kmskeys', '_get_aws_region_sshkeypairs'),
+    ('.compute.common', '_submit_compute_restore', '_get_compute_object_ids', '_object_ids_projection',
+     '_get_object_ids_filtered', '_explain_object_ids', '_submit_compute_export'),
+    ('.common.monitor', '_monitor_task', '_monitor_options'),
+    ('.common.graphql', '_dump_nodes', '_get_details_from_graphql_query'),
+    ('.common.core', '_get_snapshot'),
+    ('.common.user', 'get_user_downloads'),
+    ('.accounts.aws', '_invoke_account_delete_aws', '_invoke_aws_stack', '_commit_account_delete_aws',
+     '_update_account_aws', '_destroy_aws_stack', '_disable_account_aws', '_get_aws_profiles', '_add_account_aws',
+     '_delete_account_aws', '_update_account_aws_initiate', '_get_account_map_aws'),
+    ('.accounts.gcp', '_get_gcp_native_project', '_delete_account_gcp_project', '_disable_account_gcp_project',
+     '_get_account_gcp_project', '_get_account_gcp_permissions_cnp', '_get_account_gcp_project_uuid_by_string'),
+    ('.accounts.azure', '_get_native_subscription_id_and_name', '_get_accounts_azure_permission_version'),
+)
+class PolarisClient:
     def __init__(self, domain=None, username=None, password=None, json_keyfile=None,
                  logging_handler=logging.NullHandler(), logging_level=logging.WARNING, **kwargs):
-        from .common.graphql import _build_graphql_maps
+        from .common.graphql import _build_graphql_maps, _operation_name, GRAPHQL_SOURCE_PATH
 
         self._pp = pprint.PrettyPrinter(indent=4)
 
@@ -114,6 +181,48 @@ class PolarisClient:
         self._proxies = kwargs.get('proxies')
         self._json_data = kwargs.get('json_data')
         self._json_keyfile = json_keyfile
+        self._connect_timeout = kwargs.get('connect_timeout')
+        self._read_timeout = kwargs.get('read_timeout', DEFAULT_READ_TIMEOUT)
+        self._session_pool = ConnectionPool(
+            pool_connections=kwargs.get('pool_connections', DEFAULT_POOL_CONNECTIONS),
+            pool_maxsize=kwargs.get('pool_maxsize', DEFAULT_POOL_MAXSIZE),
+            pool_block=kwargs.get('pool_block', False),
+            keep_alive=kwargs.get('keep_alive', True)
+        )
+        self._retry_policy = kwargs.get('retry_policy') or RetryPolicy(max_attempts=kwargs.get('max_retries', 2) + 1)
+        self._retry_stats = RetryStats()
+        self._rate_limiter = kwargs.get('rate_limiter') or None
+        if self._rate_limiter is True:
+            self._rate_limiter = get_shared_rate_limiter()
+        self._json_loads = get_json_loads(kwargs['json_backend']) if kwargs.get('json_backend') else None
+        self._stream_pages = kwargs.get('stream_pages', False)
+        if self._stream_pages:
+            _import_ijson()
+        self._prefetch_pages = kwargs.get('prefetch_pages', 0)
+        self._prefetch_stats = PrefetchStats()
+        self._adaptive_page_size = kwargs.get('adaptive_page_size', False)
+        self._page_size_bounds = kwargs.get('page_size_bounds') or {}
+        self._monitor_interval = kwargs.get('monitor_interval', DEFAULT_MONITOR_INTERVAL)
+        self._monitor_max_interval = kwargs.get('monitor_max_interval', DEFAULT_MONITOR_MAX_INTERVAL)
+        self._monitor_backoff = kwargs.get('monitor_backoff', DEFAULT_MONITOR_BACKOFF)
+        self._monitor_batch_size = kwargs.get('monitor_batch_size', DEFAULT_MONITOR_BATCH_SIZE)
+        self._monitor_max_in_flight = kwargs.get('monitor_max_in_flight')
+        self._job_poller = JobPoller(self, **self._monitor_options())
+        # Stores opened by the client, by path, closed with the client
+        self._checkpoint_stores = {}
+        self._checkpoint_stores_lock = threading.Lock()
+        self._checkpoint_store = kwargs.get('checkpoint_store')
+        if isinstance(self._checkpoint_store, str):
+            self._checkpoint_store = self._checkpoint_stores[self._checkpoint_store] = \
+                CheckpointStore(self._checkpoint_store)
+        self._single_flight = SingleFlight() if kwargs.get('deduplicate_queries', True) else None
+        self._response_cache = kwargs.get('response_cache') or None
+        if self._response_cache is True:
+            self._response_cache = ResponseCache()
+        self._batch_size = kwargs.get('batch_size', DEFAULT_BATCH_SIZE)
+        self._enum_values = {}
+        self._batch_flush_interval = kwargs.get('batch_flush_interval', DEFAULT_FLUSH_INTERVAL)
+        self._persisted_queries = PersistedQueries(enabled=kwargs.get('persisted_queries', False))
 
         if (not self._domain or not self._username or not self._password) and not json_keyfile \
                 and not self._json_data:
@@ -123,7 +232,7 @@ class PolarisClient:
 
         # Set base variables
         self._kwargs = kwargs
-        self._data_path = "{}/graphql/".format(os.path.dirname(os.path.realpath(__file__)))
+        self._data_path = GRAPHQL_SOURCE_PATH
 
         # Switch off SSL checks if needed
         if 'insecure' in self._kwargs and self._kwargs['insecure']:
@@ -136,21 +245,24 @@ class PolarisClient:
             self._baseurl = "https://{}.my.rubrik.com/api".format(self._domain)
 
         try:
-            self._access_token = None
             self._user_agent = self._kwargs.get('user_agent')
             self._headers = {}
+            self._json_key = None
 
             if self._json_keyfile:
                 with open(self._json_keyfile) as f:
-                    json_key = json.load(f)
-                self._baseurl = re.sub(r"/client_token", "", json_key['access_token_uri'])
+                    self._json_key = json.load(f)
+                self._baseurl = re.sub(r"/client_token", "", self._json_key['access_token_uri'])
 
             elif self._json_data:
-                json_data = json.loads(self._json_data)
-                self._baseurl = re.sub(r"/client_token", "", json_data['access_token_uri'])
+                self._json_key = json.loads(self._json_data)
+                self._baseurl = re.sub(r"/client_token", "", self._json_key['access_token_uri'])
+
+            self._token_manager = self._build_token_manager()
 
             # Get graphql content
             (self._graphql_query_map) = _build_graphql_maps(self)
+            self._query_names = {_operation_name(name): name for name in self._graphql_query_map}
 
         except RequestException as err:
             raise
@@ -160,6 +272,44 @@ class PolarisClient:
             self.logger.error(e)
             raise
 
+    def _build_token_manager(self):
+        cache = None
+        cache_key = None
+        cache_path = self._kwargs.get('token_cache')
+        if cache_path:
+            if cache_path is True:
+                cache_path = DEFAULT_TOKEN_CACHE_PATH
+            cache = TokenFileCache(cache_path)
+            client_id = self._json_key['client_id'] if self._json_key else self._username
+            cache_key = token_cache_key(client_id, self._baseurl)
+
+        credentials = None
+        if not self._json_key:
+            # Only the token manager keeps the username and password, to log in again whenever the token expires
+            credentials = (self._username, self._password)
+            del (self._username, self._password)
+
+        return TokenManager(
+            fetch=lambda: self._fetch_access_token(credentials),
+            logger=self.logger,
+            lifetime=self._kwargs.get('token_lifetime', DEFAULT_TOKEN_LIFETIME),
+            refresh_margin=self._kwargs.get('token_refresh_margin', DEFAULT_REFRESH_MARGIN),
+            background_refresh=self._kwargs.get('token_background_refresh', False),
+            cache=cache,
+            cache_key=cache_key
+        )
+
+    @property
+    def _access_token(self):
+        return self._token_manager.token
+
+    @_access_token.setter
+    def _access_token(self, token):
+        if token:
+            self._token_manager.set_token(token)
+        else:
+            self._token_manager.invalidate()
+
     @staticmethod
     def _get_cred(env_key, override=None):
         cred = None
@@ -173,23 +323,43 @@ class PolarisClient:
         return cred
 
     def authenticate(self):
-        if self._json_keyfile:
-            with open(self._json_keyfile) as f:
-                json_key = json.load(f)
-            self._access_token = self._get_access_token_keyfile(json_key=json_key)
-            self.logger.info("Retrieved access token using json key file.")
-
-        elif self._json_data:
-            json_data = json.loads(self._json_data)
-            self._access_token = self._get_access_token_keyfile(json_key=json_data)
-            self.logger.info("Retrieved access token using json data.")
-
-        elif self._username and self._password:
-            self._access_token = self._get_access_token_basic()
-            del (self._username, self._password)
+        """Retrieves a new access token from Polaris.
+
+        Returns:
+            str: The access token
+        """
+        return self._token_manager.refresh()
+
+    def _fetch_access_token(self, credentials=None):
+        with self._rate_limited('auth'):
+            return self._request_access_token(credentials)
+
+    def _request_access_token(self, credentials=None):
+        if self._json_key:
+            access_token = self._get_access_token_keyfile(json_key=self._json_key)
+            self.logger.info("Retrieved access token using json %s.", "key file" if self._json_keyfile else "data")
+
+        elif credentials and all(credentials):
+            access_token = self._get_access_token_basic(*credentials)
             self.logger.info("Retrieved access token using username and password.")
 
-        return self._access_token
+        else:
+            raise AuthenticationException("Unable to retrieve a new access token, no credentials are available.")
+
+        return access_token
+
+    def close(self):
+        """Closes the pooled HTTP connections of the client and the checkpoint stores it opened, stops the token
+        refresh timer and the job poller, and saves the response cache when it is persisted."""
+        self._token_manager.stop()
+        self._job_poller.close()
+        with self._checkpoint_stores_lock:
+            for store in self._checkpoint_stores.values():
+                store.close()
+            self._checkpoint_stores.clear()
+        if self._response_cache is not None:
+            self._response_cache.save()
+        self._session_pool.close()
 
     def prepare_headers(self):
         if self._user_agent:
@@ -197,9 +367,6 @@ class PolarisClient:
         self._headers['Content-Type'] = 'application/json'
         self._headers['Accept'] = 'application/json'
 
-        if self._access_token:
-            self._headers['Authorization'] = 'Bearer ' + self._access_token
-        else:
-            self._headers['Authorization'] = 'Bearer ' + self.authenticate()
+        self._headers['Authorization'] = 'Bearer ' + self._token_manager.get_token()
 
         return self._headers
@@ -27,6 +27,9 @@ Collection of functions that manipulate storage components.
 def get_storage_object_ids_ebs(self, match_all=True, **kwargs):
     """Retrieves ObjectIds for EBS Snappables from Polaris
 
+    When all criteria must match, `tags`, `region`, `volumeType`, `isRelic`, `volumeName` and `awsNativeAccount`
+    are sent to Polaris as filters, see explain_storage_object_ids_ebs.
+
     Args:
         match_all (bool): Set to False to match ANY defined criteria
         tags (dict): Optional allows simple qualification of tags
@@ -47,38 +50,40 @@ def get_storage_object_ids_ebs(self, match_all=True, **kwargs):
     """
 
     try:
-        object_ids = []
-
-        for volume in self.get_storage_ebs():
-            num_criteria = len(kwargs)
-            if 'tags' in kwargs:
-                num_criteria = num_criteria + len(kwargs['tags']) - 1
-            num_unmatched_criteria = num_criteria
-
-            for key in kwargs:
-                if key == 'tags' and 'tags' in volume:
-                    for volume_tag in volume['tags']:
-                        if volume_tag['key'] in kwargs['tags'] and \
-                           volume_tag['value'] == kwargs['tags'][volume_tag['key']]:
-                            num_unmatched_criteria -= 1
-                elif key in volume and volume[key] == kwargs[key]:
-                    num_unmatched_criteria -= 1
-            if match_all and num_unmatched_criteria == 0:
-                object_ids.append(volume['id'])
-            elif not match_all and num_criteria > num_unmatched_criteria >= 1:
-                object_ids.append(volume['id'])
-        return object_ids
+        return self._get_object_ids_filtered("storage_aws_ebs", kwargs, match_all=match_all)
     except Exception:
         raise
 
 
-def get_storage_ebs(self):
+def explain_storage_object_ids_ebs(self, match_all=True, **kwargs):
+    """Describes how get_storage_object_ids_ebs evaluates the given criteria, without querying Polaris
+
+    Args:
+        match_all (bool): Set to False to match ANY defined criteria
+        kwargs (dict): The criteria of the get_storage_object_ids_ebs call
+
+    Returns:
+        dict: The `filters` sent to Polaris, where each criteria runs (`server`, `server+client` when the filter
+        only narrows the results down, or `client`) and the `fields` requested
+
+    Examples:
+        >>> client.explain_storage_object_ids_ebs(tags={"Environment": "staging"})['criterias']
+        {'tags': 'server+client'}
+    """
+    return self._explain_object_ids("storage_aws_ebs", kwargs, match_all=match_all)
+
+
+def get_storage_ebs(self, fields=None, stream=False, page_size=None, limit=None):
     """Retrieves details for all EBS Snappables from Polaris
 
     Args:
+        fields (list): Optional fields to return, e.g. ['id', 'volumeName', 'tags']
+        stream (bool): Optional return an iterator that fetches pages as it is read instead of a list
+        page_size (int): Optional number of objects requested per page
+        limit (int): Optional maximum number of objects to return
 
     Returns:
-        dict: Dictionary of all EBS Snappable details
+        list: All EBS Snappable details, of every page
 
     Raises:
         RequestException: If the query to Polaris returned an error
@@ -88,6 +93,6 @@ def get_storage_ebs(self):
     """
     try:
         query_name = "storage_aws_ebs"
-        return self._query(query_name, None)
+        return self._query_all(query_name, None, stream=stream, fields=fields, page_size=page_size, limit=limit)
     except Exception:
         raise
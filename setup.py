@@ -3,6 +3,7 @@ from datetime import datetime
 from glob import glob
 
 import setuptools
+from setuptools.command.build_py import build_py
 
 
 name = 'Rubrik Polaris SDK for Python'
@@ -20,6 +21,20 @@ with open(path.join(this_directory, 'README.md'), encoding='utf-8') as f:
     long_description = f.read()
 
 
+class BuildPyWithOperationIndex(build_py):
+    """Compiles the .graphql operations into the index loaded by PolarisClient at startup."""
+
+    def run(self):
+        super().run()
+        import sys
+        sys.path.insert(0, this_directory)
+        from rubrik_polaris.common.graphql import write_operation_index
+        write_operation_index(
+            path.join(this_directory, 'rubrik_polaris', 'common', 'graphql'),
+            path.join(self.build_lib, 'rubrik_polaris', 'common', 'graphql_index.json')
+        )
+
+
 setuptools.setup(
     name=name,
     version=version,
@@ -52,7 +67,15 @@ setuptools.setup(
         'pyasn1<0.5.0,>=0.4.6',
         'httplib2 <1dev, >=0.15.0'
     ],
+    extras_require={
+        'async': ['aiohttp'],
+        'fast-json': ['orjson'],
+        'streaming': ['ijson >= 3.1']
+    },
     include_package_data=True,
+    package_data={
+        'rubrik_polaris': ['common/enum_table.json', 'common/field_table.json']
+    },
     data_files = [
         ('rubrik_polaris/graphql', glob('rubrik_polaris/common/graphql/*'))
     ],
@@ -60,6 +83,9 @@ setuptools.setup(
         'pytest'
     ],
     zip_safe=False,
+    cmdclass={
+        'build_py': BuildPyWithOperationIndex
+    },
     command_options={
         'build_sphinx': {
             'project': ('setup.py', name),
@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from rubrik_polaris.async_rubrik_polaris import AsyncPolarisClient
+from rubrik_polaris.exceptions import RequestException, ValidationException
+
+
+def run_with_server(handler, scenario):
+    """Run an async scenario against a local GraphQL endpoint served by the given handler."""
+    async def main():
+        app = web.Application()
+        app.router.add_post("/api/graphql", handler)
+        async with TestServer(app) as server:
+            client = AsyncPolarisClient(domain="rubrik-se-beta", username="dummy_username",
+                                        password="dummy_password", insecure=True)
+            client._baseurl = str(server.make_url("/api"))
+            client._access_token = "dummy"
+            async with client:
+                return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_aquery_when_valid_values_are_provided():
+    """ Test case scenario when concurrent awaitable queries are issued """
+    seen = []
+
+    async def handler(request):
+        body = await request.json()
+        seen.append(body['operationName'])
+        return web.json_response({"data": {"slaDomains": {"edges": [{"node": {"name": "Gold", "id": "1"}}]}}})
+
+    async def scenario(client):
+        return await asyncio.gather(*[client._aquery("core_sla_list", {"filter": [], "first": i}) for i in range(5)])
+
+    responses = run_with_server(handler, scenario)
+    assert responses == [[{"name": "Gold", "id": "1"}]] * 5
+    assert seen == ["SdkPythonCoreSlaList"] * 5
+
+
+def test_aquery_paginated_when_multiple_pages_are_returned():
+    """ Test case scenario when the paginated response spans several pages """
+    async def handler(request):
+        body = await request.json()
+        after = body['variables'].get('after')
+        page = {
+            None: {"edges": [{"node": {"name": "a"}}], "pageInfo": {"endCursor": "c1", "hasNextPage": True}},
+            "c1": {"edges": [{"node": {"name": "b"}}], "pageInfo": {"endCursor": "c2", "hasNextPage": False}},
+        }[after]
+        return web.json_response({"data": {"snappableConnection": page}})
+
+    async def scenario(client):
+        return [node async for node in client._aquery_paginated("core_report_data", {"first": 1})]
+
+    assert run_with_server(handler, scenario) == [{"name": "a"}, {"name": "b"}]
+
+
+def test_aquery_when_error_is_returned():
+    """ Test case scenario when Polaris responds with a GraphQL error """
+    async def handler(request):
+        return web.json_response({"errors": [{"message": "boom", "extensions": {"code": 403, "trace": {}}}]})
+
+    async def scenario(client):
+        with pytest.raises(RequestException):
+            await client._aquery("gps_clusters")
+        with pytest.raises(ValidationException):
+            await client._aquery("unknown_query")
+
+    run_with_server(handler, scenario)
+
+
+def test_aquery_identical_concurrent_queries_share_a_request():
+    """ Test case scenario when identical awaitable queries are in flight at the same time """
+    seen = []
+
+    async def handler(request):
+        seen.append((await request.json())['operationName'])
+        await asyncio.sleep(0.05)
+        return web.json_response({"data": {"slaDomains": {"edges": [{"node": {"name": "Gold", "id": "1"}}]}}})
+
+    async def scenario(client):
+        responses = await asyncio.gather(*[client._aquery("core_sla_list", {"filter": []}) for _ in range(5)])
+        return responses, client.get_deduplication_stats()
+
+    responses, stats = run_with_server(handler, scenario)
+    assert responses == [[{"name": "Gold", "id": "1"}]] * 5
+    assert len({id(response) for response in responses}) == 5
+    assert seen == ["SdkPythonCoreSlaList"]
+    assert stats == {"requests": 1, "requests_saved": 4}
+
+
+def test_aquery_persisted_query_not_found():
+    """ Test case scenario when the hash of an awaitable query is unknown and the document is registered """
+    seen = []
+
+    async def handler(request):
+        body = await request.json()
+        seen.append("query" in body)
+        if "query" not in body and len(seen) == 1:
+            return web.json_response({"errors": [{"message": "PersistedQueryNotFound"}]})
+        return web.json_response({"data": {"slaDomains": {"edges": [{"node": {"name": "Gold", "id": "1"}}]}}})
+
+    async def scenario(client):
+        client._persisted_queries.enabled = True
+        await client._aquery("core_sla_list", {"filter": []})
+        await client._aquery("core_sla_list", {"filter": [], "first": 1})
+        return client.get_persisted_query_stats()["SdkPythonCoreSlaList"]
+
+    stats = run_with_server(handler, scenario)
+    assert seen == [False, True, False]
+    assert (stats["persisted_hits"], stats["persisted_misses"]) == (1, 1)
+
+
+def test_aquery_token_is_renewed_when_rejected():
+    """ Test case scenario when Polaris rejects the access token with 401 """
+    tokens = []
+
+    async def session(request):
+        tokens.append("renewed")
+        return web.json_response({"access_token": "renewed"})
+
+    async def handler(request):
+        if request.headers["Authorization"] != "Bearer renewed":
+            return web.json_response({"code": 401, "message": "expired"}, status=401)
+        return web.json_response({"data": {"clusterConnection": {"edges": [{"node": {"id": "1"}}]}}})
+
+    async def main():
+        app = web.Application()
+        app.router.add_post("/api/graphql", handler)
+        app.router.add_post("/api/session", session)
+        async with TestServer(app) as server:
+            client = AsyncPolarisClient(domain="rubrik-se-beta", username="dummy_username",
+                                        password="dummy_password", insecure=True)
+            client._baseurl = str(server.make_url("/api"))
+            client._access_token = "revoked"
+            async with client:
+                return await client._aquery("gps_clusters")
+
+    assert asyncio.run(main()) == [{"id": "1"}]
+    assert tokens == ["renewed"]
@@ -0,0 +1,89 @@
+import re
+
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.common.batch import QueryBatcher, _NotBatchable, build_batch_document
+from rubrik_polaris.exceptions import RequestException
+
+
+def taskchain_handler(request, context):
+    """ Answer every aliased taskchain field of a batch, failing the ids starting with 'bad' """
+    body = request.json()
+    data, errors = {}, []
+    aliases = re.findall(r'(b\d+_)getKorgTaskchainStatus', body['query']) or ['']
+    for alias in aliases:
+        task_id = body['variables']['{}filter'.format(alias)]
+        key = '{}getKorgTaskchainStatus'.format(alias)
+        if task_id.startswith('bad'):
+            data[key] = None
+            errors.append({"message": "not found", "path": [key], "extensions": {"code": 404, "trace": {}}})
+        else:
+            data[key] = {"taskchain": {"id": task_id, "state": "SUCCEEDED"}}
+    return {"data": data, "errors": errors} if errors else {"data": data}
+
+
+def test_build_batch_document(client):
+    """ Tests that variables and top-level fields are prefixed and fragments are defined once """
+    query_text = client._graphql_query_map['gps_clusters']['query_text']
+
+    document = build_batch_document([query_text, query_text])
+
+    assert document.startswith("query SdkPythonBatch($b0_first:Int$b0_after:String")
+    assert "b0_clusterConnection:clusterConnection(" in document
+    assert "b1_clusterConnection:clusterConnection(" in document
+    assert "first:$b1_first" in document
+    assert document.count("fragment ClusterListFragment on Cluster") == 1
+
+
+
+def test_build_batch_document_renames_nested_variables():
+    """ Tests that variables are renamed in nested arguments and directives, and in no other place """
+    query_text = 'query Q($ids: [UUID!], $full: Boolean) { objects(filter: {ids: [$ids]}) @include(if: $full) ' \
+                 '{ name(format: "$ids") } }'
+
+    document = build_batch_document([query_text, query_text])
+
+    assert "b1_objects:objects(filter:{ids:[$b1_ids]})@include(if:$b1_full)" in document
+    assert 'name(format:"$ids")' in document
+    with pytest.raises(_NotBatchable):
+        build_batch_document(['query Q($id: UUID) { object { ...F } } fragment F on Object { child(id: $id) }'])
+
+def test_get_task_status_in_batch(requests_mock, client):
+    """ Tests that several task statuses are retrieved with a single request and errors are kept per task """
+    requests_mock.post(BASE_URL + "/graphql", json=taskchain_handler)
+
+    statuses = client.get_task_status(["t1", "bad1", "t2"])
+
+    assert statuses == {"t1": {"id": "t1", "state": "SUCCEEDED"}, "bad1": "FAILED",
+                        "t2": {"id": "t2", "state": "SUCCEEDED"}}
+    graphql_requests = [r for r in requests_mock.request_history if r.url.endswith("/graphql")]
+    assert len(graphql_requests) == 1
+    assert graphql_requests[0].json()["operationName"] == "SdkPythonBatch"
+
+
+def test_query_batch_splits_batches_and_raises(requests_mock, client):
+    """ Tests that calls are chunked by batch size and that the first failure is raised """
+    requests_mock.post(BASE_URL + "/graphql", json=taskchain_handler)
+    calls = [("core_taskchain_status", {"filter": i}) for i in ("t1", "t2", "t3", "bad")]
+
+    with pytest.raises(RequestException):
+        client._query_batch(calls, batch_size=2)
+
+    results = client._query_batch(calls, batch_size=3, return_exceptions=True)
+    assert [r["taskchain"]["id"] for r in results[:3]] == ["t1", "t2", "t3"]
+    assert isinstance(results[3], RequestException)
+    assert len([r for r in requests_mock.request_history if r.url.endswith("/graphql")]) == 4
+
+
+def test_query_batcher(requests_mock, client):
+    """ Tests that queries submitted to a batcher are sent together and resolved through futures """
+    requests_mock.post(BASE_URL + "/graphql", json=taskchain_handler)
+
+    with QueryBatcher(client, batch_size=2, flush_interval=10) as batcher:
+        futures = [batcher.submit("core_taskchain_status", {"filter": i}) for i in ("t1", "t2", "bad")]
+        assert futures[0].result(timeout=5)["taskchain"]["id"] == "t1"
+        batcher.flush()
+        assert futures[1].result()["taskchain"]["id"] == "t2"
+        assert isinstance(futures[2].exception(), RequestException)
+
+    assert len([r for r in requests_mock.request_history if r.url.endswith("/graphql")]) == 2
@@ -0,0 +1,89 @@
+import re
+
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.exceptions import ValidationException
+
+
+def on_demand_handler(max_objects=None, failing=(), states=None):
+    """ Answer on demand snapshot mutations with a taskchain per object, 413 when a chunk has more than
+    `max_objects` objects and 500 when it holds a `failing` object, and taskchain status batches from `states`
+    """
+    def handler(request, context):
+        body = request.json()
+        if 'takeOnDemandSnapshot' not in body['query']:
+            data = {}
+            for alias in re.findall(r'(b\d+_)getKorgTaskchainStatus', body['query']) or ['']:
+                task_id = body['variables']['{}filter'.format(alias)]
+                data['{}getKorgTaskchainStatus'.format(alias)] = {"taskchain": {"id": task_id, "state": states[task_id]}}
+            return {"data": data}
+        object_ids = body['variables']['objectIds']
+        if max_objects is not None and len(object_ids) > max_objects:
+            context.status_code = 413
+            return {"message": "Request Entity Too Large"}
+        if any(i in failing for i in object_ids):
+            context.status_code = 500
+            return {"message": "Internal Server Error"}
+        return {"data": {"takeOnDemandSnapshot": {
+            "taskchainUuids": [{"workloadId": i, "taskchainUuid": "t" + i} for i in object_ids if i != "7"],
+            "errors": [{"workloadId": i, "error": "Object not found"} for i in object_ids if i == "7"]
+        }}}
+    return handler
+
+
+def sent_chunks(requests_mock):
+    return [r.json()["variables"]["objectIds"] for r in requests_mock.request_history
+            if r.url.endswith("/graphql") and "takeOnDemandSnapshot" in r.json()["query"]]
+
+
+def test_submit_on_demand_bulk_merges_chunks(requests_mock, client):
+    """ Tests that objects are sent in chunks, and that their taskchains and errors are merged in order """
+    requests_mock.post(BASE_URL + "/graphql", json=on_demand_handler())
+    object_ids = [str(i) for i in range(10)]
+
+    result = client.submit_on_demand_bulk(object_ids, "sla", chunk_size=4, max_workers=2)
+
+    assert sorted(map(len, sent_chunks(requests_mock))) == [2, 4, 4]
+    assert [t["workloadId"] for t in result["taskchainUuids"]] == [i for i in object_ids if i != "7"]
+    assert result["errors"] == [{"workloadId": "7", "error": "Object not found"}]
+    assert result["requests"] == 3
+
+
+def test_submit_on_demand_bulk_splits_too_large_chunks(requests_mock, client):
+    """ Tests that chunks rejected with 413 are split and that the following chunks are cut smaller """
+    requests_mock.post(BASE_URL + "/graphql", json=on_demand_handler(max_objects=3))
+    object_ids = [str(i) for i in range(20)]
+
+    result = client.submit_on_demand_bulk(object_ids, "sla", chunk_size=8, max_workers=1)
+
+    chunks = sent_chunks(requests_mock)
+    assert list(map(len, chunks)) == [8, 4, 2, 2, 4, 2, 2] + [2] * 6
+    assert len(result["taskchainUuids"]) == 19 and [e["workloadId"] for e in result["errors"]] == ["7"]
+    assert result["requests"] == len(chunks)
+
+
+def test_submit_on_demand_bulk_failed_chunk_only_fails_its_objects(requests_mock, client):
+    requests_mock.post(BASE_URL + "/graphql", json=on_demand_handler(failing=("5",)))
+
+    result = client.submit_on_demand_bulk([str(i) for i in range(9)], "sla", chunk_size=3, max_workers=3)
+
+    assert [t["workloadId"] for t in result["taskchainUuids"]] == ["0", "1", "2", "6", "8"]
+    assert [e["workloadId"] for e in result["errors"]] == ["3", "4", "5", "7"]
+
+
+def test_submit_on_demand_bulk_waits_for_all_taskchains_together(requests_mock, client):
+    """ Tests that the taskchains of every chunk are polled in one batch """
+    states = {"t{}".format(i): "SUCCEEDED" for i in range(6)}
+    requests_mock.post(BASE_URL + "/graphql", json=on_demand_handler(states=states))
+
+    result = client.submit_on_demand_bulk([str(i) for i in range(6)], "sla", chunk_size=2, wait=True)
+
+    polls = [r for r in requests_mock.request_history
+             if r.url.endswith("/graphql") and "getKorgTaskchainStatus" in r.json()["query"]]
+    assert len(polls) == 1
+    assert [t["status"] for t in result["taskchainUuids"]] == ["SUCCEEDED"] * 6
+
+
+def test_submit_on_demand_bulk_validates_options(client):
+    with pytest.raises(ValidationException):
+        client.submit_on_demand_bulk(["1"], "sla", chunk_size=0)
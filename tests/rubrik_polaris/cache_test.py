@@ -0,0 +1,86 @@
+from conftest import BASE_URL
+from rubrik_polaris.common.cache import ResponseCache
+
+SLA_RESPONSE = {"data": {"slaDomains": {"edges": [{"node": {"name": "Gold", "id": "1"}}]}}}
+SCOPE = BASE_URL
+
+
+def graphql_requests(requests_mock):
+    return [r for r in requests_mock.request_history if r.url.endswith("/graphql")]
+
+
+def test_query_responses_are_cached(requests_mock, client):
+    """ Tests that a read query with a TTL is only sent once and that cached values are copies """
+    client._response_cache = ResponseCache()
+    requests_mock.post(BASE_URL + "/graphql", json=SLA_RESPONSE)
+
+    first = client._query("core_sla_list", {"filter": []})
+    first[0]["name"] = "modified"
+    second = client._query("core_sla_list", {"filter": []})
+
+    assert second == [{"name": "Gold", "id": "1"}]
+    assert len(graphql_requests(requests_mock)) == 1
+    assert client.get_cache_stats() == {"hits": 1, "misses": 1, "evictions": 0, "invalidations": 0, "entries": 1}
+
+    client._query("core_sla_list", {"filter": [{"field": "NAME", "text": "Gold"}]})
+    assert len(graphql_requests(requests_mock)) == 2
+
+
+def test_mutation_invalidates_query_families(requests_mock, client):
+    """ Tests that a mutation drops the cached responses it makes stale """
+    client._response_cache = ResponseCache()
+    requests_mock.post(BASE_URL + "/graphql", json=SLA_RESPONSE)
+    client._query("core_sla_list", {"filter": []})
+    client._query("gps_clusters")
+
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"assignSla": {"success": True}}})
+    client._query("core_sla_assign", {"globalSlaAssignType": "protectWithSlaId", "globalSlaOptionalFid": "1",
+                                      "objectIds": ["2"]})
+
+    assert client.get_cache_stats()["invalidations"] == 1
+    assert client.get_cache_stats()["entries"] == 1
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    """ Tests that the least recently used entry is evicted and expired entries are missed """
+    now = [1000.0]
+    monkeypatch.setattr("rubrik_polaris.common.cache.time.time", lambda: now[0])
+    cache = ResponseCache(ttls={"q": 10}, max_entries=2)
+
+    cache.put(SCOPE, "q", {"a": 1}, "one")
+    cache.put(SCOPE, "q", {"a": 2}, "two")
+    assert cache.get(SCOPE, "q", {"a": 1}) == (True, "one")
+    cache.put(SCOPE, "q", {"a": 3}, "three")
+    assert cache.get(SCOPE, "q", {"a": 2}) == (False, None)
+
+    now[0] += 11
+    assert cache.get(SCOPE, "q", {"a": 1}) == (False, None)
+    cache.put(SCOPE, "not_cached", {}, "value")
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 1, "invalidations": 0, "entries": 1}
+
+
+def test_cache_persistence(tmp_path):
+    """ Tests that fresh entries are saved to and loaded from the cache file """
+    path = str(tmp_path / "cache.json")
+    cache = ResponseCache(path=path)
+    cache.put(SCOPE, "gps_clusters", {"first": 1}, {"data": {"clusterConnection": {"nodes": []}}})
+    cache.save()
+
+    assert ResponseCache(path=path).get(SCOPE, "gps_clusters", {"first": 1}) == \
+        (True, {"data": {"clusterConnection": {"nodes": []}}})
+
+
+def test_batched_mutation_invalidates_query_families(requests_mock, client):
+    """ Tests that a batch of mutations drops the cached responses it makes stale """
+    client._response_cache = ResponseCache()
+    requests_mock.post(BASE_URL + "/graphql", json=SLA_RESPONSE)
+    client._query("core_sla_list", {"filter": []})
+
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"b0_assignSla": {"success": True},
+                                                             "b1_assignSla": {"success": True}}})
+    client._query_batch([("core_sla_assign", {"globalSlaAssignType": "protectWithSlaId",
+                                              "globalSlaOptionalFid": "1", "objectIds": [object_id]})
+                         for object_id in ("2", "3")])
+
+    assert client.get_cache_stats()["invalidations"] == 1
+    assert client.get_cache_stats()["entries"] == 0
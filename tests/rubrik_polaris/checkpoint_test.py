@@ -0,0 +1,105 @@
+import pytest
+
+from conftest import BASE_URL
+from rubrik_polaris.common.checkpoint import CheckpointStore, variables_hash
+from rubrik_polaris.exceptions import ValidationException
+from rubrik_polaris.rubrik_polaris import PolarisClient
+
+VARIABLES = {"first": 2, "filters": {"objectType": []}}
+
+
+def report_pages(*pages):
+    return [{"json": {"data": {"snappableConnection": {
+        "edges": [{"node": {"id": name}} for name in names],
+        "pageInfo": {"endCursor": "c{}".format(number), "hasNextPage": number < len(pages)}}}}}
+        for number, names in enumerate(pages, 1)]
+
+
+def export_key(client):
+    return variables_hash(VARIABLES, client._baseurl, client._graphql_query_map["core_report_data"]["query_text"])
+
+
+def test_checkpoint_store(tmp_path):
+    """ Tests that checkpoints are committed, reloaded from the file and cleared """
+    path = str(tmp_path / "checkpoints.db")
+    store = CheckpointStore(path)
+    store.commit("core_report_data", "h", "c1", 2)
+    store.commit("core_report_data", "h", "c2", 4)
+    store.close()
+
+    store = CheckpointStore(path)
+    assert store.load("core_report_data", "h") == ("c2", 4)
+    assert [c["rows"] for c in store.list()] == [4]
+    store.clear("core_report_data")
+    assert store.load("core_report_data", "h") is None
+
+
+def test_variables_hash_ignores_cursor_and_page_size():
+    """ Tests that pages of one export share the variables hash """
+    assert variables_hash({"filters": {"a": 1}, "first": 10, "after": "c1"}) == variables_hash({"filters": {"a": 1}})
+    assert variables_hash({"filters": {"a": 1}}) != variables_hash({"filters": {"a": 2}})
+    assert variables_hash({}, "https://a.my.rubrik.com/api") != variables_hash({}, "https://b.my.rubrik.com/api")
+    assert variables_hash({}, query_text="query{a}") != variables_hash({}, query_text="query{b}")
+
+
+def test_query_paginated_commits_and_resumes(requests_mock, client):
+    """ Tests that a failed export resumes after its last fully read page """
+    store = CheckpointStore(":memory:")
+    requests_mock.post(BASE_URL + "/graphql", report_pages(["1", "2"], ["3", "4"]))
+
+    rows = client._query_paginated("core_report_data", VARIABLES, checkpoint=store)
+    assert [next(rows)["id"] for _ in range(3)] == ["1", "2", "3"]
+    rows.close()
+    assert store.load("core_report_data", export_key(client)) == ("c1", 2)
+
+    requests_mock.post(BASE_URL + "/graphql", report_pages(["3", "4"]))
+    resumed = list(client._query_paginated("core_report_data", VARIABLES, checkpoint=store, resume=True))
+
+    assert [row["id"] for row in resumed] == ["3", "4"]
+    assert requests_mock.last_request.json()["variables"]["after"] == "c1"
+    assert store.load("core_report_data", export_key(client)) is None
+
+
+def test_query_paginated_resume_without_checkpoint(requests_mock, client):
+    """ Tests that resuming requires a checkpoint store, and starts over when nothing was committed """
+    with pytest.raises(ValidationException):
+        list(client._query_paginated("core_report_data", VARIABLES, resume=True))
+
+    requests_mock.post(BASE_URL + "/graphql", report_pages(["1"]))
+    assert list(client.get_report_data(checkpoint=CheckpointStore(":memory:"), resume=True)) == [{"id": "1"}]
+    assert "after" not in requests_mock.last_request.json()["variables"]
+
+
+def test_checkpoint_store_path_is_opened_once(requests_mock, client, tmp_path):
+    """ Tests that a store given by path is shared by the queries of a client and closed with it """
+    path = str(tmp_path / "checkpoints.db")
+    requests_mock.post(BASE_URL + "/graphql", report_pages(["1", "2"]))
+
+    list(client._query_paginated("core_report_data", VARIABLES, checkpoint=path))
+    list(client._query_paginated("core_report_data", VARIABLES, checkpoint=path))
+
+    store, = client._checkpoint_stores.values()
+    client.close()
+    assert client._checkpoint_stores == {}
+    with pytest.raises(Exception, match="closed"):
+        store.list()
+
+
+def test_tenants_sharing_a_store_resume_their_own_exports(requests_mock, client):
+    """ Tests that the checkpoint of an export of one tenant isn't resumed by another tenant """
+    store = CheckpointStore(":memory:")
+    requests_mock.post(BASE_URL + "/graphql", report_pages(["1", "2"], ["3", "4"]))
+    rows = client._query_paginated("core_report_data", VARIABLES, checkpoint=store)
+    assert [next(rows)["id"] for _ in range(3)] == ["1", "2", "3"]
+    rows.close()
+
+    other_url = "https://other-tenant.my.rubrik.com/api"
+    requests_mock.post(other_url + "/session", json={"access_token": "dummy"})
+    requests_mock.post(other_url + "/graphql", report_pages(["a", "b"]))
+    other = PolarisClient(domain="other-tenant", username="dummy_username", password="dummy_password", insecure=True)
+    resumed = list(other._query_paginated("core_report_data", VARIABLES, checkpoint=store, resume=True))
+
+    assert [row["id"] for row in resumed] == ["a", "b"]
+    assert "after" not in requests_mock.last_request.json()["variables"]
+    assert store.load("core_report_data", export_key(client)) == ("c1", 2)
+    other.close()
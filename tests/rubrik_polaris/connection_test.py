@@ -26,3 +26,23 @@ def test_query_raw_when_valid_values_are_provided(requests_mock, client):
     response = _query_raw(client, raw_query=raw_query, operation_name=None, variables={}, timeout=60)
 
     assert response == expected_response
+
+
+def test_query_raw_uses_pooled_session_and_configured_timeouts(requests_mock):
+    """ Test case scenario when connection pool and timeouts are configured on the client """
+    from rubrik_polaris.rubrik_polaris import PolarisClient
+
+    requests_mock.post(BASE_URL + "/session", json={"access_token": "dummy"})
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {}})
+    client = PolarisClient(domain="rubrik-se-beta", username="dummy_username", password="dummy_password",
+                           insecure=True, pool_maxsize=4, connect_timeout=5, read_timeout=30)
+
+    client._query_raw(raw_query=None, operation_name=None, variables={})
+    assert requests_mock.last_request.timeout == (5, 30)
+
+    client._query_raw(raw_query=None, operation_name=None, variables={}, timeout=90)
+    assert requests_mock.last_request.timeout == (5, 90)
+
+    stats = client.get_connection_stats()
+    assert stats['requests'] == 3
+    assert stats['connections_reused'] == stats['requests'] - stats['connections_opened']
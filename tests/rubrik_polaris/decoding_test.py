@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.common.decoding import get_json_loads, iter_streamed_nodes
+from rubrik_polaris.exceptions import PolarisException, RequestException, ValidationException
+
+
+def pages(*pages):
+    return [{"json": {"data": {"snappableConnection": page}}} for page in pages]
+
+
+def test_iter_streamed_nodes_yields_edges_and_keeps_page_info():
+    """ Tests that edge nodes are yielded one by one and the rest of the response is kept """
+    body = {"data": {"snappableConnection": {
+        "edges": [{"cursor": "x", "node": {"name": "a", "tags": [{"k": 1.5}]}}, {"node": None}, {"node": {"name": "b"}}],
+        "pageInfo": {"endCursor": "c1", "hasNextPage": True}}}}
+    response = {}
+
+    nodes = list(iter_streamed_nodes(io.BytesIO(json.dumps(body).encode()), response))
+
+    assert nodes == [{"name": "a", "tags": [{"k": 1.5}]}, None, {"name": "b"}]
+    assert response == {"data": {"snappableConnection": {"pageInfo": {"endCursor": "c1", "hasNextPage": True}}},
+                        "streamed": True}
+
+
+def test_iter_streamed_nodes_without_edges():
+    """ Tests that responses without edges are collected as a whole """
+    body = {"data": {"taskchain": {"state": "RUNNING"}}}
+    response = {}
+
+    assert not list(iter_streamed_nodes(io.BytesIO(json.dumps(body).encode()), response))
+    assert response == {"data": {"taskchain": {"state": "RUNNING"}}, "streamed": False}
+
+
+def test_query_paginated_with_stream_pages(requests_mock, client):
+    """ Tests that streamed pages are followed through their pageInfo """
+    client._stream_pages = True
+    requests_mock.post(BASE_URL + "/graphql", pages(
+        {"edges": [{"node": {"name": "a"}}], "pageInfo": {"endCursor": "c1", "hasNextPage": True}},
+        {"edges": [{"node": {"name": "b"}}], "pageInfo": {"endCursor": "c2", "hasNextPage": False}}))
+
+    assert list(client._query_paginated("core_report_data", {"first": 1})) == [{"name": "a"}, {"name": "b"}]
+    assert requests_mock.request_history[-1].json()["variables"]["after"] == "c1"
+
+
+def test_query_paginated_with_stream_pages_raises_errors(requests_mock, client):
+    """ Tests that GraphQL errors of a streamed response are raised """
+    error = {"errors": [{"message": "forbidden", "extensions": {"code": 403, "trace": {}}}], "data": None}
+    requests_mock.post(BASE_URL + "/graphql", json=error)
+
+    with pytest.raises(RequestException):
+        list(client._query_paginated("core_report_data", {"first": 1}, stream_pages=True))
+
+
+def test_query_paginated_with_stream_pages_rejects_prefetch_and_adaptive(client):
+    """ Tests that prefetching or resizing streamed pages is refused instead of silently ignored """
+    for option in ({"prefetch": 2}, {"adaptive": True}):
+        with pytest.raises(ValidationException, match=list(option)[0]):
+            list(client._query_paginated("core_report_data", {"first": 1}, stream_pages=True, **option))
+
+
+def test_json_backend(requests_mock, client):
+    """ Tests decoding with an alternative JSON backend """
+    client._json_loads = get_json_loads('auto')
+    requests_mock.post(BASE_URL + "/graphql", pages({"edges": [{"node": {"name": "a"}}]}))
+
+    assert client._query("core_report_data", {"first": 1}) == [{"name": "a"}]
+    with pytest.raises(PolarisException):
+        get_json_loads('simplejson')
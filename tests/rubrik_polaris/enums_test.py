@@ -0,0 +1,44 @@
+from conftest import BASE_URL
+from rubrik_polaris.common.enums import parse_enums, load_enum_table
+
+
+def test_parse_enums():
+    """ Tests that enum values are parsed without their descriptions and deprecated values """
+    schema = '''
+type Query {
+  sortOrder: SortOrder
+}
+"Sort order."
+enum SortOrder {
+    "Ascending."
+    ASC
+    """
+    Descending.
+    """
+    DESC
+    OLD @deprecated(reason: "Use DESC.")
+}
+enum Empty {
+}
+'''
+    assert parse_enums(schema) == {"SortOrder": ["ASC", "DESC"], "Empty": []}
+
+
+def test_get_enum_values_from_enum_table(requests_mock, client):
+    """ Tests that enums of the bundled schema are answered without a request """
+    requests_mock.post(BASE_URL + "/graphql", json={})
+
+    assert client.get_enum_values("SortOrder") == ["ASC", "DESC"]
+    assert len(load_enum_table()) > 500
+    assert not [r for r in requests_mock.request_history if r.url.endswith("/graphql")]
+
+
+def test_get_enum_values_falls_back_to_introspection(requests_mock, client):
+    """ Tests that unknown enums are introspected once per client """
+    requests_mock.post(BASE_URL + "/graphql",
+                       json={"data": {"__type": {"states": [{"name": "Critical"}, {"name": "Info"}]}}})
+
+    assert client.get_enum_values("EventSeverity") == ["Critical", "Info"]
+    client.get_enum_values("EventSeverity").append("modified")
+    assert client.get_enum_values("EventSeverity") == ["Critical", "Info"]
+    assert len([r for r in requests_mock.request_history if r.url.endswith("/graphql")]) == 1
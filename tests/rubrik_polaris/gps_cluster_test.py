@@ -25,9 +25,11 @@ def test_list_clusters_when_valid_values_are_provided(requests_mock, client):
     (-10, None, None, None, None, validations.ERROR_MESSAGES['INVALID_FIRST'].format(-10)),
     ("x", None, None, None, None, validations.ERROR_MESSAGES['INVALID_NUMBER'].format("x")),
     (10, None, None, "Name", None,
-     ERROR_MESSAGES['INVALID_FIELD_TYPE'].format("Name", "sort_by", ['RegisteredAt', 'ClusterName', 'ClusterType'])),
+     ERROR_MESSAGES['INVALID_FIELD_TYPE'].format("Name", "sort_by", ['CLUSTER_LOCATION', 'ClusterName', 'ClusterType',
+                                                                       'ESTIMATED_RUNWAY', 'INSTALLED_VERSION',
+                                                                       'RegisteredAt'])),
     (10, None, None, "ClusterName", "BOTH",
-     ERROR_MESSAGES['INVALID_FIELD_TYPE'].format("BOTH", "sort_order", ['Asc', 'Desc']))
+     ERROR_MESSAGES['INVALID_FIELD_TYPE'].format("BOTH", "sort_order", ['ASC', 'DESC']))
 ])
 def test_list_clusters_when_invalid_values_are_provided(client, requests_mock, after, first, filters, sort_by,
                                                         sort_order, err_msg):
@@ -36,19 +38,6 @@ def test_list_clusters_when_invalid_values_are_provided(client, requests_mock, a
     """
     from rubrik_polaris.gps.cluster import list_clusters
 
-    enum_sort_by = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/list_clusters_sort_by_values.json")
-    )
-    enum_sort_order = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/list_clusters_sort_order_values.json")
-    )
-    responses = [
-        {'json': enum_sort_by},
-        {'json': enum_sort_order},
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
-
     with pytest.raises(ValueError) as e:
         list_clusters(client, after=after, first=first, filters=filters, sort_by=sort_by, sort_order=sort_order)
 
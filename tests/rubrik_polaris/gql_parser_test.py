@@ -0,0 +1,102 @@
+import pytest
+
+from conftest import BASE_URL
+from rubrik_polaris.common.gql_parser import parse, type_to_string, find_page_path, Field, FragmentSpread, \
+    InlineFragment
+from rubrik_polaris.exceptions import ValidationException
+
+DOCUMENT = '''
+# Comment
+query RubrikPolarisSDKRequest(
+    $ids: [[UUID!]!]!, $name: String = "a \\"b\\"", $filter: Filter = {names: ["x", "y"], deep: {on: true}}
+    $first: Int = 10
+) {
+  items: objects(ids: $ids, filter: $filter, first: $first, note: """block "quoted" text""") @include(if: true) {
+    edges { node { id ...Name ... on Vm { cpu } } }
+    pageInfo { endCursor hasNextPage }
+  }
+}
+
+fragment Name on Object {
+  name
+}
+'''
+
+
+def test_parse_document():
+    """ Tests variables with nested list types and defaults, aliases, arguments, directives and fragments """
+    document = parse(DOCUMENT)
+    operation = document.operations[0]
+
+    assert operation.operation == "query"
+    assert operation.name == "RubrikPolarisSDKRequest"
+    ids, name, filter_, first = operation.variable_definitions
+    assert type_to_string(ids.type) == "[[UUID!]!]!"
+    assert name.default_value.value == 'a "b"'
+    assert filter_.default_value.value["deep"].value["on"].value is True
+    assert first.default_value.text == "10"
+
+    root, = operation.selection_set
+    assert (root.alias, root.name) == ("items", "objects")
+    assert dict(root.arguments)["ids"].kind == "Variable"
+    assert dict(root.arguments)["note"].value == 'block "quoted" text'
+    assert root.directives[0].name == "include"
+    node = root.selection_set[0].selection_set[0]
+    assert [type(s) for s in node.selection_set] == [Field, FragmentSpread, InlineFragment]
+    assert document.fragments["Name"].type_condition == "Object"
+    assert find_page_path(operation.selection_set, document.fragments) == ["items"]
+
+
+@pytest.mark.parametrize("text", ["query { a", "query ($a: ) { a }", "query { a(b: ) }", "query { a } ?"])
+def test_parse_invalid_document(text):
+    """ Tests that syntax errors are raised as ValidationException """
+    with pytest.raises(ValidationException):
+        parse(text)
+
+
+def test_graphql_details_of_aliased_root(client):
+    """ Tests that the root field of an operation is known by its response key """
+    details = client._graphql_query_map["storage_aws_ebs"]
+    assert details["gql_name"] == "ebsVolumesList"
+    assert details["page_path"] == ["ebsVolumesList"]
+    assert details["operation_type"] == "query"
+    assert details["filters"] == {"default": None, "type": "AwsNativeEbsVolumeFilters",
+                                  "type_ref": "AwsNativeEbsVolumeFilters", "typeOf": "stringOf", "required": False}
+
+
+def test_query_paginated_follows_aliased_root(requests_mock, client):
+    """ Tests that the pages of an operation whose root field has an alias are all requested """
+    pages = [
+        {"data": {"ebsVolumesList": {"edges": [{"node": {"id": "1"}}],
+                                     "pageInfo": {"endCursor": "c1", "hasNextPage": True}}}},
+        {"data": {"ebsVolumesList": {"edges": [{"node": {"id": "2"}}],
+                                     "pageInfo": {"endCursor": "c2", "hasNextPage": False}}}}
+    ]
+    requests_mock.post(BASE_URL + "/graphql", [{"json": page} for page in pages])
+
+    assert [n["id"] for n in client._query_paginated("storage_aws_ebs", {"first": 1})] == ["1", "2"]
+    assert requests_mock.last_request.json()["variables"]["after"] == "c1"
+
+
+def test_query_paginated_follows_nested_connection(requests_mock, client):
+    """ Tests that the connection below the root field is paginated """
+    pages = [
+        {"data": {"vSphereHost": {"descendantConnection": {
+            "edges": [{"node": {"id": "1"}}], "pageInfo": {"endCursor": "c1", "hasNextPage": True}}}}},
+        {"data": {"vSphereHost": {"descendantConnection": {
+            "edges": [{"node": {"id": "2"}}], "pageInfo": {"endCursor": "c2", "hasNextPage": False}}}}}
+    ]
+    requests_mock.post(BASE_URL + "/graphql", [{"json": page} for page in pages])
+
+    nodes = client._query_paginated("gps_vm_datastores", {"hostId": "host"})
+    assert [n["id"] for n in nodes] == ["1", "2"]
+
+
+def test_missing_required_variables(requests_mock, client):
+    """ Tests that non-null variables without default are checked before sending the request """
+    requests_mock.post(BASE_URL + "/graphql", json={})
+
+    with pytest.raises(ValidationException) as e:
+        client._query("k8s_status", {})
+    assert "k8s_status" in str(e.value)
+    assert not [r for r in requests_mock.request_history if r.url.endswith("/graphql")]
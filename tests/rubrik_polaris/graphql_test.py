@@ -0,0 +1,44 @@
+import json
+
+from rubrik_polaris.common.graphql import GRAPHQL_INDEX_VERSION, GRAPHQL_SOURCE_PATH, load_operation_index, \
+    write_operation_index
+
+
+def test_operation_index_matches_source(tmp_path):
+    """ Tests that the precompiled index holds the same operations as the .graphql files """
+    index_path = str(tmp_path / "graphql_index.json")
+    count = write_operation_index(GRAPHQL_SOURCE_PATH, index_path)
+
+    compiled = load_operation_index(GRAPHQL_SOURCE_PATH, index_path)
+    source = load_operation_index(GRAPHQL_SOURCE_PATH, str(tmp_path / "missing.json"))
+    assert len(compiled) == len(source) == count
+    assert dict(compiled) == dict(source)
+    assert compiled["core_sla_list"]["operation_name"] == "SdkPythonCoreSlaList"
+    assert "SdkPythonCoreSlaList" in compiled["core_sla_list"]["query_text"]
+
+
+def test_operation_index_is_lazy(tmp_path):
+    """ Tests that entries are only decoded on first use and shared across loads """
+    index_path = tmp_path / "graphql_index.json"
+    index_path.write_text(json.dumps({"version": GRAPHQL_INDEX_VERSION, "operations": {"good": '{"gql_name": "good"}', "bad": "{"}}))
+
+    index = load_operation_index(GRAPHQL_SOURCE_PATH, str(index_path))
+    assert "bad" in index
+    assert not index._entries
+    assert index["good"] == {"gql_name": "good"}
+    assert load_operation_index(GRAPHQL_SOURCE_PATH, str(index_path)) is index
+
+
+def test_operation_index_ignores_other_versions(tmp_path):
+    """ Tests that an index written by another SDK version is not used """
+    index_path = tmp_path / "graphql_index.json"
+    index_path.write_text(json.dumps({"version": 0, "operations": {}}))
+
+    index = load_operation_index(str(tmp_path / "missing") + "/", str(index_path))
+    assert "core_sla_list" in index
+
+
+def test_client_uses_operation_index(client):
+    """ Tests that the client resolves operation names without compiling every operation """
+    assert client._query_names["SdkPythonCoreSlaList"] == "core_sla_list"
+    assert client._graphql_query_map["core_sla_list"]["gql_name"] == "slaDomains"
@@ -0,0 +1,114 @@
+import re
+import threading
+
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.common.jobs import JobPoller
+from rubrik_polaris.common.monitor import TaskchainMonitor
+from rubrik_polaris.exceptions import PolarisException, ValidationException
+
+
+def jobs_handler(states, on_demand=None):
+    """ Answer the on demand snapshot mutation, and every aliased taskchain field of a batch with the next state
+    of its taskchain, repeating the last one
+    """
+    def handler(request, context):
+        body = request.json()
+        if 'takeOnDemandSnapshot' in body['query']:
+            return {"data": {"takeOnDemandSnapshot": on_demand}}
+        data = {}
+        for alias in re.findall(r'(b\d+_)getKorgTaskchainStatus', body['query']) or ['']:
+            task_id = body['variables']['{}filter'.format(alias)]
+            field = '{}getKorgTaskchainStatus'.format(alias)
+            if not states.get(task_id):
+                data[field] = None
+                continue
+            state = states[task_id].pop(0) if len(states[task_id]) > 1 else states[task_id][0]
+            data[field] = {"taskchain": {"id": task_id, "state": state, "progress": 100 if state == "SUCCEEDED" else 50}}
+        return {"data": data}
+    return handler
+
+
+@pytest.fixture()
+def poller(client):
+    client._job_poller = JobPoller(client, interval=0.01)
+    yield client._job_poller
+    client._job_poller.close()
+
+
+def test_submit_on_demand_returns_job_handles(requests_mock, client, poller):
+    """ Tests that every snapshot taskchain gets a handle, and that refused objects get a failed one """
+    on_demand = {
+        "taskchainUuids": [{"workloadId": "w1", "taskchainUuid": "t1"}, {"workloadId": "w2", "taskchainUuid": "t2"}],
+        "errors": [{"workloadId": "w3", "error": "Object not found"}]
+    }
+    requests_mock.post(BASE_URL + "/graphql", json=jobs_handler(
+        {"t1": ["RUNNING", "SUCCEEDED"], "t2": ["FAILED"]}, on_demand))
+
+    jobs = client.submit_on_demand(["w1", "w2", "w3"], "sla", return_handle=True)
+    done, pending = client.wait_for_jobs(jobs, timeout=10)
+
+    assert len(done) == 3 and not pending
+    assert [(job.taskchain_id, job.state) for job in jobs[:2]] == [("t1", "SUCCEEDED"), ("t2", "FAILED")]
+    assert jobs[0].result()["workloadId"] == "w1"
+    assert jobs[0].progress == 100 and jobs[0].elapsed >= 0
+    with pytest.raises(PolarisException, match="Object not found"):
+        jobs[2].result()
+    assert client.get_job_stats()["finished"] == 2
+    assert not poller._handles and not poller._monitor._tasks and not poller._monitor._started
+
+
+def test_submit_on_demand_raises_failed_polls_while_waiting(requests_mock, client):
+    """ Tests that a taskchain status that can't be read is no longer ignored """
+    on_demand = {"taskchainUuids": [{"workloadId": "w1", "taskchainUuid": "t1"}], "errors": []}
+    requests_mock.post(BASE_URL + "/graphql", json=jobs_handler({}, on_demand))
+    client._monitor_interval = 0
+
+    with pytest.raises(PolarisException, match="t1"):
+        client.submit_on_demand(["w1"], "sla", wait=True)
+
+
+def test_job_handle_callbacks_and_poll_errors(requests_mock, client, poller):
+    """ Tests that done callbacks run once the taskchain finished, and that failed polls fail the handle """
+    requests_mock.post(BASE_URL + "/graphql", json=jobs_handler({"t1": ["RUNNING", "SUCCEEDED"]}))
+    finished = threading.Event()
+    called = []
+
+    job = poller.submit("t1")
+    job.add_done_callback(lambda handle: (called.append(handle.state), finished.set()))
+    missing = poller.submit("missing")
+
+    assert finished.wait(10) and called == ["SUCCEEDED"]
+    assert isinstance(missing.exception(timeout=10), PolarisException)
+
+
+def test_job_handle_cancel_stops_local_wait(requests_mock, client, poller):
+    """ Tests that cancelling a handle stops polling its taskchain """
+    requests_mock.post(BASE_URL + "/graphql", json=jobs_handler({"t1": ["RUNNING"], "t2": ["SUCCEEDED"]}))
+
+    running = poller.submit("t1")
+    done, pending = client.wait_for_jobs([running, poller.submit("t2")], timeout=10, return_when='any')
+
+    assert [job.taskchain_id for job in done] == ["t2"] and pending == {running}
+    assert running.state == "RUNNING"
+    assert running.cancel() and running.cancelled()
+    assert poller.stats()["in_flight"] == 0
+
+
+def test_wait_for_jobs_validates_return_when(client):
+    with pytest.raises(ValidationException):
+        client.wait_for_jobs([], return_when='first')
+
+
+def test_taskchain_monitor_backs_off():
+    """ Tests that the delay between two polls of a taskchain grows up to max_interval """
+    monitor = TaskchainMonitor(None, interval=1, max_interval=3, backoff=2)
+    task = monitor.add("t1")
+    assert monitor.next_batch() == [task]
+
+    delays = []
+    for _ in range(4):
+        monitor.record([task], [{"taskchain": {"state": "RUNNING"}}])
+        delays.append(round(monitor.next_poll()))
+
+    assert delays == [1, 2, 3, 3]
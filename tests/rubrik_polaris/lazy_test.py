@@ -0,0 +1,32 @@
+import inspect
+import sys
+
+from rubrik_polaris.common.lazy import LazyMethod, lazy_methods, resolve_lazy_methods
+from rubrik_polaris.rubrik_polaris import PolarisClient
+
+
+def test_lazy_method_is_imported_on_first_use():
+    """ Tests that a method is resolved on first access and replaces its descriptor """
+    @lazy_methods(('.common.validations', 'to_boolean'))
+    class Client:  # pylint: disable=too-few-public-methods
+        pass
+
+    assert isinstance(vars(Client)['to_boolean'], LazyMethod)
+    assert Client().to_boolean("true") is True
+    assert inspect.isfunction(vars(Client)['to_boolean'])
+
+
+def test_lazy_methods_keep_introspection():
+    """ Tests that lazy methods are listed by dir() and expose the function and its docstring """
+    assert "list_sla_domains" in dir(PolarisClient)
+    assert "_query_paginated" in dir(PolarisClient)
+    method = PolarisClient.list_sla_domains
+    assert inspect.isfunction(method)
+    assert "Args:" in method.__doc__
+    assert "rubrik_polaris.gps.sla" in sys.modules
+
+
+def test_resolve_lazy_methods():
+    """ Tests that every declared method can be imported """
+    resolve_lazy_methods(PolarisClient)
+    assert not [name for name, attribute in vars(PolarisClient).items() if isinstance(attribute, LazyMethod)]
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.common.monitor import TaskchainMonitor
+from rubrik_polaris.exceptions import PolarisException
+
+
+def taskchain_states(states):
+    """ Answer every aliased taskchain field of a batch with the next state of its taskchain """
+    def handler(request, context):
+        body = request.json()
+        data = {}
+        for alias in re.findall(r'(b\d+_)getKorgTaskchainStatus', body['query']) or ['']:
+            task_id = body['variables']['{}filter'.format(alias)]
+            if not states[task_id]:
+                data['{}getKorgTaskchainStatus'.format(alias)] = None
+                continue
+            data['{}getKorgTaskchainStatus'.format(alias)] = {"taskchain": {"id": task_id, "state": states[task_id].pop(0)}}
+        return {"data": data}
+    return handler
+
+
+def polled_ids(requests_mock):
+    return [sorted(v for k, v in r.json()["variables"].items() if k.endswith("filter"))
+            for r in requests_mock.request_history if r.url.endswith("/graphql")]
+
+
+def test_monitor_task_polls_in_one_request_per_tick(requests_mock, client):
+    """ Tests that every tick requests the status of all in-flight taskchains at once and retires finished ones """
+    requests_mock.post(BASE_URL + "/graphql", json=taskchain_states({
+        "t1": ["RUNNING", "SUCCEEDED"], "t2": ["FAILED"], "t3": ["READY", "RUNNING", "CANCELED"]}))
+
+    tasks = client._monitor_task([{"taskchainUuid": "t1"}, "t2", {"jobId": "t3"}], interval=0)
+
+    assert [(t["taskchainUuid"], t["status"]) for t in tasks] == [("t1", "SUCCEEDED"), ("t2", "FAILED"),
+                                                                 ("t3", "CANCELED")]
+    assert all(t["elapsed"] >= 0 for t in tasks)
+    assert polled_ids(requests_mock) == [["t1", "t2", "t3"], ["t1", "t3"], ["t3"]]
+
+
+def test_monitor_task_single_task(requests_mock, client):
+    """ Tests that a single task is returned as its dict """
+    requests_mock.post(BASE_URL + "/graphql", json=taskchain_states({"t1": ["SUCCEEDED"]}))
+
+    assert client._monitor_task([{"taskchainUuid": "t1"}], interval=0)["status"] == "SUCCEEDED"
+
+
+def test_taskchain_monitor_batch_size_and_max_in_flight(requests_mock, client):
+    """ Tests that ticks poll at most batch_size taskchains, in turn, out of max_in_flight """
+    requests_mock.post(BASE_URL + "/graphql", json=taskchain_states({
+        "t1": ["RUNNING", "SUCCEEDED"], "t2": ["SUCCEEDED"], "t3": ["SUCCEEDED"], "t4": ["SUCCEEDED"]}))
+    monitor = TaskchainMonitor(client, batch_size=2, max_in_flight=3, interval=0)
+    for task_id in ("t1", "t2", "t3", "t4"):
+        monitor.add(task_id)
+
+    assert [t["taskchainUuid"] for t in monitor.tick()] == ["t2"]
+    monitor.run()
+
+    assert polled_ids(requests_mock) == [["t1", "t2"], ["t1", "t3"], ["t4"]]
+    assert monitor.stats() == {"ticks": 3, "requests": 3, "polls": 5, "finished": 4, "in_flight": 0, "waiting": 0}
+
+
+def test_monitor_task_raises_failed_polls(requests_mock, client):
+    """ Tests that a taskchain whose status can't be read fails the monitor """
+    requests_mock.post(BASE_URL + "/graphql", json=taskchain_states({"t1": []}))
+
+    with pytest.raises(PolarisException, match="t1"):
+        client._monitor_task("t1", interval=0)
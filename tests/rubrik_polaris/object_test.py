@@ -5,6 +5,7 @@ from rubrik_polaris.common.object import ERROR_MESSAGES
 from rubrik_polaris.common import validations
 
 GROUP_BY_VALUES = ["Month", "Day", "Year", "Week", "Hour", "Quarter"]
+SCHEMA_GROUP_BY_VALUES = ["Day", "Hour", "Month", "Quarter", "Week", "Year"]
 OBJECT_ID = "dummy_object_id"
 
 
@@ -16,19 +17,7 @@ def test_list_vm_objects_when_valid_values_are_provided(requests_mock, client):
 
     expected_response = util_load_json(os.path.join(os.path.dirname(os.path.realpath(__file__)),
                                                     "test_data/list_vm_objects.json"))
-    enum_response = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_by_values.json"))
-    enum_response2 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_values.json")
-    )
-
-    responses = [
-        {'json': enum_response},
-        {'json': enum_response2},
-        {'json': expected_response},
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
+    requests_mock.post(BASE_URL + "/graphql", json=expected_response)
 
     response = list_vm_objects(client, first=1, filters=[], sort_order="ASC", sort_by="ID")
     assert response == expected_response
@@ -44,19 +33,6 @@ def test_list_vm_objects_when_invalid_values_are_provided(client, requests_mock,
     Tests list_vm_objects method of PolarisClient when invalid values are provided
     """
     from rubrik_polaris.common.object import list_vm_objects
-    enum_response = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_by_values.json")
-    )
-    enum_response2 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_values.json")
-    )
-    responses = [
-        {'json': enum_response},
-        {'json': enum_response2},
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
-
     with pytest.raises(ValueError) as e:
         list_vm_objects(client, first=first, sort_order=sort_order, sort_by=sort_by)
     assert str(e.value) == err_msg
@@ -71,20 +47,6 @@ def test_list_vm_objects_when_sort_fields_are_required(client, requests_mock, fi
     Tests list_vm_objects method of PolarisClient when invalid sort fields are provided
     """
     from rubrik_polaris.common.object import list_vm_objects
-    responses = []
-    if field == "sort_by":
-        enum_response = util_load_json(
-            os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_by_values.json")
-        )
-        responses.append({'json': enum_response})
-    if field == "sort_order":
-        enum_response2 = util_load_json(
-            os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_values.json")
-        )
-        responses.append({'json': enum_response2})
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
-
     with pytest.raises(ValueError) as e:
         list_vm_objects(client, sort_order=sort_order, sort_by=sort_by)
     assert str(e.value) == err_msg
@@ -99,19 +61,7 @@ def test_search_object_when_valid_values_are_provided(requests_mock, client):
     expected_response = util_load_json(
         os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/search_object_valid_response.json")
     )
-    enum_response = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_by_values.json"))
-    enum_response2 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_values.json")
-    )
-
-    responses = [
-        {'json': enum_response},
-        {'json': enum_response2},
-        {'json': expected_response},
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
+    requests_mock.post(BASE_URL + "/graphql", json=expected_response)
 
     response = search_object(client, [{"field": "NAME", "texts": ["dev"]}], 2, sort_by="NAME", sort_order="DESC")
     assert response == expected_response
@@ -129,19 +79,6 @@ def test_search_object_when_invalid_values_are_provided(client, requests_mock, f
     Tests search_object method of PolarisClient when invalid values are provided
     """
     from rubrik_polaris.common.object import search_object
-    enum_response = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_by_values.json")
-    )
-    enum_response2 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_values.json")
-    )
-    responses = [
-        {'json': enum_response},
-        {'json': enum_response2},
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
-
     with pytest.raises(raised) as e:
         search_object(client, filters, first, sort_by, sort_order, after)
     assert str(e.value) == err_message
@@ -189,7 +126,6 @@ def test_get_object_snapshot_when_valid_values_are_provided(requests_mock, clien
     )
 
     responses = [
-        {'json': enum_response},
         {'json': enum_response},
         {'json': query_response},
     ]
@@ -204,14 +140,14 @@ def test_get_object_snapshot_when_valid_values_are_provided(requests_mock, clien
                                    cluster_connected=True)
 
     assert response == query_response
-    assert requests_mock.call_count == 4
+    assert requests_mock.call_count == 3
 
 
 @pytest.mark.parametrize(
     "object_id, snapshot_group_by, missed_snapshot_group_by, time_range, timezone_offset, cluster_connected, err_msg", [
         (OBJECT_ID, "", "", {}, 0, True, ERROR_MESSAGES['MISSING_PARAMETERS_IN_SNAPSHOT']),
         (OBJECT_ID, "day", "Day", {"start": ""}, 5.5, True, validations.ERROR_MESSAGES['INVALID_FIELD_TYPE'].format(
-            "day", 'snapshot_group_by', GROUP_BY_VALUES)),
+            "day", 'snapshot_group_by', SCHEMA_GROUP_BY_VALUES)),
         (OBJECT_ID, "Day", "Second", {"start": ""}, 5.5, True, validations.ERROR_MESSAGES['INVALID_FIELD_TYPE'].format(
             "Second", 'missed_snapshot_group_by', GROUP_BY_VALUES)),
         (OBJECT_ID, "Day", "Day", {"start": ""}, "abc", True, ERROR_MESSAGES['INVALID_TIMEZONE_OFFSET'].format("abc")),
@@ -247,22 +183,7 @@ def test_list_objects_when_valid_values_are_provided(requests_mock, client):
 
     expected_response = util_load_json(os.path.join(os.path.dirname(os.path.realpath(__file__)),
                                                     "test_data/list_objects.json"))
-    enum_response = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_by_values.json"))
-    enum_response2 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_values.json")
-    )
-    enum_response3 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/type_filter_values.json"))
-
-    responses = [
-        {'json': enum_response},
-        {'json': enum_response2},
-        {'json': enum_response3},
-        {'json': expected_response},
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
+    requests_mock.post(BASE_URL + "/graphql", json=expected_response)
 
     response = list_objects(client, first=1, sort_by="NAME", sort_order="ASC", type_filter="AzureNativeVm")
     assert response == expected_response
@@ -278,23 +199,6 @@ def test_list_objects_when_invalid_values_are_provided(client, requests_mock, fi
     Tests list_objects method of PolarisClient when invalid values are provided
     """
     from rubrik_polaris.common.object import list_objects
-    enum_response = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_by_values.json")
-    )
-    enum_response2 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_values.json")
-    )
-    enum_response3 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/type_filter_values.json"))
-
-    responses = [
-        {'json': enum_response},
-        {'json': enum_response2},
-        {'json': enum_response3}
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
-
     with pytest.raises(ValueError) as e:
         list_objects(client, first=first, sort_by="ID", sort_order=sort_order)
     assert str(e.value) == err_msg
@@ -308,28 +212,16 @@ def test_list_object_snapshots_when_valid_values_are_provided(requests_mock, cli
 
     expected_response = util_load_json(os.path.join(os.path.dirname(os.path.realpath(__file__)),
                                                     "test_data/list_object_snapshots.json"))
-    enum_response = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/snapshot_sort_by_values.json"))
-    enum_response2 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_enum_values.json")
-    )
-
-    responses = [
-        {'json': enum_response},
-        {'json': enum_response2},
-        {'json': expected_response},
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
+    requests_mock.post(BASE_URL + "/graphql", json=expected_response)
 
-    response = list_object_snapshots(client, first=1, object_id="a", sort_by="UNKNOWN", sort_order="Asc")
+    response = list_object_snapshots(client, first=1, object_id="a", sort_by="UNKNOWN", sort_order="ASC")
     assert response == expected_response
 
 
 @pytest.mark.parametrize("first, sort_order, start_date, end_date, err_msg", [
     (0, None, None, None, ERROR_MESSAGES['INVALID_FIRST'].format(0)),
     ("a", None, None, None, validations.ERROR_MESSAGES['INVALID_NUMBER'].format("a")),
-    (1, 'a', None, None, validations.ERROR_MESSAGES['INVALID_FIELD_TYPE'].format("a", "sort_order", ['Asc', 'Desc'])),
+    (1, 'a', None, None, validations.ERROR_MESSAGES['INVALID_FIELD_TYPE'].format("a", "sort_order", ['ASC', 'DESC'])),
     (1, None, "2021-04-1", None, ERROR_MESSAGES['DATES_REQUIRED']),
     (1, None, None, "2021-04-1", ERROR_MESSAGES['DATES_REQUIRED']),
 ])
@@ -338,20 +230,6 @@ def test_list_object_snapshots_when_invalid_values_are_provided(client, requests
     Tests list_object_snapshots method of PolarisClient when invalid values are provided
     """
     from rubrik_polaris.common.object import list_object_snapshots
-    enum_response = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/snapshot_sort_by_values.json")
-    )
-    enum_response2 = util_load_json(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data/sort_order_enum_values.json")
-    )
-
-    responses = [
-        {'json': enum_response},
-        {'json': enum_response2}
-    ]
-
-    requests_mock.post(BASE_URL + "/graphql", responses)
-
     with pytest.raises(ValueError) as e:
         list_object_snapshots(client, object_id="a", first=first, sort_order=sort_order, start_date=start_date,
                               end_date=end_date, sort_by="UNKNOWN")
@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from conftest import BASE_URL
+from rubrik_polaris.common.pagesize import PageSizeTuner, get_page_size_tuner, reset_page_size_tuners
+from rubrik_polaris.exceptions import RequestException
+from rubrik_polaris.rubrik_polaris import PolarisClient
+
+
+@pytest.fixture(autouse=True)
+def tuners():
+    reset_page_size_tuners()
+    yield
+    reset_page_size_tuners()
+
+
+@pytest.fixture()
+def adaptive_client(requests_mock):
+    requests_mock.post(BASE_URL + "/session", json={"access_token": "dummy", "mfa_token": "dummy_token"})
+    return PolarisClient(domain="rubrik-se-beta", username="dummy_username", password="dummy_password",
+                         insecure=True, max_retries=0, adaptive_page_size=True,
+                         page_size_bounds={"core_report_data": (5, 40)})
+
+
+def report_page(count, has_next_page=True):
+    return {"json": {"data": {"snappableConnection": {
+        "edges": [{"node": {"name": "n"}}] * count,
+        "pageInfo": {"endCursor": "c", "hasNextPage": has_next_page}}}}}
+
+
+def page_sizes(requests_mock):
+    return [r.json()["variables"]["first"] for r in requests_mock.request_history if r.url.endswith("/graphql")]
+
+
+def test_page_size_tuner_grows_and_shrinks():
+    """ Tests that fast full pages double the size and slow or large pages shrink it within bounds """
+    tuner = PageSizeTuner(initial=100, minimum=10, maximum=300, target_latency=2.0, max_payload=1000)
+
+    assert tuner.observe(100, 100, 0.5, 100) == 200
+    assert tuner.observe(200, 200, 0.5) == 300
+    assert tuner.observe(300, 120, 0.5) == 300
+    assert tuner.observe(300, 300, 4.0) == 150
+    assert tuner.observe(150, 150, 1.5, 3000) == 50
+    assert tuner.observe(50, 50, 100.0) == 12
+    assert tuner.snapshot() == {"pages": 6, "grown": 2, "shrunk": 3, "timeouts": 0, "size": 12, "minimum": 10,
+                                "maximum": 300}
+
+
+def test_page_size_tuner_timeouts():
+    """ Tests that timeouts halve the size until the minimum """
+    tuner = PageSizeTuner(initial=40, minimum=10, maximum=100)
+
+    assert tuner.timed_out(40) and tuner.size == 20
+    assert tuner.timed_out(20) and tuner.size == 10
+    assert not tuner.timed_out(10)
+    assert tuner.snapshot()["timeouts"] == 3
+
+
+def test_page_size_tuner_shared_per_operation():
+    """ Tests that tuners are created once per operation and keep their size """
+    tuner = get_page_size_tuner("Op", 50)
+    tuner.timed_out(50)
+
+    assert get_page_size_tuner("Op", 500) is tuner
+    assert tuner.size == 25
+
+
+def test_adaptive_query_paginated(requests_mock, adaptive_client):
+    """ Tests that fast pages grow up to the operation bounds and the size is remembered """
+    requests_mock.post(BASE_URL + "/graphql", [report_page(10), report_page(20), report_page(40),
+                                               report_page(3, has_next_page=False), report_page(40, False)])
+
+    assert len(list(adaptive_client._query_paginated("core_report_data", {"first": 10}))) == 73
+    assert page_sizes(requests_mock) == [10, 20, 40, 40]
+
+    list(adaptive_client._query_paginated("core_report_data", {"first": 10}))
+    assert page_sizes(requests_mock)[-1] == 40
+    assert adaptive_client.get_page_size_stats()["SdkPythonCoreReportData"]["size"] == 40
+
+
+def test_adaptive_query_paginated_retries_timeouts_with_smaller_pages(requests_mock, adaptive_client):
+    """ Tests that a page that timed out is requested again with half the size """
+    requests_mock.post(BASE_URL + "/graphql", [{"exc": requests.exceptions.ReadTimeout},
+                                               report_page(10, has_next_page=False)])
+
+    assert len(list(adaptive_client._query_paginated("core_report_data", {"first": 20}))) == 10
+    assert page_sizes(requests_mock) == [20, 10]
+    assert adaptive_client.get_page_size_stats()["SdkPythonCoreReportData"]["timeouts"] == 1
+
+
+def test_adaptive_query_paginated_raises_timeouts_at_minimum(requests_mock, adaptive_client):
+    """ Tests that timeouts are raised once the page size can't shrink any more """
+    requests_mock.post(BASE_URL + "/graphql", exc=requests.exceptions.ReadTimeout)
+
+    with pytest.raises(RequestException):
+        list(adaptive_client._query_paginated("core_report_data", {"first": 5}))
+    assert page_sizes(requests_mock) == [5]
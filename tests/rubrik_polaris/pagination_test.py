@@ -0,0 +1,66 @@
+import pytest
+
+from conftest import BASE_URL
+from rubrik_polaris.exceptions import ValidationException
+
+
+def ec2_pages(*pages):
+    return [{"json": {"data": {"awsNativeEc2Instances": {
+        "edges": [{"node": {"id": node_id}} for node_id in ids],
+        "pageInfo": {"endCursor": "c{}".format(number), "hasNextPage": number < len(pages)}}}}}
+        for number, ids in enumerate(pages, 1)]
+
+
+def graphql_variables(requests_mock):
+    return [r.json().get("variables", {}) for r in requests_mock.request_history if r.url.endswith("/graphql")]
+
+
+def test_get_compute_ec2_reads_every_page(requests_mock, client):
+    """ Tests that inventory getters follow pageInfo instead of stopping at the first page """
+    requests_mock.post(BASE_URL + "/graphql", ec2_pages(["1", "2"], ["3"]))
+
+    assert client.get_compute_ec2(page_size=2) == [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+
+    first, second = graphql_variables(requests_mock)
+    assert first["first"] == second["first"] == 2
+    assert "after" not in first and second["after"] == "c1"
+
+
+def test_get_compute_ec2_limit_shrinks_last_page(requests_mock, client):
+    """ Tests that the last page only requests the entries still needed and no further page is fetched """
+    requests_mock.post(BASE_URL + "/graphql", ec2_pages(["1", "2"], ["3"], ["4", "5"]))
+
+    assert client.get_compute_ec2(page_size=2, limit=3) == [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+
+    assert [v["first"] for v in graphql_variables(requests_mock)] == [2, 1]
+
+
+def test_get_storage_ebs_stream(requests_mock, client):
+    """ Tests that a streamed getter only fetches pages as they are read """
+    requests_mock.post(BASE_URL + "/graphql", [
+        {"json": {"data": {"ebsVolumesList": {"edges": [{"node": {"id": "1"}}],
+                                              "pageInfo": {"endCursor": "c1", "hasNextPage": True}}}}},
+        {"json": {"data": {"ebsVolumesList": {"edges": [{"node": {"id": "2"}}],
+                                              "pageInfo": {"endCursor": "c2", "hasNextPage": False}}}}}])
+
+    volumes = client.get_storage_ebs(stream=True)
+    assert next(volumes) == {"id": "1"}
+    assert len(graphql_variables(requests_mock)) == 1
+    assert list(volumes) == [{"id": "2"}]
+    assert len(graphql_variables(requests_mock)) == 2
+
+
+def test_query_paginated_limit_with_stream_pages(requests_mock, client):
+    """ Tests that a limit stops a streamed page early """
+    requests_mock.post(BASE_URL + "/graphql", ec2_pages(["1", "2", "3"], ["4"]))
+
+    assert list(client._query_paginated("compute_aws_ec2", limit=2, stream_pages=True)) == [{"id": "1"}, {"id": "2"}]
+    assert len(graphql_variables(requests_mock)) == 1
+    assert not list(client._query_paginated("compute_aws_ec2", limit=0))
+
+
+@pytest.mark.parametrize("page_size, limit", [(0, None), ("10", None), (None, -1), (True, None)])
+def test_query_paginated_invalid_page_size_or_limit(client, page_size, limit):
+    """ Tests that page sizes and limits are validated """
+    with pytest.raises(ValidationException):
+        list(client._query_paginated("compute_aws_ec2", page_size=page_size, limit=limit))
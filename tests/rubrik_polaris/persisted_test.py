@@ -0,0 +1,89 @@
+import hashlib
+
+from conftest import BASE_URL
+from rubrik_polaris.common.gql_parser import minify
+from rubrik_polaris.rubrik_polaris import PolarisClient
+
+SLA_RESPONSE = {"data": {"slaDomains": {"edges": [{"node": {"name": "Gold", "id": "1"}}]}}}
+NOT_FOUND = {"errors": [{"message": "PersistedQueryNotFound",
+                         "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]}
+
+
+def persisted_client(requests_mock):
+    requests_mock.post(BASE_URL + "/session", json={"access_token": "dummy", "mfa_token": "dummy_token"})
+    return PolarisClient(domain="rubrik-se-beta", username="dummy_username", password="dummy_password",
+                         insecure=True, persisted_queries=True, deduplicate_queries=False)
+
+
+def graphql_bodies(requests_mock):
+    return [r.json() for r in requests_mock.request_history if r.url.endswith("/graphql")]
+
+
+def test_minify():
+    """ Tests that ignored tokens are dropped and names, numbers and strings are kept apart """
+    text = 'query Q($a: Int = 1, $b: String = "x,  y") {\n  # comment\n  f(a: $a) { ...F g }\n}\n'
+
+    assert minify(text) == 'query Q($a:Int=1$b:String="x,  y"){f(a:$a){...F g}}'
+
+
+def test_persisted_query_hit(requests_mock):
+    """ Tests that known documents are sent as their hash only """
+    client = persisted_client(requests_mock)
+    requests_mock.post(BASE_URL + "/graphql", json=SLA_RESPONSE)
+
+    assert client._query("core_sla_list", {"filter": []}) == [{"name": "Gold", "id": "1"}]
+
+    body, = graphql_bodies(requests_mock)
+    query_text = client._graphql_query_map["core_sla_list"]["query_text"]
+    assert "query" not in body
+    assert body["extensions"]["persistedQuery"] == {
+        "version": 1, "sha256Hash": hashlib.sha256(query_text.encode("utf-8")).hexdigest()}
+    stats = client.get_persisted_query_stats()["SdkPythonCoreSlaList"]
+    assert stats["persisted_hits"] == 1
+    assert stats["query_bytes_sent"] == 0
+    assert stats["query_bytes_saved"] == client._graphql_query_map["core_sla_list"]["source_size"]
+
+
+def test_persisted_query_not_found_registers_document(requests_mock):
+    """ Tests that an unknown hash is followed by the full document, and the hash alone afterwards """
+    client = persisted_client(requests_mock)
+    requests_mock.post(BASE_URL + "/graphql", [{"json": NOT_FOUND}, {"json": SLA_RESPONSE}, {"json": SLA_RESPONSE}])
+
+    assert client._query("core_sla_list", {"filter": []}) == [{"name": "Gold", "id": "1"}]
+    client._query("core_sla_list", {"filter": [], "first": 1})
+
+    missed, registered, hashed = graphql_bodies(requests_mock)
+    assert "query" not in missed
+    assert registered["query"] == client._graphql_query_map["core_sla_list"]["query_text"]
+    assert registered["extensions"] == missed["extensions"]
+    assert "query" not in hashed
+    stats = client.get_persisted_query_stats()["SdkPythonCoreSlaList"]
+    assert (stats["persisted_hits"], stats["persisted_misses"]) == (1, 1)
+
+
+def test_persisted_queries_not_supported(requests_mock):
+    """ Tests that persisted queries are turned off when Polaris doesn't support them """
+    client = persisted_client(requests_mock)
+    not_supported = {"errors": [{"message": "PersistedQueryNotSupported"}]}
+    requests_mock.post(BASE_URL + "/graphql", [{"json": not_supported}, {"json": SLA_RESPONSE},
+                                               {"json": SLA_RESPONSE}])
+
+    client._query("core_sla_list", {"filter": []})
+    client._query("core_sla_list", {"filter": [], "first": 1})
+
+    _, fallback, plain = graphql_bodies(requests_mock)
+    assert "extensions" not in fallback and "extensions" not in plain
+    assert "query" in plain
+
+
+def test_minified_bytes_saved_without_persisted_queries(requests_mock, client):
+    """ Tests that the savings of minification are reported when documents are sent in full """
+    requests_mock.post(BASE_URL + "/graphql", json=SLA_RESPONSE)
+
+    client._query("core_sla_list", {"filter": []})
+
+    body, = graphql_bodies(requests_mock)
+    stats = client.get_persisted_query_stats()["SdkPythonCoreSlaList"]
+    assert stats["query_bytes_sent"] == len(body["query"])
+    assert stats["query_bytes_saved"] > 0
+    assert stats["persisted_hits"] == stats["persisted_misses"] == 0
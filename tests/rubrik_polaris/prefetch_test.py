@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from conftest import BASE_URL
+from rubrik_polaris.common.prefetch import prefetch_pages, PrefetchStats
+
+
+def report_pages(*pages):
+    return [{"json": {"data": {"snappableConnection": {
+        "edges": [{"node": {"name": name}} for name in names],
+        "pageInfo": {"endCursor": "c{}".format(number), "hasNextPage": number < len(pages)}}}}}
+        for number, names in enumerate(pages, 1)]
+
+
+def counted_pages(count, fetched, fail_at=None):
+    for number in range(count):
+        if number == fail_at:
+            raise ValueError("page {} failed".format(number))
+        fetched.append(number)
+        yield [number]
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_prefetch_pages_fetches_ahead_with_backpressure():
+    """ Tests that pages are fetched ahead of the consumer but no more than `depth` are buffered """
+    fetched = []
+    stats = PrefetchStats()
+    pages = prefetch_pages(counted_pages(10, fetched), 2, stats, "Op")
+
+    assert next(pages) == [0]
+    # One page was taken, two are buffered and the worker holds the next one until there is room
+    assert wait_for(lambda: len(fetched) == 4)
+    time.sleep(0.05)
+    assert len(fetched) == 4
+
+    assert list(pages) == [[number] for number in range(1, 10)]
+    snapshot = stats.snapshot()["Op"]
+    assert snapshot["pages"] == 10
+    assert snapshot["wait_seconds_per_page"] >= 0.0 and snapshot["consume_seconds"] > 0.0
+
+
+def test_prefetch_pages_raises_fetch_errors_in_order():
+    """ Tests that a failed fetch is raised after the pages fetched before it """
+    pages = prefetch_pages(counted_pages(5, [], fail_at=2), 3, PrefetchStats(), "Op")
+
+    assert next(pages) == [0]
+    assert next(pages) == [1]
+    with pytest.raises(ValueError, match="page 2 failed"):
+        next(pages)
+
+
+def test_prefetch_pages_stops_worker_when_closed():
+    """ Tests that closing the iterator stops fetching """
+    fetched = []
+    pages = prefetch_pages(counted_pages(100, fetched), 1, PrefetchStats(), "Op")
+    assert next(pages) == [0]
+    pages.close()
+
+    assert wait_for(lambda: not [t for t in threading.enumerate() if t.name == "polaris-prefetch-Op"])
+    assert len(fetched) < 5
+
+
+def test_query_paginated_with_prefetch(requests_mock, client):
+    """ Tests that prefetched pages are yielded in order and reported per operation """
+    requests_mock.post(BASE_URL + "/graphql", report_pages(["a", "b"], ["c"], ["d"]))
+
+    rows = list(client._query_paginated("core_report_data", {"first": 2}, prefetch=2))
+
+    assert rows == [{"name": "a"}, {"name": "b"}, {"name": "c"}, {"name": "d"}]
+    assert [r.json()["variables"].get("after") for r in requests_mock.request_history[1:]] == [None, "c1", "c2"]
+    assert client.get_prefetch_stats()["SdkPythonCoreReportData"]["pages"] == 3
+
+
+def test_query_paginated_prefetch_client_option(requests_mock):
+    """ Tests that the prefetch_pages client option applies to every paginated query """
+    from rubrik_polaris.rubrik_polaris import PolarisClient
+
+    requests_mock.post(BASE_URL + "/session", json={"access_token": "dummy", "mfa_token": "dummy_token"})
+    client = PolarisClient(domain="rubrik-se-beta", username="dummy_username", password="dummy_password",
+                           insecure=True, prefetch_pages=1)
+    requests_mock.post(BASE_URL + "/graphql", report_pages(["a"], ["b"]))
+
+    assert list(client.get_report_data(limit=2)) == [{"name": "a"}, {"name": "b"}]
+    assert client.get_prefetch_stats()["SdkPythonCoreReportData"]["pages"] == 2
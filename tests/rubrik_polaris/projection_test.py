@@ -0,0 +1,157 @@
+import pytest
+
+from conftest import BASE_URL
+from rubrik_polaris.common.cache import ResponseCache
+from rubrik_polaris.common.gql_parser import parse, print_document, minify
+from rubrik_polaris.common.projection import normalize_projection, parse_schema_fields, project_document, \
+    load_field_table
+from rubrik_polaris.exceptions import ValidationException
+
+SCHEMA = '''
+type Query {
+  "Instances"
+  instances(first: Int, after: String): InstanceConnection!
+}
+interface Sla {
+  id: UUID!
+  name: String!
+}
+type Instance {
+  id: UUID!
+  name: String
+  tags: [Tag!]!
+  sla(
+    # effective only
+    effective: Boolean): Sla
+}
+'''
+
+DOCUMENT = '''query Instances($first: Int, $after: String) {
+  instances(first: $first, after: $after) {
+    edges { node { id name ...Details } }
+    pageInfo { endCursor hasNextPage }
+  }
+}
+fragment Details on Instance { tags { key value } region }
+'''
+
+
+def graphql_bodies(requests_mock):
+    return [r.json() for r in requests_mock.request_history if r.url.endswith("/graphql")]
+
+
+def test_parse_schema_fields():
+    """ Tests that object and interface fields are read with their named types """
+    fields = parse_schema_fields(SCHEMA)
+
+    assert fields['Query'] == {'instances': 'InstanceConnection'}
+    assert fields['Sla'] == {'id': 'UUID', 'name': 'String'}
+    assert fields['Instance'] == {'id': 'UUID', 'name': 'String', 'tags': 'Tag', 'sla': 'Sla'}
+
+
+def test_print_document_round_trip():
+    """ Tests that printing a parsed document gives its minified text """
+    assert print_document(parse(DOCUMENT)) == minify(DOCUMENT)
+
+
+def test_normalize_projection():
+    """ Tests that dotted paths and dicts give the same hashable projection """
+    assert normalize_projection(['id', 'tags.key', 'tags.value']) == \
+        normalize_projection({'tags': ['value', 'key'], 'id': None}) == \
+        (('id', None), ('tags', (('key', None), ('value', None))))
+    assert normalize_projection(['tags', 'tags.key']) == (('tags', (('key', None),)),)
+    with pytest.raises(ValidationException):
+        normalize_projection(42)
+
+
+def test_project_document_prunes_nodes_and_fragments():
+    """ Tests that only the projected node fields are kept, and fragments are inlined or dropped """
+    projected = project_document(minify(DOCUMENT), ('instances',), 'instances', normalize_projection(['id', 'tags.key']))
+    assert projected == 'query Instances($first:Int$after:String){instances(first:$first after:$after)' \
+                        '{edges{node{id...on Instance{tags{key}}}}pageInfo{endCursor hasNextPage}}}'
+
+    projected = project_document(minify(DOCUMENT), ('instances',), 'instances', normalize_projection(['name']),
+                                 'InstancesProjection')
+    assert projected.startswith('query InstancesProjection(')
+    assert 'fragment' not in projected and 'tags' not in projected
+
+
+def test_project_document_validates_against_schema():
+    """ Tests that fields are added from the schema and unknown fields are rejected """
+    q = {'query_text': minify('query Ec2 { awsNativeEc2Instances { edges { node { id } } pageInfo { endCursor } } }'),
+         'page_path': ('awsNativeEc2Instances',), 'gql_name': 'awsNativeEc2Instances'}
+    assert 'AwsNativeEc2Instance' in load_field_table()
+
+    projected = project_document(q['query_text'], q['page_path'], q['gql_name'],
+                                 normalize_projection(['id', 'region', 'tags.key']))
+    assert 'node{id region tags{key}}' in projected
+
+    with pytest.raises(ValidationException, match="'notAField' is not a field of AwsNativeEc2Instance"):
+        project_document(q['query_text'], q['page_path'], q['gql_name'], normalize_projection(['notAField']))
+    with pytest.raises(ValidationException, match="select its sub-fields"):
+        project_document(q['query_text'], q['page_path'], q['gql_name'], normalize_projection(['tags']))
+    with pytest.raises(ValidationException, match="has no sub-fields"):
+        project_document(q['query_text'], q['page_path'], q['gql_name'], normalize_projection(['id.value']))
+
+
+def test_query_with_fields(requests_mock, client):
+    """ Tests that a projected query sends the trimmed document under its own operation name """
+    requests_mock.post(BASE_URL + "/graphql", json={
+        "data": {"slaDomains": {"edges": [{"node": {"name": "Gold"}}]}}})
+
+    assert client._query("core_sla_list", {"filter": []}, fields=["name"]) == [{"name": "Gold"}]
+    client._query("core_sla_list", {"filter": []}, fields={"name": None})
+
+    first, second = graphql_bodies(requests_mock)
+    assert first == second
+    assert first["operationName"].startswith("SdkPythonCoreSlaListProjection")
+    assert "node{name}" in first["query"]
+    assert len(first["query"]) < len(client._graphql_query_map["core_sla_list"]["query_text"])
+
+
+
+def test_projected_query_is_cached_under_its_query_name(requests_mock, client):
+    """ Tests that projections are cached apart from the full query, invalidated with it, and measured
+    against the source document of the query
+    """
+    client._response_cache = ResponseCache()
+    requests_mock.post(BASE_URL + "/graphql", json={
+        "data": {"slaDomains": {"edges": [{"node": {"name": "Gold", "id": "1"}}]}}})
+
+    client._query("core_sla_list", {"filter": []}, fields=["name"])
+    client._query("core_sla_list", {"filter": []}, fields=["name"])
+    client._query("core_sla_list", {"filter": []})
+    assert len(graphql_bodies(requests_mock)) == 2
+    projected = graphql_bodies(requests_mock)[0]["operationName"]
+    stats = client.get_persisted_query_stats()[projected]
+    assert stats["query_bytes_saved"] == client._graphql_query_map["core_sla_list"]["source_size"] - \
+        stats["query_bytes_sent"]
+
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"assignSla": {"success": True}}})
+    client._query("core_sla_assign", {"globalSlaAssignType": "protectWithSlaId", "globalSlaOptionalFid": "1",
+                                      "objectIds": ["2"]})
+    assert client.get_cache_stats()["entries"] == 0
+
+def test_object_ids_ec2_requests_minimal_fields(requests_mock, client):
+    """ Tests that object id lookups only request the ids and the matched fields """
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"awsNativeEc2Instances": {"edges": [
+        {"node": {"id": "1", "vpcName": "prod", "tags": [{"key": "env", "value": "prod"}]}},
+        {"node": {"id": "2", "vpcName": "test", "tags": [{"key": "env", "value": "prod"}]}}
+    ]}}})
+
+    assert client.get_compute_object_ids_ec2(vpcName="prod", tags={"env": "prod"}) == ["1"]
+
+    body, = graphql_bodies(requests_mock)
+    assert "node{id vpcName tags{key value}}" in body["query"]
+    assert "effectiveSlaDomain" not in body["query"]
+
+
+def test_object_ids_unknown_criteria_requests_whole_objects(requests_mock, client):
+    """ Tests that criteria that aren't fields of the objects fall back to the full document """
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"ebsVolumesList": {"edges": [
+        {"node": {"id": "1", "tags": []}}]}}})
+
+    assert client.get_storage_object_ids_ebs(notAField="x") == []
+
+    body, = graphql_bodies(requests_mock)
+    assert body["query"] == client._graphql_query_map["storage_aws_ebs"]["query_text"]
@@ -0,0 +1,70 @@
+from conftest import BASE_URL
+from rubrik_polaris.common.pushdown import plan_pushdown, SERVER, SERVER_AND_CLIENT, CLIENT
+
+EC2_RESPONSE = {"data": {"awsNativeEc2Instances": {"edges": [
+    {"node": {"id": "1", "instanceName": "web", "tags": [{"key": "env", "value": "prod"}]}},
+    {"node": {"id": "2", "instanceName": "web-2", "tags": [{"key": "env", "value": "prod"}]}}
+]}}}
+
+
+def graphql_bodies(requests_mock):
+    return [r.json() for r in requests_mock.request_history if r.url.endswith("/graphql")]
+
+
+def test_plan_pushdown():
+    """ Tests that supported criteria become filters and the rest are matched on the client """
+    plan = plan_pushdown("compute_aws_ec2", {"region": "US_EAST_1", "vpcId": "vpc-1", "isRelic": False,
+                                             "instanceName": "web", "vpcName": "prod", "tags": {"env": "prod"}})
+
+    assert plan.filters == {
+        "regionFilter": {"regions": ["US_EAST_1"]},
+        "vpcFilter": {"vpcIds": ["vpc-1"]},
+        "relicFilter": {"relic": False},
+        "nameOrIdSubstringFilter": {"nameOrIdSubstring": "web"},
+        "tagFilter": {"tagFilterParams": [{"filterType": "TAG_KEY_VALUE", "tagKey": "env", "tagValue": "prod"}]}
+    }
+    assert plan.placement == {"region": SERVER, "vpcId": SERVER, "isRelic": SERVER, "instanceName": SERVER_AND_CLIENT,
+                              "vpcName": CLIENT, "tags": SERVER_AND_CLIENT}
+    assert plan.client_criterias == {"instanceName": "web", "vpcName": "prod", "tags": {"env": "prod"}}
+
+
+def test_plan_pushdown_client_only():
+    """ Tests that nothing is pushed down for ANY matches, unknown enum values or other queries """
+    assert plan_pushdown("compute_aws_ec2", {"region": "US_EAST_1"}, match_all=False).filters == {}
+    assert plan_pushdown("compute_aws_ec2", {"region": "NOT_A_REGION"}).placement == {"region": CLIENT}
+    assert plan_pushdown("compute_gcp_gce", {"region": "us-east1"}).filters == {}
+
+
+def test_get_compute_object_ids_ec2_pushdown(requests_mock, client):
+    """ Tests that filters are sent with the query and narrowed results are checked on the client """
+    requests_mock.post(BASE_URL + "/graphql", json=EC2_RESPONSE)
+
+    assert client.get_compute_object_ids_ec2(instanceName="web", region="US_EAST_1") == ["1"]
+
+    body, = graphql_bodies(requests_mock)
+    assert body["variables"]["filters"] == {"nameOrIdSubstringFilter": {"nameOrIdSubstring": "web"},
+                                            "regionFilter": {"regions": ["US_EAST_1"]}}
+    assert "node{id instanceName}" in body["query"]
+
+
+def test_get_storage_object_ids_ebs_match_any(requests_mock, client):
+    """ Tests that ANY matches are evaluated on the client without filters """
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"ebsVolumesList": {"edges": [
+        {"node": {"id": "1", "volumeType": "GP2", "region": "US_EAST_1"}},
+        {"node": {"id": "2", "volumeType": "GP3", "region": "US_WEST_2"}}
+    ]}}})
+
+    assert client.get_storage_object_ids_ebs(match_all=False, volumeType="GP2", region="US_WEST_1") == ["1"]
+
+    body, = graphql_bodies(requests_mock)
+    assert "filters" not in (body.get("variables") or {})
+
+
+def test_explain_object_ids(client):
+    """ Tests that the explain output shows where each criteria runs without querying Polaris """
+    explained = client.explain_storage_object_ids_ebs(tags={"env": "prod"}, volumeType="GP3", sizeInGiBs=8)
+
+    assert explained["query_name"] == "storage_aws_ebs"
+    assert explained["criterias"] == {"tags": SERVER_AND_CLIENT, "volumeType": SERVER, "sizeInGiBs": CLIENT}
+    assert explained["filters"]["typeFilter"] == {"ebsVolumeTypes": ["GP3"]}
+    assert sorted(explained["fields"]) == ["id", "sizeInGiBs", "tags"]
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.common.ratelimit import RateLimiter, get_shared_rate_limiter
+from rubrik_polaris.common.retry import NoRetryPolicy
+from rubrik_polaris.exceptions import RequestException
+from rubrik_polaris.rubrik_polaris import PolarisClient
+
+QUERY = "query SdkPythonGpsClusters { clusterConnection { nodes { id } } }"
+
+
+def test_throttling_backs_off_and_recovers():
+    """ Tests multiplicative decrease on 429 and additive increase on success """
+    limiter = RateLimiter(limits={'query': {'rate': 10, 'burst': 10, 'max_concurrency': 8}})
+
+    limiter.acquire('query')
+    limiter.release('query', error=RequestException("throttled", status_code=429))
+    stats = limiter.stats()['query']
+    assert stats['rate'] == 5
+    assert stats['concurrency_limit'] == 4
+    assert stats['throttled'] == 1
+
+    limiter.acquire('query')
+    limiter.release('query', latency=0.01)
+    stats = limiter.stats()['query']
+    assert stats['rate'] == 5.5
+    assert stats['in_flight'] == 0
+    assert stats['requests'] == 2
+
+
+def test_concurrency_is_bounded():
+    """ Tests that no more requests than the concurrency window are in flight at once """
+    limiter = RateLimiter(limits={'mutation': {'rate': 1000, 'burst': 1000, 'max_concurrency': 2}})
+    peak = []
+
+    def work():
+        with limiter.limit('mutation'):
+            peak.append(limiter.stats()['mutation']['in_flight'])
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(peak) == 2
+    assert limiter.stats()['mutation']['requests'] == 6
+
+
+def test_client_shares_limiter(requests_mock, client):
+    """ Tests that clients report throttled responses to their shared limiter """
+    limiter = RateLimiter()
+    client._rate_limiter = limiter
+    client._retry_policy = NoRetryPolicy()
+    requests_mock.post(BASE_URL + "/graphql", status_code=429, json={"code": 429, "message": "slow down"})
+
+    with pytest.raises(RequestException):
+        client._query_raw(QUERY, "SdkPythonGpsClusters", None)
+
+    assert client.get_rate_limit_stats()['query']['throttled'] == 1
+    assert client.get_rate_limit_stats()['auth']['requests'] == 1
+    assert client.get_rate_limit_stats()['query']['in_flight'] == 0
+
+
+def test_shared_rate_limiter(requests_mock):
+    """ Tests that rate_limiter=True uses the process-wide limiter and that it is disabled by default """
+    requests_mock.post(BASE_URL + "/session", json={"access_token": "dummy"})
+    kwargs = {"domain": "rubrik-se-beta", "username": "user", "password": "password", "insecure": True}
+
+    assert PolarisClient(rate_limiter=True, **kwargs)._rate_limiter is get_shared_rate_limiter()
+    assert PolarisClient(**kwargs).get_rate_limit_stats() == {}
@@ -0,0 +1,87 @@
+import pytest
+import requests
+from conftest import BASE_URL
+from rubrik_polaris.common.retry import RetryPolicy, _parse_retry_after
+from rubrik_polaris.exceptions import RequestException
+
+QUERY = "query SdkPythonGpsClusters { clusterConnection { nodes { id } } }"
+MUTATION = "mutation SdkPythonCoreSnappableOnDemand { takeOnDemandSnapshot { errors { error } } }"
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr("rubrik_polaris.common.connection.time.sleep", slept.append)
+    return slept
+
+
+def test_query_is_retried_on_transient_status(requests_mock, client, sleeps):
+    """ Tests that a query failing with 503 and then 429 is retried until it succeeds """
+    requests_mock.post(BASE_URL + "/graphql", [
+        {"status_code": 503, "text": "<html>Service Unavailable</html>"},
+        {"status_code": 429, "json": {"code": 429, "message": "slow down"}, "headers": {"Retry-After": "2"}},
+        {"json": {"data": {"a": 1}}},
+    ])
+
+    response = client._query_raw(QUERY, "SdkPythonGpsClusters", None)
+
+    assert response == {"data": {"a": 1}}
+    assert len(sleeps) == 2 and sleeps[1] >= 2
+    stats = client.get_retry_stats()["SdkPythonGpsClusters"]
+    assert stats["requests"] == 1
+    assert stats["attempts"] == 3
+    assert stats["retries"] == 2
+    assert stats["backoff_seconds"] == pytest.approx(sum(sleeps))
+
+
+def test_query_is_retried_on_graphql_error_code(requests_mock, client, sleeps):
+    """ Tests that a GraphQL error with a retryable extensions.code is retried """
+    error = {"errors": [{"message": "unavailable", "extensions": {"code": 503, "trace": {}}}]}
+    requests_mock.post(BASE_URL + "/graphql", [{"json": error}, {"json": {"data": {"a": 1}}}])
+
+    assert client._query_raw(QUERY, "SdkPythonGpsClusters", None) == {"data": {"a": 1}}
+    assert len(sleeps) == 1
+
+
+def test_query_is_retried_on_connection_error(requests_mock, client, sleeps):
+    """ Tests that a connection reset is retried and the last error is raised once attempts run out """
+    requests_mock.post(BASE_URL + "/graphql", exc=requests.exceptions.ConnectionError("reset"))
+
+    with pytest.raises(RequestException):
+        client._query_raw(QUERY, "SdkPythonGpsClusters", None)
+    assert len(sleeps) == 2
+    assert client.get_retry_stats()["SdkPythonGpsClusters"]["failures"] == 1
+
+
+def test_mutation_is_not_retried_unless_idempotent(requests_mock, client, sleeps):
+    """ Tests that mutations are only retried when marked as idempotent """
+    requests_mock.post(BASE_URL + "/graphql", [{"status_code": 503, "text": "unavailable"}, {"json": {"data": {}}}])
+    with pytest.raises(RequestException) as e:
+        client._query_raw(MUTATION, "SdkPythonCoreSnappableOnDemand", None)
+    assert e.value.status_code == 503
+    assert not sleeps
+
+    client._retry_policy = RetryPolicy(idempotent_mutations=["core_snappable_on_demand"])
+    requests_mock.post(BASE_URL + "/graphql", [{"status_code": 503, "text": "unavailable"}, {"json": {"data": {}}}])
+    assert client._query_raw(MUTATION, "SdkPythonCoreSnappableOnDemand", None) == {"data": {}}
+    assert len(sleeps) == 1
+
+
+def test_non_transient_error_is_not_retried(requests_mock, client, sleeps):
+    """ Tests that a client error is raised without retrying """
+    error = {"errors": [{"message": "forbidden", "extensions": {"code": 403, "trace": {}}}]}
+    requests_mock.post(BASE_URL + "/graphql", json=error)
+
+    with pytest.raises(RequestException) as e:
+        client._query_raw(QUERY, "SdkPythonGpsClusters", None)
+    assert e.value.error_code == 403
+    assert not sleeps
+
+
+def test_backoff_honours_retry_after():
+    """ Tests exponential backoff bounds and Retry-After parsing """
+    policy = RetryPolicy(backoff_base=1, backoff_max=4, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 5)] == [1, 2, 4, 4]
+    assert policy.backoff(1, retry_after="10") == 10
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert _parse_retry_after("soon") is None
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.common.singleflight import SingleFlight
+from rubrik_polaris.exceptions import RequestException
+
+QUERY = "query SdkPythonGpsClusters { clusterConnection { nodes { id } } }"
+MUTATION = "mutation SdkPythonCoreSnappableOnDemand { takeOnDemandSnapshot { errors { error } } }"
+
+
+def run_concurrently(count, target):
+    """ Start `count` threads calling `target` while the first call is held in flight """
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def test_single_flight_shares_result_copies():
+    """ Tests that concurrent callers of one key share one call and get their own copy """
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"nodes": [1, 2]}
+
+    threads, results = run_concurrently(4, lambda: single_flight.do("key", fetch))
+    while single_flight.stats()["requests_saved"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == [1]
+    assert results == [{"nodes": [1, 2]}] * 4
+    assert len({id(r) for r in results}) == 4
+    assert single_flight.stats() == {"requests": 1, "requests_saved": 3}
+
+
+def test_single_flight_shares_errors():
+    """ Tests that an error of the shared call is raised to every caller, and that later calls run again """
+    single_flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RequestException("boom")
+
+    threads, results = run_concurrently(3, lambda: single_flight.do("key", fetch))
+    while single_flight.stats()["requests_saved"] < 2:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert all(isinstance(r, RequestException) for r in results)
+    assert single_flight.do("key", lambda: "again") == "again"
+
+
+def test_query_raw_deduplicates_reads_only(requests_mock, client):
+    """ Tests that reads go through the single-flight layer and mutations never do """
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"a": 1}})
+
+    client._query_raw(QUERY, "SdkPythonGpsClusters", None)
+    client._query_raw(MUTATION, "SdkPythonCoreSnappableOnDemand", None)
+
+    assert client.get_deduplication_stats() == {"requests": 1, "requests_saved": 0}
@@ -0,0 +1,86 @@
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.common.bulk import DO_NOT_PROTECT, UNPROTECTED
+from rubrik_polaris.exceptions import ValidationException
+
+CURRENT = {
+    "o1": ("gold", "Direct"),
+    "o2": ("silver", "Direct"),
+    "o3": ("gold", "Derived"),
+    "o4": ("gold", "Direct"),
+    "o5": ("UNPROTECTED", "Unassigned"),
+    "o6": ("DO_NOT_PROTECT", "Direct"),
+}
+
+
+def sla_handler(failing_sla=None):
+    """ Answer hierarchy object reads from CURRENT, and SLA assignments, failing the ones to `failing_sla` """
+    def handler(request, context):
+        body = request.json()
+        variables = body["variables"]
+        if "hierarchyObjects" in body["query"]:
+            return {"data": {"hierarchyObjects": [
+                {"id": fid, "slaAssignment": CURRENT[fid][1], "effectiveSlaDomain": {"id": CURRENT[fid][0]}}
+                for fid in variables["fids"] if fid in CURRENT]}}
+        return {"data": {"assignSlasForSnappableHierarchies": [
+            {"success": variables.get("slaId") != failing_sla or failing_sla is None}]}}
+    return handler
+
+
+def assignments(requests_mock):
+    return [(r.json()["variables"].get("slaId"), r.json()["variables"]["globalSlaAssignType"],
+             r.json()["variables"]["objectIds"]) for r in requests_mock.request_history
+            if r.url.endswith("/graphql") and "assignSlasForSnappableHierarchies" in r.json()["query"]]
+
+
+def test_reconcile_sla_assignments_only_changes_differing_objects(requests_mock, client):
+    """ Tests that objects already on their SLA Domain are skipped and the rest are assigned per SLA Domain """
+    requests_mock.post(BASE_URL + "/graphql", json=sla_handler())
+    desired = {"o1": "gold", "o2": "gold", "o3": "gold", "o4": "silver", "o5": DO_NOT_PROTECT, "o6": DO_NOT_PROTECT,
+               "o7": "gold"}
+
+    result = client.reconcile_sla_assignments(desired, chunk_size=2)
+
+    assert result["changed"] == {"gold": ["o2"], "silver": ["o4"], DO_NOT_PROTECT: ["o5"]}
+    assert result["unchanged"] == ["o1", "o3", "o6"]
+    assert result["not_found"] == ["o7"]
+    assert sorted(assignments(requests_mock), key=str) == sorted([
+        ("gold", "protectWithSlaId", ["o2"]), ("silver", "protectWithSlaId", ["o4"]),
+        (None, "doNotProtect", ["o5"])], key=str)
+    assert result["summary"] == {"objects": 7, "changed": 3, "unchanged": 3, "not_found": 1, "failed": 0,
+                                 "requests": 7, "dry_run": False}
+
+
+def test_reconcile_sla_assignments_require_direct_and_unprotected(requests_mock, client):
+    requests_mock.post(BASE_URL + "/graphql", json=sla_handler())
+
+    result = client.reconcile_sla_assignments({"o3": "gold", "o4": UNPROTECTED, "o5": UNPROTECTED},
+                                              require_direct=True)
+
+    assert result["changed"] == {"gold": ["o3"], UNPROTECTED: ["o4"]}
+    assert result["unchanged"] == ["o5"]
+
+
+def test_reconcile_sla_assignments_dry_run(requests_mock, client):
+    """ Tests that a dry run reports the changes without sending any assignment """
+    requests_mock.post(BASE_URL + "/graphql", json=sla_handler())
+
+    result = client.reconcile_sla_assignments({"o1": "silver", "o2": "silver"}, dry_run=True)
+
+    assert result["changed"] == {"silver": ["o1"]} and result["summary"]["dry_run"]
+    assert assignments(requests_mock) == []
+
+
+def test_reconcile_sla_assignments_reports_failed_assignments(requests_mock, client):
+    requests_mock.post(BASE_URL + "/graphql", json=sla_handler(failing_sla="silver"))
+
+    result = client.reconcile_sla_assignments({"o1": "silver", "o2": "gold"})
+
+    assert result["changed"] == {"gold": ["o2"]}
+    assert [(e["objectId"], e["slaId"]) for e in result["errors"]] == [("o1", "silver")]
+    assert result["summary"]["failed"] == 1
+
+
+def test_reconcile_sla_assignments_validates_options(client):
+    with pytest.raises(ValidationException):
+        client.reconcile_sla_assignments({"o1": "gold"}, max_workers=0)
@@ -0,0 +1,81 @@
+import datetime
+
+import pytest
+from conftest import BASE_URL
+from rubrik_polaris.exceptions import RequestException
+
+SNAPSHOTS = {
+    "vm1": ["2021-05-01T08:00:00.000Z", "2021-05-01T10:00:00.000Z", "2021-05-01T12:00:00.000Z",
+            "2021-05-01T14:00:00.000Z", "2021-05-01T16:00:00.000Z"],
+    "vm2": ["2021-04-30T10:00:00.000Z"],
+}
+
+
+def snapshots_handler(request, context):
+    """ Answer snapshot connections from SNAPSHOTS within the time range, oldest first, paginated by `first` """
+    variables = request.json()["variables"]
+    if variables["snappableId"] not in SNAPSHOTS:
+        context.status_code = 400
+        return {"errors": [{"message": "Unknown snappable"}]}
+    dates = [d for d in SNAPSHOTS[variables["snappableId"]]
+             if variables["timeRange"]["start"] <= d <= variables["timeRange"]["end"]]
+    offset = int(variables.get("after") or 0)
+    page = dates[offset:offset + (variables.get("first") or 2)]
+    return {"data": {"snapshotsListConnection": {
+        "edges": [{"node": {"id": "{}-{}".format(variables["snappableId"], d[11:13]), "date": d}} for d in page],
+        "pageInfo": {"endCursor": str(offset + len(page)), "hasNextPage": offset + len(page) < len(dates)}
+    }}}
+
+
+def snapshot_requests(requests_mock):
+    return [r.json() for r in requests_mock.request_history
+            if r.url.endswith("/graphql") and "snapshotsListConnection" in r.json()["query"]]
+
+
+def test_resolve_snapshots_single_point(requests_mock, client):
+    """ Tests that a single recovery point reads one projected snapshot per snappable from the time range """
+    requests_mock.post(BASE_URL + "/graphql", json=snapshots_handler)
+
+    result = client.resolve_snapshots(["vm1", "vm2"], "2021-05-01T09:30:00Z",
+                                      window=datetime.timedelta(days=1))
+
+    assert result == {"vm1": {"id": "vm1-10", "date": "2021-05-01T10:00:00.000Z"}, "vm2": None}
+    sent = snapshot_requests(requests_mock)
+    assert len(sent) == 2 and all(body["variables"]["first"] == 1 for body in sent)
+    assert all(body["variables"]["timeRange"] == {"start": "2021-05-01T09:30:00.000Z",
+                                                  "end": "2021-05-02T09:30:00.000Z"} for body in sent)
+    assert all("slaDomain" not in body["query"] and body["variables"]["sortOrder"] == "ASC" for body in sent)
+
+
+def test_resolve_snapshots_many_points(requests_mock, client):
+    """ Tests that pages are read until the latest recovery point is covered, and that every point is resolved """
+    requests_mock.post(BASE_URL + "/graphql", json=snapshots_handler)
+    points = ["2021-05-01T12:00:00Z", datetime.datetime(2021, 5, 1, 9, tzinfo=datetime.timezone.utc),
+              "2021-05-01T13:00:00Z"]
+
+    result = client.resolve_snapshots(["vm1"], points)
+
+    assert [snapshot["id"] for snapshot in result["vm1"]] == ["vm1-12", "vm1-10", "vm1-14"]
+    assert len(snapshot_requests(requests_mock)) == 2
+
+
+def test_resolve_snapshots_return_exceptions(requests_mock, client):
+    requests_mock.post(BASE_URL + "/graphql", json=snapshots_handler)
+
+    with pytest.raises(RequestException):
+        client.resolve_snapshots(["vm1", "unknown"], "2021-05-01T09:30:00Z")
+    result = client.resolve_snapshots(["vm1", "unknown"], "2021-05-01T09:30:00Z", return_exceptions=True)
+
+    assert result["vm1"]["id"] == "vm1-10" and isinstance(result["unknown"], RequestException)
+
+
+def test_get_snapshots_closest_after_recovery_point(requests_mock, client):
+    """ Tests that get_snapshots returns the closest snapshot at or after the recovery point, or all of them """
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"snapshotOfASnappableConnection": {"edges": [
+        {"node": {"id": "s3", "date": "2021-05-01T12:00:00.000Z"}},
+        {"node": {"id": "s2", "date": "2021-05-01T10:00:00.000Z"}},
+        {"node": {"id": "s1", "date": "2021-05-01T08:00:00.000Z"}}]}}})
+
+    assert client.get_snapshots("vm1", "2021-05-01T09:00:00Z")["id"] == "s2"
+    assert client.get_snapshots("vm1", "2021-05-02T09:00:00Z") == {}
+    assert [s["id"] for s in client.get_snapshots("vm1")] == ["s3", "s2", "s1"]
@@ -0,0 +1,86 @@
+import base64
+import json
+import time
+from conftest import BASE_URL
+from rubrik_polaris.rubrik_polaris import PolarisClient
+from rubrik_polaris.common.token import _decode_token_expiry
+
+JSON_DATA = json.dumps({
+    "client_id": "client|dummy",
+    "client_secret": "dummy_secret",
+    "name": "dummy",
+    "access_token_uri": BASE_URL + "/client_token"
+})
+
+
+def make_token(expires_in):
+    """Build an unsigned JWT expiring in the given number of seconds."""
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": int(time.time()) + expires_in}).encode()).decode()
+    return "header.{}.signature".format(claims.rstrip("="))
+
+
+def test_decode_token_expiry():
+    """ Tests expiry decoding of JWT and opaque access tokens """
+    token = make_token(600)
+    assert abs(_decode_token_expiry(token) - (time.time() + 600)) < 5
+    assert _decode_token_expiry("opaque-token") is None
+
+
+def test_token_is_refreshed_before_expiry(requests_mock, monkeypatch):
+    """ Tests that a token within the refresh margin is replaced before the next request """
+    tokens = [{"json": {"access_token": make_token(600)}}, {"json": {"access_token": make_token(3600)}}]
+    auth = requests_mock.post(BASE_URL + "/client_token", tokens)
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {}})
+    client = PolarisClient(json_data=JSON_DATA, token_refresh_margin=120)
+
+    client._query_raw(raw_query=None, operation_name=None, variables={})
+    client._query_raw(raw_query=None, operation_name=None, variables={})
+    assert auth.call_count == 1
+
+    now = time.time()
+    monkeypatch.setattr("rubrik_polaris.common.token.time.time", lambda: now + 500)
+    client._query_raw(raw_query=None, operation_name=None, variables={})
+
+    assert auth.call_count == 2
+    assert requests_mock.last_request.headers['Authorization'] == 'Bearer ' + tokens[1]['json']['access_token']
+
+
+def test_token_is_shared_through_file_cache(requests_mock, tmp_path):
+    """ Tests that a second client reuses the token cached on disk by the first one """
+    auth = requests_mock.post(BASE_URL + "/client_token", json={"access_token": make_token(3600)})
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {}})
+    cache_path = str(tmp_path / "tokens.json")
+
+    for _ in range(2):
+        client = PolarisClient(json_data=JSON_DATA, token_cache=cache_path)
+        client._query_raw(raw_query=None, operation_name=None, variables={})
+
+    assert auth.call_count == 1
+
+
+def test_token_is_renewed_when_rejected(requests_mock):
+    """ Tests that a request rejected with 401 is retried once with a new token """
+    auth = requests_mock.post(BASE_URL + "/client_token", json={"access_token": make_token(3600)})
+    requests_mock.post(BASE_URL + "/graphql", [
+        {"status_code": 401, "json": {"code": 401, "message": "expired"}},
+        {"json": {"data": {"a": 1}}},
+    ])
+    client = PolarisClient(json_data=JSON_DATA)
+
+    assert client._query_raw(raw_query=None, operation_name=None, variables={}) == {"data": {"a": 1}}
+    assert auth.call_count == 2
+
+
+def test_basic_auth_token_is_renewed(requests_mock):
+    """ Tests that username and password clients log in again once their token was invalidated """
+    auth = requests_mock.post(BASE_URL + "/session", json={"access_token": make_token(3600)})
+    requests_mock.post(BASE_URL + "/graphql", json={"data": {"a": 1}})
+    client = PolarisClient(domain="rubrik-se-beta", username="dummy_username", password="dummy_password")
+
+    client._query_raw(raw_query=None, operation_name=None, variables={})
+    client._token_manager.invalidate()
+
+    assert client._query_raw(raw_query=None, operation_name=None, variables={}) == {"data": {"a": 1}}
+    assert auth.call_count == 2
+    assert auth.last_request.json() == {"username": "dummy_username", "password": "dummy_password"}
+    assert not hasattr(client, "_username")